@@ -1,35 +1,261 @@
-"""运行审计：保存与加载策略运行结果。"""
+"""运行审计：保存与加载策略运行结果。
+
+运行记录与逐条决策保存在 SQLite 审计库（runs/audit.db，WAL 模式）中，
+按产品、日期、主题建立索引，历史运行的检索与汇总是一次索引查询而不是目录扫描。
+早期版本逐个写出的 runs/<run_id>.json 仍可读取，也可通过 import_legacy 导入审计库。
+"""
 
 from __future__ import annotations
 
+import sqlite3
+import threading
+from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from system.utils import ensure_dir, generate_run_id, load_json
 
-from system.models import DecisionResult, RunResult
-from system.utils import ensure_dir, generate_run_id, save_json, load_json
+if TYPE_CHECKING:
+    from system.models import DecisionResult, RunResult
 
 # ROOT 指向系统根目录，RUN_DIR 保存运行记录
 ROOT = Path(__file__).resolve().parents[1]
 RUN_DIR = ROOT / "runs"
+AUDIT_DB = RUN_DIR / "audit.db"
+
+# 决策表字段顺序与 DecisionResult 一致
+DECISION_FIELDS = [
+    "date",
+    "product",
+    "theme",
+    "intent",
+    "reason",
+    "stage",
+    "score",
+    "constraint_id",
+    "break_risk",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    product TEXT NOT NULL,
+    date TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    result_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS decisions (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    product TEXT NOT NULL,
+    theme TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    score REAL NOT NULL,
+    constraint_id TEXT NOT NULL,
+    break_risk REAL NOT NULL,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_product_date ON runs(product, date);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs(date);
+CREATE INDEX IF NOT EXISTS idx_decisions_product_date ON decisions(product, date);
+CREATE INDEX IF NOT EXISTS idx_decisions_theme_date ON decisions(theme, date);
+"""
+
+# 一次待保存的运行：(运行日期, 产品, 决策列表)
+PendingRun = Tuple[str, str, Sequence["DecisionResult"]]
+
+
+class AuditStore:
+    """SQLite 审计库：WAL 模式允许查询与写入并发，批量保存在单个事务中完成。"""
+
+    def __init__(self, path: Path = AUDIT_DB) -> None:
+        self.path = Path(path)
+        ensure_dir(str(self.path.parent))
+        # 守护进程等多线程场景共用一个连接，由锁串行化访问
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def save_runs(self, runs: Iterable[PendingRun]) -> List[RunResult]:
+        # 批量保存：全部运行与决策在一个事务内 executemany 写入
+        from system.models import RunResult
+
+        records: List[RunResult] = []
+        run_rows: List[Tuple[Any, ...]] = []
+        decision_rows: List[Tuple[Any, ...]] = []
+        created_at = datetime.utcnow().isoformat(timespec="microseconds")
+        for date_str, product, results in runs:
+            run_id = generate_run_id(product.lower())
+            results = list(results)
+            run_rows.append((run_id, product, date_str, created_at, len(results)))
+            for seq, item in enumerate(results):
+                decision_rows.append(
+                    (
+                        run_id,
+                        seq,
+                        item.date.isoformat(),
+                        item.product,
+                        item.theme,
+                        item.intent,
+                        item.reason,
+                        item.stage,
+                        item.score,
+                        item.constraint_id,
+                        item.break_risk,
+                    )
+                )
+            records.append(RunResult(run_id=run_id, date=date_str, product=product, results=results))
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO runs VALUES (?, ?, ?, ?, ?)", run_rows)
+            self._conn.executemany(
+                "INSERT INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", decision_rows
+            )
+        return records
+
+    def load_rows(self, run_id: str) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        # 原始行：(运行记录, 按顺序的决策字典)，不构造 Pydantic 对象，供回放等轻量场景使用
+        with self._lock:
+            run = self._conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            rows = self._conn.execute(
+                f"SELECT {', '.join(DECISION_FIELDS)} FROM decisions WHERE run_id = ? ORDER BY seq", (run_id,)
+            ).fetchall()
+        return dict(run), [dict(row) for row in rows]
+
+    def load(self, run_id: str) -> Optional[RunResult]:
+        from system.models import DecisionResult, RunResult
+
+        loaded = self.load_rows(run_id)
+        if loaded is None:
+            return None
+        run, rows = loaded
+        results = [DecisionResult(**row) for row in rows]
+        return RunResult(run_id=run["run_id"], date=run["date"], product=run["product"], results=results)
+
+    def _where(
+        self,
+        product: Optional[str],
+        start: Optional[str],
+        end: Optional[str],
+        theme: Optional[str],
+        intent: Optional[str],
+    ) -> Tuple[str, List[Any]]:
+        # 过滤条件都落在 decisions 的 (product, date) / (theme, date) 索引上
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, op, value in (
+            ("d.product", "=", product),
+            ("d.date", ">=", start),
+            ("d.date", "<=", end),
+            ("d.theme", "=", theme),
+            ("d.intent", "=", intent),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def query_runs(
+        self,
+        product: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        theme: Optional[str] = None,
+        intent: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        # 含匹配决策的运行，按运行日期与创建时间倒序；matched 为匹配的决策条数
+        where, params = self._where(product, start, end, theme, intent)
+        sql = (
+            "SELECT r.run_id, r.product, r.date, r.created_at, r.result_count, COUNT(*) AS matched "
+            f"FROM decisions d JOIN runs r ON r.run_id = d.run_id {where} "
+            "GROUP BY r.run_id ORDER BY r.date DESC, r.created_at DESC LIMIT ?"
+        )
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, [*params, limit]).fetchall()]
+
+    def intent_counts(
+        self,
+        product: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        theme: Optional[str] = None,
+        intent: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        # 按 (主题, 意图) 聚合决策条数与平均分
+        where, params = self._where(product, start, end, theme, intent)
+        sql = (
+            "SELECT d.theme, d.intent, COUNT(*) AS count, AVG(d.score) AS avg_score "
+            f"FROM decisions d {where} GROUP BY d.theme, d.intent ORDER BY d.theme, count DESC"
+        )
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def import_legacy(self, run_dir: Path = RUN_DIR) -> int:
+        # 导入旧版 JSON 运行记录（保留原运行 ID），已存在的 ID 跳过，返回导入数量
+        run_rows: List[Tuple[Any, ...]] = []
+        decision_rows: List[Tuple[Any, ...]] = []
+        for path in sorted(Path(run_dir).glob("*.json")):
+            payload = load_json(str(path))
+            results = payload.get("results", [])
+            created_at = datetime.utcfromtimestamp(path.stat().st_mtime).isoformat(timespec="microseconds")
+            run_rows.append((payload["run_id"], payload["product"], payload["date"], created_at, len(results)))
+            for seq, item in enumerate(results):
+                decision_rows.append((payload["run_id"], seq, *(item[name] for name in DECISION_FIELDS)))
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?)", run_rows)
+            imported = self._conn.total_changes - before
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", decision_rows
+            )
+        return imported
+
+
+_STORES: Dict[str, AuditStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path: Path = AUDIT_DB) -> AuditStore:
+    # 按路径复用进程级连接
+    key = str(Path(path).resolve())
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = AuditStore(path)
+        return store
 
 
 def save_run(date_str: str, product: str, results: List[DecisionResult]) -> RunResult:
-    # 确保目录存在，然后生成唯一运行 ID
-    ensure_dir(str(RUN_DIR))
-    run_id = generate_run_id(product.lower())
-    payload = {
-        "run_id": run_id,
-        "date": date_str,
-        "product": product,
-        "results": [item.dict() for item in results],
-    }
-    save_json(str(RUN_DIR / f"{run_id}.json"), payload)
-    # 返回结构化结果，供 CLI 或其他模块使用
-    return RunResult(run_id=run_id, date=date_str, product=product, results=results)
+    # 写入审计库并返回带运行 ID 的结构化结果，供 CLI 或其他模块使用
+    return get_store().save_runs([(date_str, product, results)])[0]
+
+
+def save_runs(runs: Iterable[PendingRun]) -> List[RunResult]:
+    # 批量保存多次运行（例如区间运行），单个事务写入
+    return get_store().save_runs(runs)
 
 
 def load_run(run_id: str) -> RunResult:
-    # 从 JSON 反序列化为 Pydantic 模型
+    # 优先从审计库读取；找不到时兼容旧版 JSON 文件
+    from system.models import DecisionResult, RunResult
+
+    record = get_store().load(run_id)
+    if record is not None:
+        return record
     payload = load_json(str(RUN_DIR / f"{run_id}.json"))
     results = [DecisionResult(**item) for item in payload.get("results", [])]
     return RunResult(run_id=payload["run_id"], date=payload["date"], product=payload["product"], results=results)
@@ -0,0 +1,64 @@
+"""回测检查点：保存账务状态与在线指标，支持在新增数据上续跑回测。
+
+检查点写在回测输出目录下，记录现金、持仓、最后处理日期、交易次数、
+在线指标累加器状态以及配置哈希；配置哈希不一致时检查点作废，回测退回全量运行。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from system.data_context import DataContext
+from system.models import RebalanceSchedule
+from system.utils import load_json, save_json
+
+CHECKPOINT_FILE = "checkpoint.json"
+# 检查点格式或账务规则变化时递增，使旧检查点全部作废
+FORMAT_VERSION = 1
+
+
+def config_hash(
+    product: str,
+    start: date,
+    context: DataContext,
+    thresholds: Dict[str, Any],
+    overrides: Dict[str, Dict[str, str]],
+    schedule: RebalanceSchedule,
+) -> str:
+    # 影响账务路径的全部输入：产品、起始日、配置文件与休市日、阈值（含资金/费用）、阶段覆盖与调仓计划
+    payload = [
+        FORMAT_VERSION,
+        product,
+        start.isoformat(),
+        [context.source_digest(name) for name in ("products", "themes", "constraints", "assets", "holidays")],
+        sorted(thresholds.items()),
+        sorted((day, sorted(items.items())) for day, items in overrides.items()),
+        schedule.dict(),
+    ]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def save_checkpoint(output_dir: str, payload: Dict[str, Any]) -> None:
+    # 先写临时文件再原子替换，中途中断不会留下半个检查点
+    path = Path(output_dir) / CHECKPOINT_FILE
+    tmp_path = path.with_name(f".{CHECKPOINT_FILE}.tmp")
+    save_json(str(tmp_path), {"version": FORMAT_VERSION, **payload})
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(output_dir: str, digest: str) -> Optional[Dict[str, Any]]:
+    # 检查点缺失、损坏、版本或配置哈希不一致时返回 None
+    path = Path(output_dir) / CHECKPOINT_FILE
+    try:
+        payload = load_json(str(path))
+    except (OSError, ValueError):
+        return None
+    if payload.get("version") != FORMAT_VERSION or payload.get("config_hash") != digest:
+        return None
+    payload["last_date"] = date.fromisoformat(payload["last_date"])
+    return payload
@@ -1,28 +1,166 @@
-"""回测引擎：用历史数据模拟策略执行并输出统计。"""
+"""回测引擎：用历史数据模拟策略执行并输出统计。
+
+回测分两个阶段：决策阶段与持仓无关，可按日期分块并行生成；
+账务阶段按日期顺序回放合并后的决策流，处理现金与持仓的路径依赖。
+"""
 
 from __future__ import annotations
 
+import math
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
-from typing import Dict, List, Tuple
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, List, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
-from system.backtest.metrics import equity_stats, max_drawdown
-from system.config_loader import (
-    load_assets,
-    load_prices,
-    load_stage_overrides,
-    list_trading_dates,
-    load_thresholds,
+from system.backtest.metrics import (
+    EquityInput,
+    equity_array,
+    equity_stats_matrix,
+    max_drawdown_matrix,
 )
-from system.models import BacktestSummary, BacktestTrade, DecisionResult, EquityPoint
+from system.backtest.checkpoint import config_hash, load_checkpoint, save_checkpoint
+from system.backtest.schedule import rebalance_dates
+from system.backtest.streaming import CountingSink, CsvRecordWriter, MultiSink, OnlineMetrics, RecordSink
+from system.data_context import DataContext, context_for, get_context
+from system.indexes import PriceIndex
+from system.models import BacktestSummary, BacktestTrade, EquityPoint, RebalanceSchedule
+from system.pipeline.batch import DECISION_COLUMNS, run_pipeline_batch
+from system.pipeline.decision_cache import DecisionCache, cached_decision_frame
+from system.pipeline.range_run import CHUNK_DAYS
 from system.pipeline.runner import run_pipeline
+from system.profiling import active_profiler, span
 from system.utils import ensure_dir, save_json
 
 
-def _price_lookup(prices: pd.DataFrame, run_date: date) -> pd.DataFrame:
-    # 按日期过滤价格数据，返回当天价格快照
-    return prices[prices["date"].dt.date == run_date].copy()
+def _decide(
+    product: str,
+    dates: Sequence[date],
+    overrides: Dict[str, Dict[str, str]],
+    context: DataContext,
+    batch: bool,
+    thresholds: Dict[str, float] | None,
+    cache: DecisionCache | None = None,
+) -> pd.DataFrame:
+    # 单个日期块的决策：批量模式一次算完，否则逐日调用 run_pipeline
+    if cache is not None:
+        # 磁盘缓存：命中的日期直接读取，只为未命中的日期运行流程
+        with span("decision_cache", "decision", days=len(dates)):
+            return cached_decision_frame(
+                product,
+                dates,
+                overrides,
+                context,
+                thresholds,
+                cache,
+                lambda missing: _decide(product, missing, overrides, context, batch, thresholds),
+            )
+    if batch:
+        with span("run_pipeline_batch", "decision", days=len(dates)):
+            return run_pipeline_batch(
+                product, overrides=overrides, context=context, dates=dates, thresholds=thresholds
+            )
+    records = [
+        item.dict()
+        for run_date in dates
+        for item in run_pipeline(product, run_date, overrides=overrides, context=context, thresholds=thresholds)
+    ]
+    return pd.DataFrame(records, columns=DECISION_COLUMNS)
+
+
+def _decide_chunk(
+    product: str,
+    dates: Sequence[date],
+    overrides: Dict[str, Dict[str, str]],
+    config_dir: Path,
+    data_dir: Path,
+    batch: bool,
+    thresholds: Dict[str, float] | None,
+    cache: DecisionCache | None = None,
+) -> pd.DataFrame:
+    # 子进程入口：凭目录取回本进程的数据上下文，每个进程只加载一次数据，且只加载本块日期的分区
+    context = context_for(config_dir, data_dir).windowed(dates[0], dates[-1])
+    return _decide(product, dates, overrides, context, batch, thresholds, cache)
+
+
+def _chunk_dates(dates: Sequence[date], parts: int) -> List[List[date]]:
+    # 按连续日期切块，合并结果时天然保持日期顺序
+    size = max(1, math.ceil(len(dates) / parts))
+    return [list(dates[idx : idx + size]) for idx in range(0, len(dates), size)]
+
+
+def generate_decisions(
+    product: str,
+    dates: Sequence[date],
+    overrides: Dict[str, Dict[str, str]] | None = None,
+    context: DataContext | None = None,
+    batch: bool = True,
+    workers: int = 1,
+    thresholds: Dict[str, float] | None = None,
+    cache: DecisionCache | None = None,
+) -> pd.DataFrame:
+    # 决策阶段：run_pipeline 的输出与持仓无关，可以按日期块扇出到进程池
+    # 传入 cache 时按日读写磁盘决策缓存，各子进程直接访问同一缓存目录
+    context = context or get_context()
+    overrides = overrides or {}
+    if workers <= 1 or len(dates) < 2:
+        return _decide(product, dates, overrides, context, batch, thresholds, cache)
+    chunks = _chunk_dates(dates, workers)
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        frames = list(
+            pool.map(
+                _decide_chunk,
+                repeat(product),
+                chunks,
+                repeat(overrides),
+                repeat(context.config_dir),
+                repeat(context.data_dir),
+                repeat(batch),
+                repeat(thresholds),
+                repeat(cache),
+            )
+        )
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=DECISION_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _rebalance_decider(
+    product: str,
+    rebalance: Collection[date],
+    overrides: Dict[str, Dict[str, str]],
+    context: DataContext,
+    batch: bool,
+    workers: int,
+    thresholds: Dict[str, float] | None,
+    cache: DecisionCache | None,
+) -> Callable[[Sequence[date]], pd.DataFrame]:
+    # 流式回测按日期块取决策：只为块内的调仓日生成决策
+    def decide(chunk: Sequence[date]) -> pd.DataFrame:
+        return generate_decisions(
+            product,
+            [run_date for run_date in chunk if run_date in rebalance],
+            overrides,
+            context=context,
+            batch=batch,
+            workers=workers,
+            thresholds=thresholds,
+            cache=cache,
+        )
+
+    return decide
+
+
+def group_decisions_by_date(frame: pd.DataFrame) -> Dict[date, List[Any]]:
+    # 决策表按日期分组，行对象提供 theme/intent/reason 属性，与 DecisionResult 用法一致
+    grouped: Dict[date, List[Any]] = {}
+    for row in frame.itertuples(index=False):
+        grouped.setdefault(row.date, []).append(row)
+    return grouped
 
 
 def _action_from_intent(intent: str) -> str:
@@ -30,45 +168,53 @@ def _action_from_intent(intent: str) -> str:
     return intent
 
 
-def run_backtest(
-    product: str,
-    start: date,
-    end: date,
-    stage_overrides_path: str | None,
-    output_dir: str,
-) -> Tuple[List[BacktestTrade], List[EquityPoint], BacktestSummary]:
-    # 从阈值配置读取资金、滑点与手续费参数
-    thresholds = load_thresholds().get("thresholds", {})
-    initial_cash = float(thresholds.get("initial_cash", 1_000_000.0))
-    max_positions = int(thresholds.get("max_positions", 3))
-    slippage = float(thresholds.get("slippage", 0.0005))
-    fee = float(thresholds.get("fee", 0.0003))
+class Book:
+    """账户状态：现金与各标的持仓数量，账务阶段原地更新，可写入检查点续跑。"""
 
-    # 读取覆盖配置与基础数据
-    overrides = load_stage_overrides(stage_overrides_path)
-    assets = load_assets()
-    prices = load_prices()
+    __slots__ = ("cash", "positions")
 
-    cash = initial_cash
-    positions: Dict[str, float] = {}
-    trades: List[BacktestTrade] = []
-    equity_points: List[EquityPoint] = []
+    def __init__(self, cash: float, positions: Dict[str, float] | None = None) -> None:
+        self.cash = cash
+        self.positions = positions if positions is not None else {}
 
-    # 遍历交易日，逐日模拟策略执行
-    dates = list_trading_dates(start, end)
-    for run_date in dates:
-        decisions = run_pipeline(product, run_date, overrides=overrides)
-        day_prices = _price_lookup(prices, run_date)
-        theme_asset_map = assets[assets["product"] == product].set_index("theme")["asset_id"].to_dict()
 
-        for decision in decisions:
+def simulate_fills(
+    decisions: pd.DataFrame,
+    dates: Sequence[date],
+    price_index: PriceIndex,
+    theme_asset_map: Dict[str, str],
+    initial_cash: float,
+    max_positions: int,
+    slippage: float,
+    fee: float,
+    trade_sink: RecordSink | None = None,
+    equity_sink: RecordSink | None = None,
+    book: Book | None = None,
+) -> Tuple[List[BacktestTrade], List[EquityPoint]]:
+    # 账务阶段：按日期顺序回放决策流，现金与持仓路径依赖，必须顺序执行
+    # 传入 sink 时记录直接交给接收端（例如流式落盘），返回值即对应的 sink
+    # 传入 book 时从其现金与持仓继续回放，结束后 book 即为最终账户状态
+    book = book if book is not None else Book(initial_cash)
+    cash = book.cash
+    positions = book.positions
+    trades: List[BacktestTrade] = trade_sink if trade_sink is not None else []
+    equity_points: List[EquityPoint] = equity_sink if equity_sink is not None else []
+    decisions_by_date = group_decisions_by_date(decisions)
+    # 开启剖析时分别记录每日成交与盯市耗时
+    profiler = active_profiler()
+
+    for run_date in dates:
+        token = profiler.start() if profiler is not None else None
+        day_decisions = decisions_by_date.get(run_date, [])
+        # 当天价格快照：标的 -> 收盘价
+        day_prices = price_index.day(run_date)
+        for decision in day_decisions:
             asset_id = theme_asset_map.get(decision.theme)
             if asset_id is None:
                 continue
-            price_row = day_prices[day_prices["asset_id"] == asset_id]
-            if price_row.empty:
+            price = day_prices.get(asset_id)
+            if price is None:
                 continue
-            price = float(price_row["close"].iloc[0])
             intent = decision.intent
             current_qty = positions.get(asset_id, 0.0)
             action = _action_from_intent(intent)
@@ -147,39 +293,54 @@ def run_backtest(
                     )
                 )
 
+        if profiler is not None:
+            profiler.record("fill", "backtest.day", token)
+            token = profiler.start()
+
         # 计算当日持仓市值与总权益
         day_value = 0.0
         for asset_id, qty in positions.items():
             if qty <= 0:
                 continue
-            price_row = day_prices[day_prices["asset_id"] == asset_id]
-            if price_row.empty:
+            price = day_prices.get(asset_id)
+            if price is None:
                 continue
-            price = float(price_row["close"].iloc[0])
             day_value += qty * price
         equity = cash + day_value
         equity_points.append(EquityPoint(date=run_date, equity=equity, cash=cash, positions_value=day_value))
+        if profiler is not None:
+            profiler.record("mark_to_market", "backtest.day", token)
+
+    book.cash = cash
+    return trades, equity_points
 
-    # 汇总回测统计指标
-    final_equity = equity_points[-1].equity if equity_points else initial_cash
-    total_return = (final_equity - initial_cash) / initial_cash if initial_cash else 0.0
-    max_dd = max_drawdown(equity_points)
-    stats = equity_stats(equity_points)
-    calmar = stats["annualized_return"] / max_dd if max_dd > 0 else 0.0
 
-    summary = BacktestSummary(
+def summary_from_stats(
+    start: date,
+    end: date,
+    initial_cash: float,
+    trade_count: int,
+    final_equity: float,
+    max_dd: float,
+    stats: Dict[str, float | int],
+) -> BacktestSummary:
+    # 由指标字典组装汇总结果，批量计算与在线累加共用
+    total_return = (final_equity - initial_cash) / initial_cash if initial_cash else 0.0
+    annualized_return = float(stats["annualized_return"])
+    calmar = annualized_return / max_dd if max_dd > 0 else 0.0
+    return BacktestSummary(
         start=start,
         end=end,
         initial_cash=initial_cash,
         final_equity=final_equity,
         total_return=total_return,
-        annualized_return=float(stats["annualized_return"]),
+        annualized_return=annualized_return,
         annualized_volatility=float(stats["annualized_volatility"]),
         sharpe=float(stats["sharpe"]),
         sortino=float(stats["sortino"]),
         calmar=calmar,
         max_drawdown=max_dd,
-        trade_count=len(trades),
+        trade_count=int(trade_count),
         trading_days=int(stats["trading_days"]),
         win_rate=float(stats["win_rate"]),
         positive_days=int(stats["positive_days"]),
@@ -191,6 +352,267 @@ def run_backtest(
         avg_daily_return=float(stats["avg_daily_return"]),
     )
 
+
+def build_summaries(
+    start: date,
+    end: date,
+    initial_cash: Sequence[float],
+    trade_counts: Sequence[int],
+    equity: np.ndarray,
+) -> List[BacktestSummary]:
+    # 批量汇总：equity 形状为 (曲线数, 日期数)，指标按行向量化计算
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    stats = equity_stats_matrix(equity)
+    max_dd = max_drawdown_matrix(equity)
+    summaries: List[BacktestSummary] = []
+    for row, (cash, trade_count) in enumerate(zip(initial_cash, trade_counts)):
+        final_equity = float(equity[row, -1]) if equity.shape[1] else float(cash)
+        row_stats = {name: values[row] for name, values in stats.items()}
+        summaries.append(
+            summary_from_stats(start, end, cash, trade_count, final_equity, float(max_dd[row]), row_stats)
+        )
+    return summaries
+
+
+def build_summary(
+    start: date,
+    end: date,
+    initial_cash: float,
+    trade_count: int,
+    equity_points: EquityInput,
+) -> BacktestSummary:
+    # 汇总单条权益曲线的回测统计指标
+    equity = equity_array(equity_points)
+    return build_summaries(start, end, [initial_cash], [trade_count], equity[None, :])[0]
+
+
+def _run_streaming(
+    start: date,
+    end: date,
+    output_dir: str | None,
+    decide: Callable[[Sequence[date]], pd.DataFrame],
+    dates: Sequence[date],
+    price_index: PriceIndex,
+    theme_asset_map: Dict[str, str],
+    initial_cash: float,
+    max_positions: int,
+    slippage: float,
+    fee: float,
+    book: Book,
+    metrics: OnlineMetrics,
+    trade_count: int = 0,
+    append: bool = False,
+    chunk_days: int = CHUNK_DAYS,
+) -> Tuple[BacktestSummary, int]:
+    # 流式账务：按 chunk_days 个交易日一块，先由 decide 生成本块决策再回放，回放完即丢弃，
+    # 决策、交易与权益都不随回测长度累积；记录直接写入 CSV，权益同时送入在线指标累加器
+    # 返回汇总与累计交易次数；续跑时 book/metrics 来自检查点，append=True 在已有 CSV 末尾追加
+    trade_sink: RecordSink = CountingSink()
+    equity_sink: RecordSink = metrics
+    writers: List[CsvRecordWriter] = []
+    if output_dir is not None:
+        ensure_dir(output_dir)
+        trade_writer = CsvRecordWriter(f"{output_dir}/trades.csv", BacktestTrade, append=append)
+        equity_writer = CsvRecordWriter(f"{output_dir}/equity.csv", EquityPoint, append=append)
+        writers = [trade_writer, equity_writer]
+        trade_sink = trade_writer
+        equity_sink = MultiSink(equity_writer, metrics)
+    try:
+        for idx in range(0, len(dates), chunk_days):
+            chunk = dates[idx : idx + chunk_days]
+            with span("decisions", "backtest", days=len(chunk)):
+                decisions = decide(chunk)
+            # 同一 book 与 sink 跨块延续，账户状态与逐日回放一致
+            simulate_fills(
+                decisions,
+                chunk,
+                price_index,
+                theme_asset_map,
+                initial_cash,
+                max_positions,
+                slippage,
+                fee,
+                trade_sink=trade_sink,
+                equity_sink=equity_sink,
+                book=book,
+            )
+    finally:
+        for writer in writers:
+            writer.close()
+    trade_count += len(trade_sink)
+    final_equity = metrics.last_equity if metrics.count else initial_cash
+    summary = summary_from_stats(
+        start, end, initial_cash, trade_count, final_equity, metrics.max_drawdown(), metrics.stats()
+    )
+    if output_dir is not None:
+        save_json(f"{output_dir}/summary.json", summary.dict())
+    return summary, trade_count
+
+
+def _write_checkpoint(
+    output_dir: str,
+    digest: str,
+    product: str,
+    start: date,
+    last_date: date,
+    book: Book,
+    metrics: OnlineMetrics,
+    trade_count: int,
+) -> None:
+    save_checkpoint(
+        output_dir,
+        {
+            "config_hash": digest,
+            "product": product,
+            "start": start.isoformat(),
+            "last_date": last_date.isoformat(),
+            "cash": book.cash,
+            "positions": book.positions,
+            "trade_count": trade_count,
+            "metrics": metrics.to_dict(),
+        },
+    )
+
+
+def run_backtest(
+    product: str,
+    start: date,
+    end: date,
+    stage_overrides_path: str | None,
+    output_dir: str | None,
+    context: DataContext | None = None,
+    batch: bool = True,
+    workers: int = 1,
+    threshold_overrides: Dict[str, float] | None = None,
+    stream: bool = False,
+    decision_cache: DecisionCache | None = None,
+    resume: bool = False,
+    schedule: RebalanceSchedule | None = None,
+) -> Tuple[List[BacktestTrade], List[EquityPoint], BacktestSummary]:
+    # stream=True 时交易与权益逐条写盘、指标在线累加，返回的两个列表为空
+    # decision_cache 非空时每日决策优先读取磁盘缓存，重复或重叠区间的回测只需计算新增日期
+    # 指定 output_dir 时同时写出检查点；resume=True 且检查点有效时只回放检查点之后的日期，
+    # 新记录追加到已有 CSV，返回的两个列表同样为空；检查点无效（配置变化等）时自动全量运行
+    # schedule 为调仓计划（默认每日）：只在调仓日生成决策并交易，其余交易日只盯市
+    # 整个回测共享一个数据上下文，配置与数据只解析一次；分区布局下只加载窗口内的分区
+    context = (context or get_context()).windowed(start, end)
+    schedule = schedule or RebalanceSchedule()
+    # 从阈值配置读取资金、滑点与手续费参数；调参时以 threshold_overrides 覆盖配置值
+    thresholds = {**context.thresholds().get("thresholds", {}), **(threshold_overrides or {})}
+    initial_cash = float(thresholds.get("initial_cash", 1_000_000.0))
+    max_positions = int(thresholds.get("max_positions", 3))
+    slippage = float(thresholds.get("slippage", 0.0005))
+    fee = float(thresholds.get("fee", 0.0003))
+
+    # 读取覆盖配置与基础数据
+    overrides = context.stage_overrides(stage_overrides_path)
+    assets = context.assets()
+    # 主题到标的的映射与日期无关，只计算一次
+    theme_asset_map = assets[assets["product"] == product].set_index("theme")["asset_id"].to_dict()
+
+    # 只在真实交易日上迭代：日期来自行情数据，并扣除休市日
+    dates = context.calendar().sessions(start, end)
+    # 调仓日按完整区间计算，续跑时周期锚点与全量运行一致
+    rebalance = set(rebalance_dates(schedule, dates, product, context))
+    digest = config_hash(product, start, context, thresholds, overrides, schedule) if output_dir is not None else None
+    checkpoint = load_checkpoint(output_dir, digest) if resume and output_dir is not None else None
+    if checkpoint is not None and checkpoint["last_date"] <= end:
+        # 续跑：账户与指标从检查点恢复，只为新增日期生成决策，数据只加载新增窗口
+        last_date = checkpoint["last_date"]
+        dates = [run_date for run_date in dates if run_date > last_date]
+        book = Book(float(checkpoint["cash"]), {key: float(qty) for key, qty in checkpoint["positions"].items()})
+        metrics = OnlineMetrics.from_dict(checkpoint["metrics"])
+        trade_count = int(checkpoint["trade_count"])
+        if dates:
+            context = context.windowed(dates[0], end)
+        decide = _rebalance_decider(
+            product, rebalance, overrides, context, batch, workers, thresholds, decision_cache
+        )
+        with span("fills", "backtest", resume=True):
+            summary, trade_count = _run_streaming(
+                start,
+                end,
+                output_dir,
+                decide,
+                dates,
+                context.price_index(),
+                theme_asset_map,
+                initial_cash,
+                max_positions,
+                slippage,
+                fee,
+                book,
+                metrics,
+                trade_count,
+                append=True,
+                chunk_days=CHUNK_DAYS * max(1, workers),
+            )
+        if dates:
+            _write_checkpoint(output_dir, digest, product, start, dates[-1], book, metrics, trade_count)
+        return [], [], summary
+
+    price_index = context.price_index()
+    book = Book(initial_cash)
+    if stream:
+        # 流式：决策按日期块生成并立即回放，不生成整个区间的决策表
+        decide = _rebalance_decider(
+            product, rebalance, overrides, context, batch, workers, thresholds, decision_cache
+        )
+        metrics = OnlineMetrics()
+        with span("fills", "backtest", stream=True):
+            summary, trade_count = _run_streaming(
+                start,
+                end,
+                output_dir,
+                decide,
+                dates,
+                price_index,
+                theme_asset_map,
+                initial_cash,
+                max_positions,
+                slippage,
+                fee,
+                book,
+                metrics,
+                chunk_days=CHUNK_DAYS * max(1, workers),
+            )
+        if output_dir is not None and dates:
+            _write_checkpoint(output_dir, digest, product, start, dates[-1], book, metrics, trade_count)
+        return [], [], summary
+
+    # 阶段一：生成全部日期的决策（workers>1 时按日期块并行）
+    with span("decisions", "backtest", workers=workers, batch=batch):
+        decisions = generate_decisions(
+            product,
+            [run_date for run_date in dates if run_date in rebalance],
+            overrides,
+            context=context,
+            batch=batch,
+            workers=workers,
+            thresholds=thresholds,
+            cache=decision_cache,
+        )
+
+    # 阶段二：顺序回放决策，模拟成交与逐日盯市
+    with span("fills", "backtest"):
+        trades, equity_points = simulate_fills(
+            decisions,
+            dates,
+            price_index,
+            theme_asset_map,
+            initial_cash,
+            max_positions,
+            slippage,
+            fee,
+            book=book,
+        )
+    with span("summary", "backtest"):
+        summary = build_summary(start, end, initial_cash, len(trades), equity_points)
+
+    # 参数扫描等场景不需要落盘明细，output_dir 为空时直接返回
+    if output_dir is None:
+        return trades, equity_points, summary
+
     # 输出回测结果文件：交易记录、权益曲线、汇总指标
     ensure_dir(output_dir)
     trades_df = pd.DataFrame([t.dict() for t in trades])
@@ -198,5 +620,11 @@ def run_backtest(
     trades_df.to_csv(f"{output_dir}/trades.csv", index=False)
     equity_df.to_csv(f"{output_dir}/equity.csv", index=False)
     save_json(f"{output_dir}/summary.json", summary.dict())
+    if dates:
+        # 检查点中的指标累加器由权益曲线补算，续跑时与流式模式一致
+        metrics = OnlineMetrics()
+        for point in equity_points:
+            metrics.update(point.equity)
+        _write_checkpoint(output_dir, digest, product, start, dates[-1], book, metrics, len(trades))
 
     return trades, equity_points, summary
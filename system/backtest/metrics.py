@@ -1,109 +1,217 @@
-"""回测指标计算：最大回撤与收益统计。"""
+"""回测指标计算：最大回撤、收益统计与滚动窗口分析（NumPy 向量化）。
+
+所有函数既接受 EquityPoint 列表，也接受权益数值数组；
+带 _matrix 后缀的函数按行批量计算多条权益曲线，适合参数扫描结果。
+"""
 
 from __future__ import annotations
 
 import math
-from typing import Dict, List
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
 
 from system.models import EquityPoint
 
+# 年化换算使用的交易日数量
+PERIODS_PER_YEAR = 252
+
+EquityInput = Union[Sequence[EquityPoint], Sequence[float], np.ndarray]
+
+# 统计字段及其类型：整数字段在单曲线接口中转换为 int
+STAT_FIELDS = {
+    "trading_days": int,
+    "avg_daily_return": float,
+    "annualized_return": float,
+    "annualized_volatility": float,
+    "sharpe": float,
+    "sortino": float,
+    "win_rate": float,
+    "positive_days": int,
+    "negative_days": int,
+    "flat_days": int,
+    "best_day": float,
+    "worst_day": float,
+    "profit_factor": float,
+}
+
+
+def equity_array(points: EquityInput) -> np.ndarray:
+    # 统一转换为 float 数组，EquityPoint 列表只在边界处遍历一次
+    if isinstance(points, np.ndarray):
+        return points.astype(float, copy=False)
+    items = list(points)
+    if items and isinstance(items[0], EquityPoint):
+        return np.fromiter((item.equity for item in items), dtype=float, count=len(items))
+    return np.asarray(items, dtype=float)
+
+
+def daily_returns(values: np.ndarray) -> np.ndarray:
+    # 沿最后一维计算日收益率，前值为 0 时收益记为 0
+    prev = values[..., :-1]
+    diff = values[..., 1:] - prev
+    return np.divide(diff, prev, out=np.zeros_like(diff), where=prev != 0)
+
+
+def drawdown_series(points: EquityInput) -> np.ndarray:
+    # 回撤序列：当前权益相对历史峰值的跌幅，峰值为 0 时记为 0
+    values = equity_array(points)
+    peak = np.maximum.accumulate(values, axis=-1)
+    return np.divide(peak - values, peak, out=np.zeros_like(values), where=peak != 0)
 
-def max_drawdown(points: List[EquityPoint]) -> float:
+
+def max_drawdown(points: EquityInput) -> float:
     # 最大回撤：从峰值到谷底的最大跌幅
-    if not points:
+    values = equity_array(points)
+    if values.size == 0:
         return 0.0
-    peak = points[0].equity
-    max_dd = 0.0
-    for point in points:
-        # 更新峰值并计算当前回撤
-        if point.equity > peak:
-            peak = point.equity
-        drawdown = (peak - point.equity) / peak if peak else 0.0
-        if drawdown > max_dd:
-            max_dd = drawdown
-    return max_dd
-
-
-def equity_stats(points: List[EquityPoint]) -> Dict[str, float | int]:
-    # 计算日收益序列与常见绩效指标
-    trading_days = len(points)
+    return max(0.0, float(drawdown_series(values).max()))
+
+
+def max_drawdown_matrix(values: np.ndarray) -> np.ndarray:
+    # 按行计算多条权益曲线的最大回撤
+    values = np.asarray(values, dtype=float)
+    if values.shape[-1] == 0:
+        return np.zeros(values.shape[:-1])
+    return np.maximum(0.0, drawdown_series(values).max(axis=-1))
+
+
+def _zero_stats(trading_days: np.ndarray) -> Dict[str, np.ndarray]:
+    zeros = np.zeros_like(trading_days, dtype=float)
+    stats = {name: zeros.copy() for name in STAT_FIELDS}
+    stats["trading_days"] = trading_days
+    return stats
+
+
+def equity_stats_matrix(values: np.ndarray) -> Dict[str, np.ndarray]:
+    # 按行批量计算绩效指标，输入形状为 (曲线数, 日期数)，返回每个指标一个数组
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    n_curves, trading_days = values.shape
+    days = np.full(n_curves, trading_days, dtype=int)
     if trading_days < 2:
         # 数据不足时返回零值指标，避免除零错误
-        return {
-            "trading_days": trading_days,
-            "avg_daily_return": 0.0,
-            "annualized_return": 0.0,
-            "annualized_volatility": 0.0,
-            "sharpe": 0.0,
-            "sortino": 0.0,
-            "calmar": 0.0,
-            "win_rate": 0.0,
-            "positive_days": 0,
-            "negative_days": 0,
-            "flat_days": 0,
-            "best_day": 0.0,
-            "worst_day": 0.0,
-            "profit_factor": 0.0,
-        }
-
-    returns: List[float] = []
-    for idx in range(1, trading_days):
-        prev_equity = points[idx - 1].equity
-        curr_equity = points[idx].equity
-        if prev_equity == 0:
-            returns.append(0.0)
-        else:
-            returns.append((curr_equity - prev_equity) / prev_equity)
-
-    avg_daily_return = sum(returns) / len(returns) if returns else 0.0
+        return _zero_stats(days)
+
+    returns = daily_returns(values)
+    n_returns = returns.shape[1]
+    avg_daily_return = returns.sum(axis=1) / n_returns
     # 方差与波动率计算：使用样本方差
-    variance = 0.0
-    if len(returns) > 1:
-        variance = sum((value - avg_daily_return) ** 2 for value in returns) / (len(returns) - 1)
-    daily_vol = math.sqrt(variance)
-    annualized_vol = daily_vol * math.sqrt(252)
-
-    downside_returns = [value for value in returns if value < 0.0]
-    # 下行波动用于 Sortino 计算
-    downside_variance = 0.0
-    if len(downside_returns) > 1:
-        downside_mean = sum(downside_returns) / len(downside_returns)
-        downside_variance = sum((value - downside_mean) ** 2 for value in downside_returns) / (
-            len(downside_returns) - 1
-        )
-    downside_vol = math.sqrt(downside_variance)
-
-    sharpe = avg_daily_return / daily_vol * math.sqrt(252) if daily_vol > 0 else 0.0
-    sortino = avg_daily_return / downside_vol * math.sqrt(252) if downside_vol > 0 else 0.0
-
-    starting_equity = points[0].equity
-    ending_equity = points[-1].equity
-    annualized_return = 0.0
-    if starting_equity > 0 and returns:
-        # 年化收益率按 252 交易日换算
-        annualized_return = (ending_equity / starting_equity) ** (252 / len(returns)) - 1
-
-    positive_days = sum(1 for value in returns if value > 0.0)
-    negative_days = sum(1 for value in returns if value < 0.0)
-    flat_days = len(returns) - positive_days - negative_days
-
-    positive_sum = sum(value for value in returns if value > 0.0)
-    negative_sum = sum(value for value in returns if value < 0.0)
-    # 收益因子 = 正收益总和 / 负收益绝对值总和
-    profit_factor = positive_sum / abs(negative_sum) if negative_sum < 0 else 0.0
+    variance = np.zeros(n_curves)
+    if n_returns > 1:
+        deviation = returns - avg_daily_return[:, None]
+        variance = (deviation * deviation).sum(axis=1) / (n_returns - 1)
+    daily_vol = np.sqrt(variance)
+
+    # 下行波动用于 Sortino 计算：只统计负收益
+    negative = returns < 0.0
+    positive = returns > 0.0
+    negative_days = negative.sum(axis=1)
+    positive_days = positive.sum(axis=1)
+    negative_sum = np.where(negative, returns, 0.0).sum(axis=1)
+    positive_sum = np.where(positive, returns, 0.0).sum(axis=1)
+    downside_mean = np.divide(negative_sum, negative_days, out=np.zeros(n_curves), where=negative_days > 0)
+    downside_dev = np.where(negative, returns - downside_mean[:, None], 0.0)
+    downside_variance = np.divide(
+        (downside_dev * downside_dev).sum(axis=1),
+        negative_days - 1,
+        out=np.zeros(n_curves),
+        where=negative_days > 1,
+    )
+    downside_vol = np.sqrt(downside_variance)
 
+    scale = math.sqrt(PERIODS_PER_YEAR)
+    sharpe = np.divide(avg_daily_return, daily_vol, out=np.zeros(n_curves), where=daily_vol > 0) * scale
+    sortino = np.divide(avg_daily_return, downside_vol, out=np.zeros(n_curves), where=downside_vol > 0) * scale
+
+    # 年化收益率按 252 交易日换算
+    starting, ending = values[:, 0], values[:, -1]
+    growth = np.divide(ending, starting, out=np.ones(n_curves), where=starting > 0)
+    annualized_return = np.where(starting > 0, growth ** (PERIODS_PER_YEAR / n_returns) - 1, 0.0)
+
+    # 收益因子 = 正收益总和 / 负收益绝对值总和
+    profit_factor = np.divide(
+        positive_sum, np.abs(negative_sum), out=np.zeros(n_curves), where=negative_sum < 0
+    )
     return {
-        "trading_days": trading_days,
+        "trading_days": days,
         "avg_daily_return": avg_daily_return,
         "annualized_return": annualized_return,
-        "annualized_volatility": annualized_vol,
+        "annualized_volatility": daily_vol * scale,
         "sharpe": sharpe,
         "sortino": sortino,
-        "win_rate": positive_days / len(returns) if returns else 0.0,
+        "win_rate": positive_days / n_returns,
         "positive_days": positive_days,
         "negative_days": negative_days,
-        "flat_days": flat_days,
-        "best_day": max(returns) if returns else 0.0,
-        "worst_day": min(returns) if returns else 0.0,
+        "flat_days": n_returns - positive_days - negative_days,
+        "best_day": returns.max(axis=1),
+        "worst_day": returns.min(axis=1),
         "profit_factor": profit_factor,
     }
+
+
+def equity_stats(points: EquityInput) -> Dict[str, float | int]:
+    # 单条权益曲线的绩效指标，字段与 BacktestSummary 对应
+    stats = equity_stats_matrix(equity_array(points)[None, :])
+    return {name: cast(stats[name][0]) for name, cast in STAT_FIELDS.items()}
+
+
+def _windows(values: np.ndarray, window: int) -> np.ndarray:
+    # 滑动窗口视图，不复制数据；窗口数不足时返回空数组
+    if window < 2:
+        raise ValueError("滚动窗口长度至少为 2")
+    if values.shape[-1] < window:
+        return np.empty(values.shape[:-1] + (0, window))
+    return np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+
+
+def _pad(series: np.ndarray, length: int) -> np.ndarray:
+    # 在序列前补 NaN，使滚动结果与原始日期对齐
+    pad = length - series.shape[-1]
+    return np.concatenate([np.full(series.shape[:-1] + (pad,), np.nan), series], axis=-1)
+
+
+def rolling_volatility(points: EquityInput, window: int = 21, annualize: bool = True) -> np.ndarray:
+    # 滚动波动率：窗口内日收益的样本标准差，结果与权益序列等长
+    values = equity_array(points)
+    windows = _windows(daily_returns(values), window)
+    vol = windows.std(axis=-1, ddof=1)
+    if annualize:
+        vol = vol * math.sqrt(PERIODS_PER_YEAR)
+    return _pad(vol, values.shape[-1])
+
+
+def rolling_sharpe(points: EquityInput, window: int = 63) -> np.ndarray:
+    # 滚动夏普：窗口内平均日收益 / 日波动率，再年化
+    values = equity_array(points)
+    windows = _windows(daily_returns(values), window)
+    mean = windows.mean(axis=-1)
+    vol = windows.std(axis=-1, ddof=1)
+    sharpe = np.divide(mean, vol, out=np.zeros_like(mean), where=vol > 0) * math.sqrt(PERIODS_PER_YEAR)
+    return _pad(sharpe, values.shape[-1])
+
+
+def rolling_max_drawdown(points: EquityInput, window: int = 63) -> np.ndarray:
+    # 滚动最大回撤：每个窗口内部独立计算峰谷跌幅
+    values = equity_array(points)
+    windows = _windows(values, window)
+    peak = np.maximum.accumulate(windows, axis=-1)
+    drawdown = np.divide(peak - windows, peak, out=np.zeros_like(windows), where=peak != 0)
+    return _pad(drawdown.max(axis=-1), values.shape[-1])
+
+
+def drawdown_durations(points: EquityInput) -> Dict[str, float | int]:
+    # 回撤持续期：连续处于历史峰值之下的天数统计
+    underwater = drawdown_series(points) > 0.0
+    if not underwater.any():
+        return {"count": 0, "max_duration": 0, "avg_duration": 0.0, "current_duration": 0}
+    # 通过边界差分一次性找出所有回撤区间的起止位置
+    edges = np.diff(np.concatenate([[0], underwater.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths: List[int] = (ends - starts).tolist()
+    return {
+        "count": len(lengths),
+        "max_duration": int(max(lengths)),
+        "avg_duration": float(sum(lengths) / len(lengths)),
+        "current_duration": int(lengths[-1]) if underwater[-1] else 0,
+    }
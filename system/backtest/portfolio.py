@@ -0,0 +1,166 @@
+"""组合回测：多个产品在进程池上并行回测，权益曲线按日期加总为整个账簿的组合结果。
+
+父进程先加载一次配置、数据与日期索引；支持 fork 的平台上工作进程直接继承这份只读缓存，
+不再各自解析文件。每个产品独立记账（各自的起始资金与持仓上限），组合权益为各产品权益之和，
+组合汇总指标按加总后的权益曲线重新计算，交易次数为各产品之和。
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from system.backtest.engine import build_summary, run_backtest
+from system.data_context import DataContext, context_for, get_context
+from system.models import BacktestSummary, EquityPoint, RebalanceSchedule
+from system.pipeline.decision_cache import DecisionCache
+from system.utils import ensure_dir, save_json
+
+# 单个产品的回测结果：(产品, 权益曲线 [(日期, 权益, 现金, 持仓市值)], 汇总)
+ProductResult = Tuple[str, List[Tuple[date, float, float, float]], BacktestSummary]
+
+
+def _warm(config_dir: Path, data_dir: Path, start: date, end: date) -> None:
+    # 加载回测窗口内用到的全部数据与索引；已加载时只做签名检查
+    context = context_for(config_dir, data_dir).windowed(start, end)
+    context.thresholds()
+    context.assets()
+    context.calendar()
+    context.price_index()
+    context.news()
+    context.macro()
+    context.news_index()
+    context.macro_index()
+
+
+def _mp_context() -> Optional[multiprocessing.context.BaseContext]:
+    # fork 让工作进程继承父进程已加载的数据（写时复制，只读使用不会复制）；不支持 fork 的平台由初始化函数各自加载
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _run_product(
+    product: str,
+    start: date,
+    end: date,
+    stage_overrides_path: str | None,
+    output_dir: str | None,
+    schedule: RebalanceSchedule | None,
+    use_cache: bool,
+    config_dir: Path,
+    data_dir: Path,
+) -> ProductResult:
+    context = context_for(config_dir, data_dir)
+    _, equity_points, summary = run_backtest(
+        product,
+        start,
+        end,
+        stage_overrides_path,
+        output_dir,
+        context=context,
+        decision_cache=DecisionCache() if use_cache else None,
+        schedule=schedule,
+    )
+    curve = [(point.date, point.equity, point.cash, point.positions_value) for point in equity_points]
+    return product, curve, summary
+
+
+def aggregate_equity(results: Sequence[ProductResult]) -> List[EquityPoint]:
+    # 按日期加总各产品的权益、现金与持仓市值；某产品缺少的日期沿用其上一日，开始前按起始资金计
+    columns = ["equity", "cash", "positions_value"]
+    frames = {}
+    for product, curve, summary in results:
+        frame = pd.DataFrame(curve, columns=["date", *columns]).set_index("date")
+        frames[product] = (frame, summary.initial_cash)
+    if not frames:
+        return []
+    dates = sorted(set().union(*(frame.index for frame, _ in frames.values())))
+    total = pd.DataFrame(0.0, index=dates, columns=columns)
+    for frame, initial_cash in frames.values():
+        aligned = frame.reindex(dates).ffill()
+        aligned = aligned.fillna({"equity": initial_cash, "cash": initial_cash, "positions_value": 0.0})
+        total += aligned[columns]
+    return [
+        EquityPoint(date=day, equity=equity, cash=cash, positions_value=positions_value)
+        for day, equity, cash, positions_value in zip(
+            total.index, total["equity"].tolist(), total["cash"].tolist(), total["positions_value"].tolist()
+        )
+    ]
+
+
+def run_portfolio_backtest(
+    products: Sequence[str],
+    start: date,
+    end: date,
+    stage_overrides_path: str | None = None,
+    output_dir: str | None = None,
+    workers: int = 1,
+    schedule: RebalanceSchedule | None = None,
+    use_cache: bool = True,
+    context: DataContext | None = None,
+) -> Tuple[List[EquityPoint], Dict[str, BacktestSummary], BacktestSummary]:
+    # 返回 (组合权益曲线, 产品 -> 汇总, 组合汇总)；指定 output_dir 时每个产品的明细写入同名子目录，
+    # 组合权益曲线、各产品汇总表与组合汇总写在 output_dir 下
+    context = context or get_context()
+    # 重复的产品只回测一次（保持首次出现的顺序），否则会并发写同一目录并在组合中重复计入
+    products = list(dict.fromkeys(products))
+    unknown = [product for product in products if product not in context.products().get("products", {})]
+    if unknown:
+        raise ValueError(f"未配置的产品: {', '.join(unknown)}")
+    config_dir, data_dir = context.config_dir, context.data_dir
+    _warm(config_dir, data_dir, start, end)
+    task_args = [
+        (
+            product,
+            start,
+            end,
+            stage_overrides_path,
+            str(Path(output_dir) / product) if output_dir is not None else None,
+            schedule,
+            use_cache,
+            config_dir,
+            data_dir,
+        )
+        for product in products
+    ]
+    results: Dict[str, ProductResult] = {}
+    if workers <= 1 or len(products) <= 1:
+        for args in task_args:
+            result = _run_product(*args)
+            results[result[0]] = result
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(products)),
+            mp_context=_mp_context(),
+            initializer=_warm,
+            initargs=(config_dir, data_dir, start, end),
+        ) as pool:
+            futures = [pool.submit(_run_product, *args) for args in task_args]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result[0]] = result
+
+    ordered = [results[product] for product in products]
+    summaries = {product: summary for product, _, summary in ordered}
+    equity_points = aggregate_equity(ordered)
+    combined = build_summary(
+        start,
+        end,
+        sum(summary.initial_cash for summary in summaries.values()),
+        sum(summary.trade_count for summary in summaries.values()),
+        equity_points,
+    )
+    if output_dir is not None:
+        ensure_dir(output_dir)
+        pd.DataFrame([point.dict() for point in equity_points]).to_csv(f"{output_dir}/equity.csv", index=False)
+        pd.DataFrame([{"product": product, **summary.dict()} for product, summary in summaries.items()]).to_csv(
+            f"{output_dir}/products.csv", index=False
+        )
+        save_json(f"{output_dir}/summary.json", combined.dict())
+    return equity_points, summaries, combined
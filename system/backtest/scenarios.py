@@ -0,0 +1,178 @@
+"""成本敏感性分析：决策只生成一次，多组成本情景在一次向量化账务回放中完成。"""
+
+from __future__ import annotations
+
+import itertools
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from system.backtest.engine import build_summaries, generate_decisions, group_decisions_by_date
+from system.config_loader import load_yaml
+from system.data_context import DataContext, get_context
+from system.indexes import PriceIndex
+from system.models import CostScenario
+from system.utils import ensure_dir
+
+# 情景字段：未在规格中给出的字段取 thresholds.yaml 中的值
+SCENARIO_FIELDS = ["fee", "slippage", "initial_cash", "max_positions"]
+
+
+def _base_values(thresholds: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "fee": float(thresholds.get("fee", 0.0003)),
+        "slippage": float(thresholds.get("slippage", 0.0005)),
+        "initial_cash": float(thresholds.get("initial_cash", 1_000_000.0)),
+        "max_positions": int(thresholds.get("max_positions", 3)),
+    }
+
+
+def load_scenarios(path: str, thresholds: Dict[str, Any]) -> List[CostScenario]:
+    # 规格支持两种写法：scenarios 列表逐个列出，grid 对各字段取值做笛卡尔积
+    spec = load_yaml(Path(path))
+    base = _base_values(thresholds)
+    scenarios: List[CostScenario] = []
+    for idx, item in enumerate(spec.get("scenarios", [])):
+        values = {**base, **{key: item[key] for key in SCENARIO_FIELDS if key in item}}
+        scenarios.append(CostScenario(name=str(item.get("name", f"scenario_{idx}")), **values))
+    grid: Dict[str, List[Any]] = spec.get("grid", {})
+    names = [key for key in SCENARIO_FIELDS if key in grid]
+    if names:
+        for combo in itertools.product(*(grid[key] for key in names)):
+            values = {**base, **dict(zip(names, combo))}
+            label = " ".join(f"{key}={value}" for key, value in zip(names, combo))
+            scenarios.append(CostScenario(name=label, **values))
+    if not scenarios:
+        raise ValueError("情景规格中没有任何情景")
+    return scenarios
+
+
+def simulate_scenarios(
+    decisions: pd.DataFrame,
+    dates: Sequence[date],
+    price_index: PriceIndex,
+    theme_asset_map: Dict[str, str],
+    scenarios: Sequence[CostScenario],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # 与 simulate_fills 的成交规则逐条对应，只是把现金与持仓扩展为 (情景 × 标的) 数组
+    # 返回 (权益, 现金, 持仓市值, 交易次数)，矩阵形状为 (情景数, 日期数)
+    n_scenarios = len(scenarios)
+    assets = sorted(set(theme_asset_map.values()))
+    asset_pos = {asset_id: idx for idx, asset_id in enumerate(assets)}
+    fee = np.array([item.fee for item in scenarios], dtype=float)
+    slippage = np.array([item.slippage for item in scenarios], dtype=float)
+    max_positions = np.array([item.max_positions for item in scenarios], dtype=int)
+    buy_rate = 1 + slippage + fee
+    sell_rate = 1 - slippage - fee
+
+    cash = np.array([item.initial_cash for item in scenarios], dtype=float)
+    positions = np.zeros((n_scenarios, len(assets)), dtype=float)
+    # 记录各情景首次建仓顺序，盯市求和顺序与单情景引擎的字典插入顺序一致
+    first_seen = np.full((n_scenarios, len(assets)), np.iinfo(np.int64).max, dtype=np.int64)
+    sequence = 0
+    trade_counts = np.zeros(n_scenarios, dtype=int)
+    equity = np.zeros((n_scenarios, len(dates)), dtype=float)
+    cash_curve = np.zeros((n_scenarios, len(dates)), dtype=float)
+    value_curve = np.zeros((n_scenarios, len(dates)), dtype=float)
+    decisions_by_date = group_decisions_by_date(decisions)
+
+    for day, run_date in enumerate(dates):
+        day_prices = price_index.day(run_date)
+        for decision in decisions_by_date.get(run_date, []):
+            asset_id = theme_asset_map.get(decision.theme)
+            if asset_id is None:
+                continue
+            price = day_prices.get(asset_id)
+            if price is None:
+                continue
+            col = asset_pos[asset_id]
+            current = positions[:, col].copy()
+            intent = decision.intent
+            if intent == "ENTER":
+                slots = max_positions - (positions > 0).sum(axis=1)
+                mask = (current == 0.0) & (slots > 0)
+                if not mask.any():
+                    continue
+                # 等权分配剩余现金
+                quantity = cash[mask] / slots[mask] / price
+                cash[mask] -= quantity * price * buy_rate[mask]
+                positions[mask, col] = current[mask] + quantity
+                first_seen[mask, col] = np.minimum(first_seen[mask, col], sequence)
+                sequence += 1
+            elif intent == "ADD":
+                mask = current > 0.0
+                # 加仓：使用剩余现金的一半
+                quantity = cash[mask] * 0.5 / price
+                cash[mask] -= quantity * price * buy_rate[mask]
+                positions[mask, col] = current[mask] + quantity
+            elif intent == "REDUCE":
+                mask = current > 0.0
+                # 减仓：卖出一半持仓
+                quantity = current[mask] * 0.5
+                cash[mask] += quantity * price * sell_rate[mask]
+                positions[mask, col] = current[mask] - quantity
+            elif intent == "EXIT":
+                mask = current > 0.0
+                # 清仓：卖出全部持仓
+                cash[mask] += current[mask] * price * sell_rate[mask]
+                positions[mask, col] = 0.0
+            else:
+                continue
+            trade_counts += mask
+
+        # 逐日盯市：缺少价格的标的不计市值
+        prices = np.array([day_prices.get(asset_id, np.nan) for asset_id in assets], dtype=float)
+        held = (positions > 0) & ~np.isnan(prices)
+        values = np.where(held, positions * np.nan_to_num(prices), 0.0)
+        order = np.argsort(first_seen, axis=1, kind="stable")
+        ordered = np.take_along_axis(values, order, axis=1)
+        # cumsum 逐项顺序累加，与逐个 += 的结果完全一致
+        day_value = np.cumsum(ordered, axis=1)[:, -1] if len(assets) else np.zeros(n_scenarios)
+        equity[:, day] = cash + day_value
+        cash_curve[:, day] = cash
+        value_curve[:, day] = day_value
+    return equity, cash_curve, value_curve, trade_counts
+
+
+def run_cost_analysis(
+    product: str,
+    start: date,
+    end: date,
+    scenarios: Sequence[CostScenario],
+    stage_overrides_path: str | None = None,
+    output_dir: str | None = None,
+    context: DataContext | None = None,
+    workers: int = 1,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # 返回 (情景对比表, 各情景权益曲线)；output_dir 非空时同时写出 CSV
+    context = (context or get_context()).windowed(start, end)
+    overrides = context.stage_overrides(stage_overrides_path)
+    assets = context.assets()
+    theme_asset_map = assets[assets["product"] == product].set_index("theme")["asset_id"].to_dict()
+    dates = context.calendar().sessions(start, end)
+    # 成本参数不进入任何流程步骤，决策只需生成一次
+    decisions = generate_decisions(product, dates, overrides, context=context, workers=workers)
+    equity, _, _, trade_counts = simulate_scenarios(
+        decisions, dates, context.price_index(), theme_asset_map, scenarios
+    )
+
+    # 全部情景的指标在一次矩阵运算中完成
+    summaries = build_summaries(
+        start, end, [item.initial_cash for item in scenarios], trade_counts.tolist(), equity
+    )
+    rows: List[Dict[str, Any]] = []
+    for scenario, summary in zip(scenarios, summaries):
+        row = scenario.dict()
+        row.update(summary.dict(exclude={"start", "end", "initial_cash"}))
+        rows.append(row)
+    table = pd.DataFrame(rows)
+    curves = pd.DataFrame(equity.T, index=pd.Index(dates, name="date"), columns=[item.name for item in scenarios])
+
+    if output_dir is not None:
+        ensure_dir(output_dir)
+        table.to_csv(f"{output_dir}/scenarios.csv", index=False)
+        curves.to_csv(f"{output_dir}/equity_curves.csv")
+    return table, curves
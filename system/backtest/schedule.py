@@ -0,0 +1,100 @@
+"""调仓计划：把决策频率与盯市频率分开。
+
+回测仍逐个交易日盯市，但只在调仓日运行流程并按决策交易，
+非调仓日沿用已有持仓，流程计算量按调仓频率同比例减少。
+"""
+
+from __future__ import annotations
+
+import calendar
+from datetime import date
+from typing import List, Sequence
+
+from system.data_context import DataContext
+from system.models import RebalanceSchedule
+
+EVENT_SOURCES = {"macro", "news"}
+
+
+def parse_schedule(text: str) -> RebalanceSchedule:
+    # 命令行写法：daily | weekly[:星期] | monthly[:日] | every:N | event[:macro,news]
+    kind, _, arg = text.strip().partition(":")
+    if kind == "daily" and not arg:
+        return RebalanceSchedule(kind="daily")
+    if kind == "weekly":
+        weekday = int(arg) if arg else 0
+        if not 0 <= weekday <= 6:
+            raise ValueError(f"weekly 的星期取值应为 0~6: {weekday}")
+        return RebalanceSchedule(kind="weekly", weekday=weekday)
+    if kind == "monthly":
+        day = int(arg) if arg else 1
+        if not 1 <= day <= 31:
+            raise ValueError(f"monthly 的日期取值应为 1~31: {day}")
+        return RebalanceSchedule(kind="monthly", day=day)
+    if kind == "every" and arg:
+        every = int(arg)
+        if every < 1:
+            raise ValueError(f"every 的间隔应为正整数: {every}")
+        return RebalanceSchedule(kind="every", every=every)
+    if kind == "event":
+        sources = [item.strip() for item in arg.split(",") if item.strip()] if arg else sorted(EVENT_SOURCES)
+        unknown = [item for item in sources if item not in EVENT_SOURCES]
+        if unknown:
+            raise ValueError(f"未知事件数据源: {', '.join(unknown)}")
+        return RebalanceSchedule(kind="event", sources=sources)
+    raise ValueError(f"无法识别的调仓计划: {text}")
+
+
+def _period(schedule: RebalanceSchedule, day: date) -> tuple:
+    # 周期标识：ISO (年, 周) 或 (年, 月)
+    if schedule.kind == "weekly":
+        return tuple(day.isocalendar()[:2])
+    return day.year, day.month
+
+
+def _reached(schedule: RebalanceSchedule, day: date) -> bool:
+    if schedule.kind == "weekly":
+        return day.weekday() >= schedule.weekday
+    # 目标日超过当月天数时按月末处理
+    return day.day >= min(schedule.day, calendar.monthrange(day.year, day.month)[1])
+
+
+def rebalance_dates(
+    schedule: RebalanceSchedule,
+    sessions: Sequence[date],
+    product: str,
+    context: DataContext,
+) -> List[date]:
+    # 从交易日序列中选出调仓日；周期型计划以 sessions 的首日为锚点，首个交易日总是调仓日
+    sessions = list(sessions)
+    if schedule.kind == "daily" or not sessions:
+        return sessions
+    if schedule.kind == "every":
+        return sessions[:: schedule.every]
+    selected = [sessions[0]]
+    if schedule.kind in {"weekly", "monthly"}:
+        # 每个周期内取首个不早于目标星期/日期的交易日，目标日休市时顺延；
+        # 首日未到目标日时，首日所在周期的目标日仍照常调仓
+        done = {_period(schedule, sessions[0])} if _reached(schedule, sessions[0]) else set()
+        for day in sessions[1:]:
+            key = _period(schedule, day)
+            if key not in done and _reached(schedule, day):
+                done.add(key)
+                selected.append(day)
+        return selected
+    # 事件触发：当天的宏观记录或该产品的新闻与上一交易日不同
+    macro_index = context.macro_index() if "macro" in schedule.sources else None
+    news_index = context.news_index() if "news" in schedule.sources else None
+
+    def snapshot(day: date) -> tuple:
+        macro = macro_index.row(day) if macro_index is not None else None
+        news = news_index.items(day, product) if news_index is not None else None
+        return (sorted(macro.items()) if macro is not None else None, news)
+
+    previous = snapshot(sessions[0])
+    for day in sessions[1:]:
+        current = snapshot(day)
+        if current != previous:
+            selected.append(day)
+        previous = current
+    return selected
@@ -0,0 +1,213 @@
+"""流式回测输出：O(1) 在线指标累加器与增量落盘写入器。
+
+长周期回测中交易与权益记录逐条写入磁盘，指标随每日权益在线更新，
+内存占用与回测长度无关。
+"""
+
+from __future__ import annotations
+
+import csv
+import math
+from typing import Any, Dict, List, Protocol
+
+from pydantic import BaseModel
+
+from system.backtest.metrics import PERIODS_PER_YEAR
+
+
+class RecordSink(Protocol):
+    """记录接收端：回测账务阶段只依赖 append 接口。"""
+
+    def append(self, item: Any) -> None: ...
+
+
+class OnlineMetrics:
+    """在线指标累加器：逐日更新均值/方差、下行统计、峰值回撤与胜负计数。"""
+
+    # 所有状态都是标量，便于序列化到检查点
+    FIELDS = [
+        "count",
+        "first_equity",
+        "prev_equity",
+        "n_returns",
+        "mean",
+        "m2",
+        "neg_count",
+        "neg_mean",
+        "neg_m2",
+        "pos_count",
+        "pos_sum",
+        "neg_sum",
+        "best",
+        "worst",
+        "peak",
+        "max_dd",
+    ]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.first_equity = 0.0
+        self.prev_equity = 0.0
+        self.n_returns = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.neg_count = 0
+        self.neg_mean = 0.0
+        self.neg_m2 = 0.0
+        self.pos_count = 0
+        self.pos_sum = 0.0
+        self.neg_sum = 0.0
+        self.best = -math.inf
+        self.worst = math.inf
+        self.peak = 0.0
+        self.max_dd = 0.0
+
+    def update(self, equity: float) -> None:
+        # 峰值与回撤：与 max_drawdown 的定义一致
+        if self.count == 0:
+            self.first_equity = equity
+            self.peak = equity
+        elif equity > self.peak:
+            self.peak = equity
+        drawdown = (self.peak - equity) / self.peak if self.peak else 0.0
+        if drawdown > self.max_dd:
+            self.max_dd = drawdown
+
+        if self.count > 0:
+            prev = self.prev_equity
+            value = (equity - prev) / prev if prev != 0 else 0.0
+            # Welford 算法在线更新均值与二阶矩
+            self.n_returns += 1
+            delta = value - self.mean
+            self.mean += delta / self.n_returns
+            self.m2 += delta * (value - self.mean)
+            if value > 0.0:
+                self.pos_count += 1
+                self.pos_sum += value
+            elif value < 0.0:
+                self.neg_count += 1
+                self.neg_sum += value
+                neg_delta = value - self.neg_mean
+                self.neg_mean += neg_delta / self.neg_count
+                self.neg_m2 += neg_delta * (value - self.neg_mean)
+            self.best = max(self.best, value)
+            self.worst = min(self.worst, value)
+        self.prev_equity = equity
+        self.count += 1
+
+    def append(self, item: Any) -> None:
+        # 作为权益记录的接收端使用
+        self.update(float(item.equity))
+
+    @property
+    def last_equity(self) -> float:
+        return self.prev_equity
+
+    def max_drawdown(self) -> float:
+        return self.max_dd
+
+    def stats(self) -> Dict[str, float | int]:
+        # 输出字段与 equity_stats 相同
+        n = self.n_returns
+        if self.count < 2:
+            return {
+                "trading_days": self.count,
+                "avg_daily_return": 0.0,
+                "annualized_return": 0.0,
+                "annualized_volatility": 0.0,
+                "sharpe": 0.0,
+                "sortino": 0.0,
+                "win_rate": 0.0,
+                "positive_days": 0,
+                "negative_days": 0,
+                "flat_days": 0,
+                "best_day": 0.0,
+                "worst_day": 0.0,
+                "profit_factor": 0.0,
+            }
+        scale = math.sqrt(PERIODS_PER_YEAR)
+        daily_vol = math.sqrt(self.m2 / (n - 1)) if n > 1 else 0.0
+        downside_vol = math.sqrt(self.neg_m2 / (self.neg_count - 1)) if self.neg_count > 1 else 0.0
+        annualized_return = 0.0
+        if self.first_equity > 0:
+            annualized_return = (self.prev_equity / self.first_equity) ** (PERIODS_PER_YEAR / n) - 1
+        return {
+            "trading_days": self.count,
+            "avg_daily_return": self.mean,
+            "annualized_return": annualized_return,
+            "annualized_volatility": daily_vol * scale,
+            "sharpe": self.mean / daily_vol * scale if daily_vol > 0 else 0.0,
+            "sortino": self.mean / downside_vol * scale if downside_vol > 0 else 0.0,
+            "win_rate": self.pos_count / n,
+            "positive_days": self.pos_count,
+            "negative_days": self.neg_count,
+            "flat_days": n - self.pos_count - self.neg_count,
+            "best_day": self.best,
+            "worst_day": self.worst,
+            "profit_factor": self.pos_sum / abs(self.neg_sum) if self.neg_sum < 0 else 0.0,
+        }
+
+    def to_dict(self) -> Dict[str, float | int]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, float | int]) -> "OnlineMetrics":
+        metrics = cls()
+        for name in cls.FIELDS:
+            setattr(metrics, name, payload[name])
+        return metrics
+
+
+class CsvRecordWriter:
+    """增量 CSV 写入器：每条 Pydantic 记录写一行，不在内存中保留历史。"""
+
+    def __init__(self, path: str, model: type[BaseModel], append: bool = False) -> None:
+        # append=True 时在已有文件末尾续写（续跑回测），文件为空或不存在时仍写表头
+        self.path = path
+        self.count = 0
+        self._columns: List[str] = list(model.__fields__)
+        self._handle = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        # 换行符与 DataFrame.to_csv 一致，流式与非流式输出文件格式相同
+        self._writer = csv.DictWriter(self._handle, fieldnames=self._columns, lineterminator="\n")
+        if self._handle.tell() == 0:
+            self._writer.writeheader()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, item: BaseModel) -> None:
+        self._writer.writerow(item.dict())
+        self.count += 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "CsvRecordWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class CountingSink:
+    """只计数不保存的接收端：不落盘时用于统计交易次数。"""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, item: Any) -> None:
+        self.count += 1
+
+
+class MultiSink:
+    """把同一条记录分发给多个接收端，例如同时落盘与更新指标。"""
+
+    def __init__(self, *sinks: RecordSink) -> None:
+        self._sinks = sinks
+
+    def append(self, item: Any) -> None:
+        for sink in self._sinks:
+            sink.append(item)
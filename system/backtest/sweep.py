@@ -0,0 +1,200 @@
+"""参数扫描：按网格或随机搜索组合阈值，并行回测并汇总为一张结果表。"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from system.backtest.engine import run_backtest
+from system.config_loader import load_yaml
+from system.data_context import DataContext, context_for, get_context
+from system.models import BacktestSummary
+from system.utils import ensure_dir
+
+# 结果表中的固定列，参数列与指标列追加在其后
+KEY_COLUMNS = ["key", "product", "start", "end"]
+SUMMARY_COLUMNS = [name for name in BacktestSummary.__fields__ if name not in {"start", "end"}]
+
+
+def load_spec(path: str) -> Dict[str, Any]:
+    # 扫描规格文件：mode 为 grid 或 random，params 为参数取值空间
+    spec = load_yaml(Path(path))
+    if spec.get("mode", "grid") not in {"grid", "random"}:
+        raise ValueError(f"未知扫描模式: {spec.get('mode')}")
+    if not spec.get("params"):
+        raise ValueError("扫描规格缺少 params")
+    return spec
+
+
+def _sample(space: Any, rng: random.Random) -> Any:
+    # 列表表示离散候选；{min, max} 表示连续区间，两端均为整数时按整数采样
+    if isinstance(space, dict):
+        low, high = space["min"], space["max"]
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return rng.uniform(float(low), float(high))
+    return rng.choice(list(space))
+
+
+def expand_spec(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # 展开为参数组合列表：网格为笛卡尔积，随机搜索按 seed 可复现
+    params: Dict[str, Any] = spec["params"]
+    names = sorted(params)
+    if spec.get("mode", "grid") == "grid":
+        for name in names:
+            if isinstance(params[name], dict):
+                raise ValueError(f"网格模式的参数 {name} 需要给出取值列表")
+        return [dict(zip(names, values)) for values in itertools.product(*(params[name] for name in names))]
+    rng = random.Random(spec.get("seed", 0))
+    samples = int(spec.get("samples", 20))
+    return [{name: _sample(params[name], rng) for name in names} for _ in range(samples)]
+
+
+# 影响回测结果的配置文件与数据集：任一内容变化都会得到新的 key，旧结果不再被跳过
+INPUT_SOURCES = ("products", "themes", "constraints", "thresholds", "assets", "holidays", "prices", "macro", "news")
+
+
+def inputs_digest(context: DataContext, start: date, end: date, stage_overrides_path: str | None) -> str:
+    # 扫描窗口内的配置、数据与阶段覆盖内容哈希，与参数组合一起构成续跑 key
+    context = context.windowed(start, end)
+    payload = [
+        [context.source_digest(name) for name in INPUT_SOURCES],
+        sorted((day, sorted(items.items())) for day, items in context.stage_overrides(stage_overrides_path).items()),
+    ]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def param_key(product: str, start: date, end: date, params: Dict[str, Any], inputs: str = "") -> str:
+    # 参数组合的稳定标识：同一窗口、同一组参数且配置/数据/阶段覆盖不变时得到相同 key，用于断点续跑
+    payload = json.dumps(
+        {"product": product, "start": start.isoformat(), "end": end.isoformat(), "params": params, "inputs": inputs},
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _existing_keys(path: Path) -> Set[str]:
+    # 读取结果表中已完成的参数组合
+    if not path.exists():
+        return set()
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        return {row["key"] for row in csv.DictReader(handle)}
+
+
+def _init_worker(config_dir: Path, data_dir: Path, start: date, end: date) -> None:
+    # 每个工作进程启动时预热一次数据上下文（扫描窗口内的分区），后续任务直接复用
+    context = context_for(config_dir, data_dir).windowed(start, end)
+    context.thresholds()
+    context.assets()
+    context.price_index()
+    context.news()
+    context.macro()
+
+
+def _run_one(
+    key: str,
+    product: str,
+    start: date,
+    end: date,
+    stage_overrides_path: str | None,
+    params: Dict[str, Any],
+    config_dir: Path,
+    data_dir: Path,
+) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    context = context_for(config_dir, data_dir)
+    _, _, summary = run_backtest(
+        product,
+        start,
+        end,
+        stage_overrides_path,
+        None,
+        context=context,
+        threshold_overrides=params,
+    )
+    return key, params, summary.dict()
+
+
+def _pending(
+    product: str, start: date, end: date, combos: List[Dict[str, Any]], done: Set[str], inputs: str
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    seen: Set[str] = set()
+    for params in combos:
+        key = param_key(product, start, end, params, inputs)
+        # 已有结果或随机采样重复的组合直接跳过
+        if key in done or key in seen:
+            continue
+        seen.add(key)
+        yield key, params
+
+
+def run_sweep(
+    product: str,
+    start: date,
+    end: date,
+    spec: Dict[str, Any],
+    output_path: str,
+    stage_overrides_path: str | None = None,
+    workers: int = 1,
+    context: DataContext | None = None,
+) -> Tuple[int, int]:
+    # 返回 (本次完成数, 跳过数)；结果逐行追加写入，中断后可直接重跑续上
+    context = context or get_context()
+    combos = expand_spec(spec)
+    param_names = sorted(spec["params"])
+    columns = KEY_COLUMNS + param_names + SUMMARY_COLUMNS
+    path = Path(output_path)
+    ensure_dir(str(path.parent))
+    done = _existing_keys(path)
+    inputs = inputs_digest(context, start, end, stage_overrides_path)
+    tasks = list(_pending(product, start, end, combos, done, inputs))
+    skipped = len(combos) - len(tasks)
+    if not tasks:
+        return 0, skipped
+
+    write_header = not path.exists() or path.stat().st_size == 0
+    if not write_header:
+        with open(path, "r", encoding="utf-8", newline="") as handle:
+            header = next(csv.reader(handle), [])
+        if header != columns:
+            raise ValueError(f"结果表 {path} 的列与当前扫描规格不一致")
+
+    with open(path, "a", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+
+        def record(key: str, params: Dict[str, Any], summary: Dict[str, Any]) -> None:
+            row = {"key": key, "product": product, "start": start.isoformat(), "end": end.isoformat()}
+            row.update(params)
+            row.update({name: summary[name] for name in SUMMARY_COLUMNS})
+            writer.writerow(row)
+            # 每完成一组立即落盘，保证中断时已完成的结果不会丢失
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        task_args = [
+            (key, product, start, end, stage_overrides_path, params, context.config_dir, context.data_dir)
+            for key, params in tasks
+        ]
+        if workers <= 1:
+            _init_worker(context.config_dir, context.data_dir, start, end)
+            for args in task_args:
+                record(*_run_one(*args))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(context.config_dir, context.data_dir, start, end),
+            ) as pool:
+                futures = [pool.submit(_run_one, *args) for args in task_args]
+                for future in as_completed(futures):
+                    record(*future.result())
+    return len(tasks), skipped
@@ -0,0 +1,189 @@
+"""性能基准：在多个数据规模下计时加载、单日流程、批量决策、回测与指标计算。
+
+每个规模的合成数据只生成一次并复用；每次运行的结果追加到 JSON Lines 历史文件，
+与同一规模的上一次记录对比，耗时增长超过容忍度即视为性能回退。
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from system.backtest.engine import run_backtest
+from system.backtest.metrics import equity_stats, max_drawdown, rolling_sharpe
+from system.config_loader import ROOT, load_macro, load_news, load_prices
+from system.data.generate_demo_data import DEMO_PRODUCT, DEMO_START, end_date, generate_dataset
+from system.data_context import DataContext
+from system.pipeline.batch import run_pipeline_batch
+from system.pipeline.runner import STEP_CACHE, run_pipeline
+
+BENCH_DIR = ROOT / "bench_output"
+# 数据规模：产品数、每产品主题数、每主题标的数、年数
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"products": 1, "themes": 3, "assets_per_theme": 1, "years": 1},
+    "medium": {"products": 4, "themes": 10, "assets_per_theme": 2, "years": 3},
+    "large": {"products": 10, "themes": 20, "assets_per_theme": 3, "years": 10},
+}
+# 固定种子，保证不同机器/提交之间的数据一致
+SEED = 42
+# 单日流程基准连续运行的天数
+PIPELINE_DAYS = 20
+
+
+def ensure_dataset(scale: str, root: Path = BENCH_DIR) -> Path:
+    # 规模参数未变时复用已生成的数据集，否则重新生成
+    params = {**SCALES[scale], "seed": SEED}
+    output_dir = root / "datasets" / scale
+    marker = output_dir / "params.json"
+    if marker.exists() and json.loads(marker.read_text(encoding="utf-8")) == params:
+        return output_dir
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    generate_dataset(output_dir, seed=SEED, **SCALES[scale])
+    marker.write_text(json.dumps(params), encoding="utf-8")
+    return output_dir
+
+
+def _measure(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    # 重复运行取最小值与中位数（秒），最小值受噪声影响最小；setup 在每次运行前执行，不计入耗时
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {"min": min(samples), "median": statistics.median(samples), "repeat": repeat}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def bench_scale(scale: str, repeat: int = 3, root: Path = BENCH_DIR) -> Dict[str, Dict[str, float]]:
+    # 单个规模的全部基准项；回测与批量决策使用首个产品的完整区间
+    dataset = ensure_dataset(scale, root)
+    config_dir, data_dir = dataset / "configs", dataset / "data"
+    start, end = DEMO_START, end_date(DEMO_START, SCALES[scale]["years"])
+    results: Dict[str, Dict[str, float]] = {}
+
+    def parse_csv() -> None:
+        for name in ("prices.csv", "macro_stub.csv", "news_stub.csv"):
+            pd.read_csv(data_dir / name, parse_dates=["date"])
+
+    def load_cached() -> None:
+        load_prices(data_dir)
+        load_macro(data_dir)
+        load_news(data_dir)
+
+    results["loaders.parse_csv"] = _measure(parse_csv, repeat)
+    load_cached()  # 预先生成列式缓存
+    results["loaders.cached"] = _measure(load_cached, repeat)
+
+    # 上下文预热后只计算流程本身
+    context = DataContext(config_dir, data_dir)
+    context.price_index()
+    context.news_index()
+    context.macro_index()
+    days = [start + timedelta(days=offset) for offset in range(PIPELINE_DAYS)]
+
+    def pipeline_days(memoize: bool) -> None:
+        for run_date in days:
+            run_pipeline(DEMO_PRODUCT, run_date, context=context, memoize=memoize)
+
+    # 冷启动与步骤缓存命中分开计时：前者不读写缓存，后者先预热一次再重复运行
+    results["run_pipeline"] = _measure(lambda: pipeline_days(False), repeat)
+    STEP_CACHE.clear()
+    pipeline_days(True)
+    results["run_pipeline.memoized"] = _measure(lambda: pipeline_days(True), repeat)
+    results["run_pipeline_batch"] = _measure(
+        lambda: run_pipeline_batch(DEMO_PRODUCT, start, end, context=context), repeat
+    )
+    equity_holder: List[Any] = []
+
+    def backtest() -> None:
+        _, equity_points, _ = run_backtest(DEMO_PRODUCT, start, end, None, None, context=context)
+        equity_holder[:] = equity_points
+
+    # 每次回测前清空进程级步骤缓存，避免后几次重复只是在读前一次的结果
+    results["run_backtest"] = _measure(backtest, repeat, setup=STEP_CACHE.clear)
+
+    def metrics() -> None:
+        equity_stats(equity_holder)
+        max_drawdown(equity_holder)
+        rolling_sharpe(equity_holder)
+
+    results["metrics"] = _measure(metrics, repeat)
+    return results
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def compare(
+    entry: Dict[str, Any], history: List[Dict[str, Any]], tolerance: float = 0.2
+) -> Dict[str, Dict[str, Any]]:
+    # 与同一规模的上一次记录对比中位数耗时；ratio 为 本次/上次
+    previous = next((item for item in reversed(history) if item["scale"] == entry["scale"]), None)
+    report: Dict[str, Dict[str, Any]] = {}
+    for case, result in entry["results"].items():
+        baseline = previous["results"].get(case) if previous else None
+        ratio = result["median"] / baseline["median"] if baseline and baseline["median"] > 0 else None
+        report[case] = {
+            "median": result["median"],
+            "previous": baseline["median"] if baseline else None,
+            "ratio": ratio,
+            "regression": ratio is not None and ratio > 1 + tolerance,
+        }
+    return report
+
+
+def run_benchmarks(
+    scales: List[str],
+    repeat: int = 3,
+    history_path: Path = BENCH_DIR / "history.jsonl",
+    tolerance: float = 0.2,
+    root: Path = BENCH_DIR,
+) -> List[Dict[str, Any]]:
+    # 返回每个规模的记录（含与上次对比的 report），并把记录追加到历史文件
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        raise ValueError(f"未知数据规模: {', '.join(unknown)}")
+    history = load_history(history_path)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for scale in scales:
+        entry = {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scale": scale,
+            "params": SCALES[scale],
+            "results": bench_scale(scale, repeat, root),
+        }
+        report = compare(entry, history, tolerance)
+        with open(history_path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        history.append(entry)
+        entries.append({**entry, "report": report})
+    return entries
@@ -2,23 +2,28 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
+import json
 import math
+import shutil
+import signal
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Tuple
 
 import click
 from rich.console import Console
 from rich.table import Table
 
-from system.audit import load_run, save_run
-from system.backtest.engine import run_backtest
-from system.config_loader import load_stage_overrides
-from system.pipeline.runner import run_pipeline
-from system.product.monitor_plan import build_monitor_plan
-from system.product.registry import list_products
-from system.utils import ensure_dir
+# 只有轻量依赖在模块级导入；pandas、回测引擎等重依赖在各命令内部按需导入，
+# products、select、replay、runs query、cache stats 等命令无需加载它们
+if TYPE_CHECKING:
+    from system.models import BacktestSummary, DecisionResult, RebalanceSchedule
+    from system.pipeline.decision_store import DecisionCache
+    from system.profiling import Profiler
 
 console = Console()
+# 标准输出用于 JSON Lines 等机器可读输出时，提示信息写到标准错误
+err_console = Console(stderr=True)
 
 
 def _parse_date(value: str) -> datetime.date:
@@ -26,6 +31,59 @@ def _parse_date(value: str) -> datetime.date:
     return datetime.strptime(value, "%Y-%m-%d").date()
 
 
+def _make_profiler(profile: bool, profile_memory: bool) -> Profiler | None:
+    # --profile-memory 隐含 --profile
+    if not (profile or profile_memory):
+        return None
+    from system.profiling import Profiler
+
+    return Profiler(memory=profile_memory)
+
+
+def _report_profile(profiler: Profiler | None, trace_path: Path, out: Console | None = None) -> None:
+    # 打印按步骤聚合的耗时表，并写出 Chrome Trace 文件
+    if profiler is None:
+        return
+    out = out or console
+    table = Table(title="性能剖析")
+    table.add_column("类别", style="cyan")
+    table.add_column("名称")
+    table.add_column("次数", justify="right")
+    table.add_column("总耗时(ms)", justify="right")
+    table.add_column("p50(ms)", justify="right")
+    table.add_column("p99(ms)", justify="right")
+    if profiler.memory:
+        table.add_column("净分配(KB)", justify="right")
+    for row in profiler.summary():
+        cells = [
+            row["category"],
+            row["name"],
+            str(row["count"]),
+            f"{row['total_ms']:.3f}",
+            f"{row['p50_ms']:.3f}",
+            f"{row['p99_ms']:.3f}",
+        ]
+        if profiler.memory:
+            cells.append(f"{row['alloc_kb']:.1f}")
+        table.add_row(*cells)
+    out.print(table)
+    trace_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.write_trace(str(trace_path))
+    out.print(f"Trace 文件: {trace_path}")
+
+
+def _latest_backtest_dir(product: str, start: str, end: str) -> Path | None:
+    # 同一产品与起始日、结束日早于 end 且带检查点的回测目录中取结束日最晚的一个
+    from system.backtest.checkpoint import CHECKPOINT_FILE
+
+    candidates = [
+        path
+        for path in Path("backtest_output").glob(f"{product}_{start}_*")
+        if (path / CHECKPOINT_FILE).exists() and path.name.rsplit("_", 1)[-1] < end
+    ]
+    return max(candidates, key=lambda path: path.name, default=None)
+
+
 @click.group()
 def cli() -> None:
     """产品优先（Product-first）的约束×需求投资决策系统 v1。"""
@@ -35,6 +93,8 @@ def cli() -> None:
 @click.option("--product", required=True, help="产品名称")
 def select(product: str) -> None:
     # 根据产品生成监控清单并打印表格
+    from system.product.monitor_plan import build_monitor_plan
+
     plan = build_monitor_plan(product)
     table = Table(title=f"监控清单: {plan.product}")
     table.add_column("主题", style="cyan")
@@ -45,96 +105,684 @@ def select(product: str) -> None:
     console.print(table)
 
 
-@cli.command()
-@click.option("--product", required=True, help="产品名称")
-@click.option("--date", "date_str", required=True, help="日期 YYYY-MM-DD")
-def run(product: str, date_str: str) -> None:
-    # 单日运行：执行决策流程并保存结果
-    run_date = _parse_date(date_str)
-    results = run_pipeline(product, run_date)
-    run_record = save_run(date_str, product, results)
-    table = Table(title=f"单日决策: {product} {date_str}")
+def _print_decisions(title: str, results: List[DecisionResult]) -> None:
+    table = Table(title=title)
     table.add_column("主题", style="cyan")
     table.add_column("意图")
     table.add_column("阶段")
     table.add_column("分数")
     table.add_column("原因")
-    for result in run_record.results:
+    for result in results:
         table.add_row(result.theme, result.intent, result.stage, f"{result.score:.2f}", result.reason)
     console.print(table)
-    console.print(f"运行ID: {run_record.run_id}")
+
+
+def _run_range_jsonl(
+    products: List[str],
+    start_date: date,
+    end_date: date,
+    workers: int,
+    output: str,
+    cache: DecisionCache | None,
+) -> Tuple[int, int]:
+    # 逐块计算、批量写审计库，并把决策按 JSON Lines 流式写出；返回 (运行数, 决策数)
+    from system.audit import save_runs
+    from system.models import DecisionResult
+    from system.pipeline.range_run import group_by_date, run_range
+
+    run_count = 0
+    decision_count = 0
+    with click.open_file(output, "w", encoding="utf-8") as handle:
+        for product, chunk, frame in run_range(products, start_date, end_date, workers=workers, cache=cache):
+            days = group_by_date(frame, chunk)
+            records = save_runs(
+                (day.isoformat(), product, [DecisionResult(**item) for item in items]) for day, items in days
+            )
+            for record, (_, items) in zip(records, days):
+                for item in items:
+                    line = {"run_id": record.run_id, **item}
+                    handle.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+                decision_count += len(items)
+            run_count += len(records)
+            handle.flush()
+    return run_count, decision_count
 
 
 @cli.command()
-@click.option("--product", required=True, help="产品名称")
-@click.option("--start", required=True, help="起始日期 YYYY-MM-DD")
-@click.option("--end", required=True, help="结束日期 YYYY-MM-DD")
-@click.option("--stage-overrides", default=None, help="阶段注入文件")
-def backtest(product: str, start: str, end: str, stage_overrides: str | None) -> None:
-    # 回测命令：生成输出目录并执行回测引擎
-    start_date = _parse_date(start)
-    end_date = _parse_date(end)
-    output_dir = Path("backtest_output") / f"{product}_{start}_{end}"
-    ensure_dir(str(output_dir))
-    _, _, summary = run_backtest(product, start_date, end_date, stage_overrides, str(output_dir))
+@click.option("--product", default=None, help="产品名称")
+@click.option("--all-products", is_flag=True, default=False, help="运行全部已配置产品")
+@click.option("--date", "date_str", default=None, help="日期 YYYY-MM-DD（单日运行）")
+@click.option("--start", default=None, help="区间起始日期 YYYY-MM-DD（按交易日历运行区间）")
+@click.option("--end", default=None, help="区间结束日期 YYYY-MM-DD")
+@click.option("--workers", default=1, show_default=True, help="区间运行的并行进程数")
+@click.option("--output", default="-", show_default=True, help="区间运行的 JSON Lines 输出路径，- 表示标准输出")
+@click.option("--profile", is_flag=True, default=False, help="记录各步骤耗时并输出 Chrome Trace")
+@click.option("--profile-memory", is_flag=True, default=False, help="同时统计各步骤内存分配（较慢）")
+@click.option("--no-cache", is_flag=True, default=False, help="不读写决策磁盘缓存")
+def run(
+    product: str | None,
+    all_products: bool,
+    date_str: str | None,
+    start: str | None,
+    end: str | None,
+    workers: int,
+    output: str,
+    profile: bool,
+    profile_memory: bool,
+    no_cache: bool,
+) -> None:
+    # 单日运行：执行决策流程、保存结果并打印表格；区间运行：流式输出 JSON Lines 并批量写审计库
+    from system.audit import save_runs
+    from system.data_context import get_context
+    from system.pipeline.decision_cache import DecisionCache, run_pipeline_cached
+    from system.pipeline.runner import run_pipeline
+    from system.profiling import profiling
+
+    if all_products == (product is not None):
+        raise click.UsageError("需要指定 --product 或 --all-products 之一")
+    if (date_str is None) == (start is None and end is None) or (start is None) != (end is None):
+        raise click.UsageError("需要指定 --date，或同时指定 --start 与 --end")
+    products = sorted(get_context().products().get("products", {})) if all_products else [product]
+    label = "all" if all_products else product
+    profiler = _make_profiler(profile, profile_memory)
+    cache = None if no_cache else DecisionCache()
+
+    if date_str is None:
+        start_date, end_date = _parse_date(start), _parse_date(end)
+        with profiling(profiler):
+            run_count, decision_count = _run_range_jsonl(products, start_date, end_date, workers, output, cache)
+        # 汇总信息写到标准错误，避免混入标准输出的 JSON Lines
+        err_console.print(f"已完成 {run_count} 次运行，输出 {decision_count} 条决策")
+        _report_profile(profiler, Path("profile_output") / f"run_{label}_{start}_{end}.trace.json", err_console)
+        return
+
+    run_date = _parse_date(date_str)
+    pending = []
+    with profiling(profiler):
+        for name in products:
+            if cache is None:
+                results = run_pipeline(name, run_date)
+            else:
+                results = run_pipeline_cached(name, run_date, cache=cache)
+            pending.append((date_str, name, results))
+    for run_record in save_runs(pending):
+        _print_decisions(f"单日决策: {run_record.product} {date_str}", run_record.results)
+        console.print(f"运行ID: {run_record.run_id}")
+    _report_profile(profiler, Path("profile_output") / f"run_{label}_{date_str}.trace.json")
+
+
+@cli.command()
+@click.option("--product", default=None, help="产品名称")
+@click.option("--all-products", is_flag=True, default=False, help="运行全部已配置产品")
+@click.option("--interval", default=1.0, show_default=True, help="轮询数据文件的间隔（秒）")
+@click.option("--no-cache", is_flag=True, default=False, help="不读写决策磁盘缓存")
+def watch(product: str | None, all_products: bool, interval: float, no_cache: bool) -> None:
+    # 跟随模式：只解析行情文件新追加的行，为受影响的日期运行决策并写入审计库；启动时先决策最新日期
+    from system.audit import save_runs
+    from system.data_context import get_context
+    from system.pipeline.decision_cache import DecisionCache
+    from system.pipeline.watch import watch as follow
+
+    if all_products == (product is not None):
+        raise click.UsageError("需要指定 --product 或 --all-products 之一")
+    products = sorted(get_context().products().get("products", {})) if all_products else [product]
+    cache = None if no_cache else DecisionCache()
+    try:
+        for run_date, name, results in follow(products, interval=interval, cache=cache):
+            for run_record in save_runs([(run_date.isoformat(), name, results)]):
+                _print_decisions(f"跟随决策: {name} {run_record.date}", run_record.results)
+                console.print(f"运行ID: {run_record.run_id}")
+    except KeyboardInterrupt:
+        pass
+
 
-    def fmt_pct(value: float) -> str:
-        # 将小数转换为百分比字符串
-        return f"{value * 100:.2f}%"
+def _fmt_pct(value: float) -> str:
+    # 将小数转换为百分比字符串
+    return f"{value * 100:.2f}%"
 
-    def fmt_num(value: float) -> str:
-        # 常用金额格式化
-        return f"{value:,.2f}"
 
-    def fmt_ratio(value: float) -> str:
-        # 处理无穷大显示，避免表格溢出
-        return "inf" if math.isinf(value) else f"{value:.2f}"
+def _fmt_num(value: float) -> str:
+    # 常用金额格式化
+    return f"{value:,.2f}"
 
-    table = Table(title=f"回测统计: {product} {start} ~ {end}")
+
+def _fmt_ratio(value: float) -> str:
+    # 处理无穷大显示，避免表格溢出
+    return "inf" if math.isinf(value) else f"{value:.2f}"
+
+
+def _print_summary(title: str, summary: BacktestSummary) -> None:
+    table = Table(title=title)
     table.add_column("指标", style="cyan")
     table.add_column("数值", justify="right")
-    table.add_row("起始资金", fmt_num(summary.initial_cash))
-    table.add_row("结束权益", fmt_num(summary.final_equity))
-    table.add_row("总收益率", fmt_pct(summary.total_return))
-    table.add_row("年化收益率", fmt_pct(summary.annualized_return))
-    table.add_row("年化波动率", fmt_pct(summary.annualized_volatility))
-    table.add_row("最大回撤", fmt_pct(summary.max_drawdown))
+    table.add_row("起始资金", _fmt_num(summary.initial_cash))
+    table.add_row("结束权益", _fmt_num(summary.final_equity))
+    table.add_row("总收益率", _fmt_pct(summary.total_return))
+    table.add_row("年化收益率", _fmt_pct(summary.annualized_return))
+    table.add_row("年化波动率", _fmt_pct(summary.annualized_volatility))
+    table.add_row("最大回撤", _fmt_pct(summary.max_drawdown))
     table.add_row("夏普比率", f"{summary.sharpe:.2f}")
     table.add_row("索提诺比率", f"{summary.sortino:.2f}")
     table.add_row("卡玛比率", f"{summary.calmar:.2f}")
-    table.add_row("收益因子", fmt_ratio(summary.profit_factor))
+    table.add_row("收益因子", _fmt_ratio(summary.profit_factor))
     table.add_row("交易次数", str(summary.trade_count))
-    table.add_row("胜率(日)", fmt_pct(summary.win_rate))
+    table.add_row("胜率(日)", _fmt_pct(summary.win_rate))
     table.add_row("上涨天数", str(summary.positive_days))
     table.add_row("下跌天数", str(summary.negative_days))
     table.add_row("平盘天数", str(summary.flat_days))
-    table.add_row("最佳单日", fmt_pct(summary.best_day))
-    table.add_row("最差单日", fmt_pct(summary.worst_day))
-    table.add_row("日均收益", fmt_pct(summary.avg_daily_return))
+    table.add_row("最佳单日", _fmt_pct(summary.best_day))
+    table.add_row("最差单日", _fmt_pct(summary.worst_day))
+    table.add_row("日均收益", _fmt_pct(summary.avg_daily_return))
     table.add_row("交易日数", str(summary.trading_days))
     console.print(table)
+
+
+def _backtest_portfolio(
+    products: List[str],
+    label: str,
+    start: str,
+    end: str,
+    stage_overrides: str | None,
+    workers: int,
+    no_cache: bool,
+    schedule: RebalanceSchedule,
+) -> None:
+    # 组合回测：产品在进程池上并行，结果按日期加总为组合权益与组合汇总
+    from system.backtest.portfolio import run_portfolio_backtest
+
+    output_dir = Path("backtest_output") / f"portfolio_{label}_{start}_{end}"
+    _, summaries, combined = run_portfolio_backtest(
+        products,
+        _parse_date(start),
+        _parse_date(end),
+        stage_overrides,
+        str(output_dir),
+        workers=workers,
+        schedule=schedule,
+        use_cache=not no_cache,
+    )
+    table = Table(title=f"各产品回测: {start} ~ {end}")
+    table.add_column("产品", style="cyan")
+    table.add_column("结束权益", justify="right")
+    table.add_column("总收益率", justify="right")
+    table.add_column("最大回撤", justify="right")
+    table.add_column("夏普比率", justify="right")
+    table.add_column("交易次数", justify="right")
+    for name, summary in summaries.items():
+        table.add_row(
+            name,
+            _fmt_num(summary.final_equity),
+            _fmt_pct(summary.total_return),
+            _fmt_pct(summary.max_drawdown),
+            f"{summary.sharpe:.2f}",
+            str(summary.trade_count),
+        )
+    console.print(table)
+    _print_summary(f"组合回测统计: {len(products)} 个产品 {start} ~ {end}", combined)
+    console.print(f"输出目录: {output_dir}")
+
+
+@cli.command()
+@click.option("--product", default=None, help="产品名称")
+@click.option("--products", "product_list", default=None, help="多个产品，逗号分隔，按组合回测")
+@click.option("--all-products", is_flag=True, default=False, help="全部已配置产品按组合回测")
+@click.option("--start", required=True, help="起始日期 YYYY-MM-DD")
+@click.option("--end", required=True, help="结束日期 YYYY-MM-DD")
+@click.option("--stage-overrides", default=None, help="阶段注入文件")
+@click.option("--workers", default=1, show_default=True, help="决策阶段并行进程数；组合回测时为并行回测的产品数")
+@click.option("--stream", is_flag=True, default=False, help="流式输出：逐条落盘并在线累加指标，内存占用恒定")
+@click.option("--profile", is_flag=True, default=False, help="记录决策/成交/盯市各阶段耗时并输出 Chrome Trace")
+@click.option("--profile-memory", is_flag=True, default=False, help="同时统计各阶段内存分配（较慢）")
+@click.option("--no-cache", is_flag=True, default=False, help="不读写决策磁盘缓存")
+@click.option(
+    "--rebalance",
+    default="daily",
+    show_default=True,
+    help="调仓计划：daily | weekly[:星期0-6] | monthly[:日] | every:N | event[:macro,news]",
+)
+@click.option("--resume", is_flag=True, default=False, help="从输出目录的检查点续跑新增日期，配置变化时自动全量运行")
+def backtest(
+    product: str | None,
+    product_list: str | None,
+    all_products: bool,
+    start: str,
+    end: str,
+    stage_overrides: str | None,
+    workers: int,
+    stream: bool,
+    profile: bool,
+    profile_memory: bool,
+    no_cache: bool,
+    rebalance: str,
+    resume: bool,
+) -> None:
+    # 回测命令：生成输出目录并执行回测引擎
+    from system.backtest.checkpoint import CHECKPOINT_FILE
+    from system.backtest.engine import run_backtest
+    from system.backtest.schedule import parse_schedule
+    from system.pipeline.decision_cache import DecisionCache
+    from system.profiling import profiling
+
+    if (product is not None) + (product_list is not None) + all_products != 1:
+        raise click.UsageError("需要指定 --product、--products 或 --all-products 之一")
+    start_date = _parse_date(start)
+    end_date = _parse_date(end)
+    try:
+        schedule = parse_schedule(rebalance)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--rebalance") from exc
+    if product is None:
+        if stream or resume or profile or profile_memory:
+            raise click.UsageError("组合回测不支持 --stream、--resume 与 --profile")
+        from system.data_context import get_context
+
+        configured = get_context().products().get("products", {})
+        if all_products:
+            products, label = sorted(configured), "all"
+        else:
+            # 去重并保持顺序；产品名称会拼入输出目录，未配置的产品直接拒绝
+            products = list(dict.fromkeys(name.strip() for name in product_list.split(",") if name.strip()))
+            unknown = [name for name in products if name not in configured]
+            if unknown:
+                raise click.BadParameter(f"未配置的产品: {', '.join(unknown)}", param_hint="--products")
+            label = "-".join(products)
+        _backtest_portfolio(products, label, start, end, stage_overrides, workers, no_cache, schedule)
+        return
+    output_dir = Path("backtest_output") / f"{product}_{start}_{end}"
+    if resume and not (output_dir / CHECKPOINT_FILE).exists():
+        # 输出目录按结束日命名：续跑时以同一起始日、结束日最晚的已有目录为基础复制一份
+        previous = _latest_backtest_dir(product, start, end)
+        if previous is not None:
+            shutil.copytree(previous, output_dir, dirs_exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    profiler = _make_profiler(profile, profile_memory)
+    with profiling(profiler):
+        _, _, summary = run_backtest(
+            product,
+            start_date,
+            end_date,
+            stage_overrides,
+            str(output_dir),
+            workers=workers,
+            stream=stream,
+            decision_cache=None if no_cache else DecisionCache(),
+            resume=resume,
+            schedule=schedule,
+        )
+
+    _print_summary(f"回测统计: {product} {start} ~ {end}", summary)
+    console.print(f"输出目录: {output_dir}")
+    _report_profile(profiler, output_dir / "trace.json")
+
+
+@cli.command()
+@click.option("--product", required=True, help="产品名称")
+@click.option("--start", required=True, help="起始日期 YYYY-MM-DD")
+@click.option("--end", required=True, help="结束日期 YYYY-MM-DD")
+@click.option("--spec", "spec_path", required=True, help="参数扫描规格文件")
+@click.option("--stage-overrides", default=None, help="阶段注入文件")
+@click.option("--workers", default=1, show_default=True, help="并行进程数")
+@click.option("--output", default=None, help="结果表路径，默认 sweep_output/<产品>_<起>_<止>.csv")
+def sweep(
+    product: str,
+    start: str,
+    end: str,
+    spec_path: str,
+    stage_overrides: str | None,
+    workers: int,
+    output: str | None,
+) -> None:
+    # 参数扫描：已存在于结果表中的参数组合会被跳过，支持中断后续跑
+    from system.backtest.sweep import load_spec, run_sweep
+
+    spec = load_spec(spec_path)
+    output_path = output or str(Path("sweep_output") / f"{product}_{start}_{end}.csv")
+    completed, skipped = run_sweep(
+        product,
+        _parse_date(start),
+        _parse_date(end),
+        spec,
+        output_path,
+        stage_overrides_path=stage_overrides,
+        workers=workers,
+    )
+    console.print(f"完成组合: {completed}  跳过已有: {skipped}")
+    console.print(f"结果表: {output_path}")
+
+
+@cli.command()
+@click.option("--product", required=True, help="产品名称")
+@click.option("--start", required=True, help="起始日期 YYYY-MM-DD")
+@click.option("--end", required=True, help="结束日期 YYYY-MM-DD")
+@click.option("--spec", "spec_path", required=True, help="成本情景规格文件")
+@click.option("--stage-overrides", default=None, help="阶段注入文件")
+@click.option("--workers", default=1, show_default=True, help="决策阶段并行进程数")
+def costs(product: str, start: str, end: str, spec_path: str, stage_overrides: str | None, workers: int) -> None:
+    # 成本敏感性分析：决策只生成一次，全部情景一次性完成账务回放
+    from system.backtest.scenarios import load_scenarios, run_cost_analysis
+    from system.data_context import get_context
+
+    scenarios = load_scenarios(spec_path, get_context().thresholds().get("thresholds", {}))
+    output_dir = Path("backtest_output") / f"{product}_{start}_{end}_costs"
+    table_df, _ = run_cost_analysis(
+        product,
+        _parse_date(start),
+        _parse_date(end),
+        scenarios,
+        stage_overrides_path=stage_overrides,
+        output_dir=str(output_dir),
+        workers=workers,
+    )
+    table = Table(title=f"成本敏感性: {product} {start} ~ {end}")
+    for column in ["情景", "手续费", "滑点", "最大持仓", "结束权益", "总收益率", "夏普比率", "最大回撤", "交易次数"]:
+        table.add_column(column, justify="left" if column == "情景" else "right")
+    for row in table_df.itertuples(index=False):
+        table.add_row(
+            row.name,
+            f"{row.fee:.4f}",
+            f"{row.slippage:.4f}",
+            str(row.max_positions),
+            f"{row.final_equity:,.2f}",
+            f"{row.total_return * 100:.2f}%",
+            f"{row.sharpe:.2f}",
+            f"{row.max_drawdown * 100:.2f}%",
+            str(row.trade_count),
+        )
+    console.print(table)
     console.print(f"输出目录: {output_dir}")
 
 
 @cli.command()
 @click.option("--run-id", required=True, help="运行ID")
 def replay(run_id: str) -> None:
-    # 回放历史运行记录，便于复盘
-    record = load_run(run_id)
-    table = Table(title=f"回放: {record.product} {record.date}")
+    # 回放历史运行记录，便于复盘；审计库中的记录直接按行读取，旧版 JSON 记录兼容读取
+    from system.audit import get_store
+
+    loaded = get_store().load_rows(run_id)
+    if loaded is None:
+        from system.audit import load_run
+
+        record = load_run(run_id)
+        run = {"product": record.product, "date": record.date}
+        rows = [result.dict() for result in record.results]
+    else:
+        run, rows = loaded
+    table = Table(title=f"回放: {run['product']} {run['date']}")
     table.add_column("主题", style="cyan")
     table.add_column("意图")
     table.add_column("阶段")
     table.add_column("分数")
     table.add_column("原因")
-    for result in record.results:
-        table.add_row(result.theme, result.intent, result.stage, f"{result.score:.2f}", result.reason)
+    for row in rows:
+        table.add_row(row["theme"], row["intent"], row["stage"], f"{row['score']:.2f}", row["reason"])
+    console.print(table)
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="HTTP 监听地址（仅限本机回环地址）")
+@click.option("--port", default=8765, show_default=True, help="HTTP 监听端口")
+@click.option("--socket", "socket_path", default=None, help="改为监听 Unix 套接字（每行一个 JSON 请求）")
+@click.option("--workers", default=4, show_default=True, help="run/select 请求的工作线程数")
+@click.option("--backtest-workers", default=1, show_default=True, help="回测进程数，与日常决策请求互不占用")
+@click.option("--max-pending", default=16, show_default=True, help="run/select 排队上限，超出返回 503")
+@click.option("--max-pending-backtests", default=4, show_default=True, help="回测排队上限，超出返回 503")
+@click.option("--watch-interval", default=2.0, show_default=True, help="配置与数据文件轮询间隔（秒），0 表示不监视")
+@click.option("--no-cache", is_flag=True, default=False, help="不读写决策磁盘缓存")
+def serve(
+    host: str,
+    port: int,
+    socket_path: str | None,
+    workers: int,
+    backtest_workers: int,
+    max_pending: int,
+    max_pending_backtests: int,
+    watch_interval: float,
+    no_cache: bool,
+) -> None:
+    # 常驻进程：数据只加载一次，文件变化后自动重新加载，按 JSON 应答 run/select/backtest 请求
+    from system.server import DecisionService, make_server
+
+    service = DecisionService(
+        workers=workers,
+        backtest_workers=backtest_workers,
+        max_pending=max_pending,
+        max_pending_backtests=max_pending_backtests,
+        use_cache=not no_cache,
+        watch_interval=watch_interval,
+        log=err_console.print,
+    )
+    try:
+        server = make_server(service, host, port, socket_path)
+    except FileExistsError as exc:
+        raise click.BadParameter(str(exc), param_hint="--socket") from exc
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--host") from exc
+    service.start()
+    err_console.print(f"已启动: {socket_path or f'http://{host}:{port}'}")
+
+    def _terminate(signum, frame) -> None:
+        # SIGTERM 与 Ctrl-C 同样走清理流程：关闭工作进程并删除套接字文件
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path:
+            Path(socket_path).unlink(missing_ok=True)
+
+
+@cli.group()
+def runs() -> None:
+    """运行审计库查询与维护。"""
+
+
+@runs.command("query")
+@click.option("--product", default=None, help="产品名称")
+@click.option("--start", default=None, help="起始日期 YYYY-MM-DD")
+@click.option("--end", default=None, help="结束日期 YYYY-MM-DD")
+@click.option("--theme", default=None, help="主题")
+@click.option("--intent", default=None, help="意图，如 ENTER/EXIT")
+@click.option("--limit", default=50, show_default=True, help="最多列出的运行数")
+@click.option("--summary", is_flag=True, default=False, help="按主题与意图聚合，而不是列出运行")
+def runs_query(
+    product: str | None,
+    start: str | None,
+    end: str | None,
+    theme: str | None,
+    intent: str | None,
+    limit: int,
+    summary: bool,
+) -> None:
+    # 日期参数先校验格式，库中以 ISO 字符串比较
+    from system.audit import get_store
+
+    for value in (start, end):
+        if value is not None:
+            _parse_date(value)
+    store = get_store()
+    if summary:
+        table = Table(title="决策汇总")
+        table.add_column("主题", style="cyan")
+        table.add_column("意图")
+        table.add_column("次数", justify="right")
+        table.add_column("平均分", justify="right")
+        for row in store.intent_counts(product, start, end, theme, intent):
+            table.add_row(row["theme"], row["intent"], str(row["count"]), f"{row['avg_score']:.2f}")
+        console.print(table)
+        return
+    table = Table(title="历史运行")
+    table.add_column("运行ID", style="cyan")
+    table.add_column("产品")
+    table.add_column("日期")
+    table.add_column("决策数", justify="right")
+    table.add_column("匹配数", justify="right")
+    for row in store.query_runs(product, start, end, theme, intent, limit):
+        table.add_row(row["run_id"], row["product"], row["date"], str(row["result_count"]), str(row["matched"]))
+    console.print(table)
+
+
+@runs.command("import")
+def runs_import() -> None:
+    # 把旧版 runs/*.json 导入审计库，之后即可被查询
+    from system.audit import get_store
+
+    imported = get_store().import_legacy()
+    console.print(f"已导入 {imported} 条运行记录")
+
+
+@cli.command()
+@click.option("--scale", "scales", multiple=True, help="数据规模 small/medium/large，可重复指定")
+@click.option("--repeat", default=3, show_default=True, help="每项重复次数")
+@click.option("--tolerance", default=0.2, show_default=True, help="耗时增长超过该比例视为回退")
+@click.option("--history", "history_path", default=None, help="历史文件，默认 bench_output/history.jsonl")
+@click.option("--fail-on-regression", is_flag=True, default=False, help="出现回退时以非零状态退出")
+def bench(scales: tuple, repeat: int, tolerance: float, history_path: str | None, fail_on_regression: bool) -> None:
+    # 基准测试：默认跑 small 与 medium，结果追加到历史文件并与上次对比
+    from system.benchmark import BENCH_DIR, SCALES, run_benchmarks
+
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        raise click.BadParameter(f"未知数据规模: {', '.join(unknown)}", param_hint="--scale")
+    history_path = history_path or str(BENCH_DIR / "history.jsonl")
+    entries = run_benchmarks(list(scales) or ["small", "medium"], repeat, Path(history_path), tolerance)
+    table = Table(title="性能基准")
+    table.add_column("规模", style="cyan")
+    table.add_column("项目")
+    table.add_column("中位数(ms)", justify="right")
+    table.add_column("上次(ms)", justify="right")
+    table.add_column("变化", justify="right")
+    regressions = []
+    for entry in entries:
+        for case, item in entry["report"].items():
+            previous = f"{item['previous'] * 1000:.2f}" if item["previous"] is not None else "-"
+            change = f"{(item['ratio'] - 1) * 100:+.1f}%" if item["ratio"] is not None else "-"
+            if item["regression"]:
+                change = f"[red]{change}[/red]"
+                regressions.append(f"{entry['scale']}/{case}")
+            table.add_row(entry["scale"], case, f"{item['median'] * 1000:.2f}", previous, change)
     console.print(table)
+    console.print(f"历史记录: {history_path}")
+    if regressions:
+        console.print(f"[red]性能回退: {', '.join(regressions)}[/red]")
+        if fail_on_regression:
+            raise SystemExit(1)
+
+
+@cli.group()
+def data() -> None:
+    """行情数据维护：列式缓存、分区布局等。"""
+
+
+@data.command("compile")
+def data_compile() -> None:
+    # 预编译列式缓存，首次运行 run/backtest 时无需再解析 CSV
+    from system.config_loader import compile_data_cache
+
+    for cache_dir in compile_data_cache():
+        console.print(f"已编译: {cache_dir}")
+
+
+@data.command("partition")
+@click.option("--freq", type=click.Choice(["month", "year"]), default="month", show_default=True)
+def data_partition(freq: str) -> None:
+    # 将行情 CSV 拆分为按月/按年的分区目录，回测只读取与窗口相交的分区
+    from system.config_loader import DATA_DIR, DATASET_FILES, partition_dataset
+
+    for name in DATASET_FILES:
+        written = partition_dataset(DATA_DIR, name, freq=freq)
+        console.print(f"{name}: 写出 {len(written)} 个分区")
+
+
+@data.command("fetch")
+@click.option("--feeds", "feeds_path", default="configs/feeds.yaml", show_default=True, help="数据源配置文件")
+@click.option("--start", required=True, help="起始日期 YYYY-MM-DD")
+@click.option("--end", required=True, help="结束日期 YYYY-MM-DD")
+@click.option("--max-connections", default=8, show_default=True, help="每个主机的并发连接数")
+@click.option("--timeout", default=10.0, show_default=True, help="单个请求超时（秒）")
+@click.option("--dry-run", is_flag=True, default=False, help="只拉取并统计，不写本地文件")
+def data_fetch(feeds_path: str, start: str, end: str, max_connections: int, timeout: float, dry_run: bool) -> None:
+    # 并发拉取 HTTP 数据源，规范化后合并进本地行情 CSV
+    import asyncio
+
+    from system.config_loader import load_yaml
+    from system.feeds.adapters import FeedError, build_adapters, fetch_all
+    from system.feeds.store import persist
+
+    start_date, end_date = _parse_date(start), _parse_date(end)
+    try:
+        adapters = build_adapters(load_yaml(Path(feeds_path)).get("feeds", {}))
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--feeds") from exc
+    stats: dict = {}
+    try:
+        frames = asyncio.run(fetch_all(adapters, start_date, end_date, max_connections, timeout, stats))
+    except FeedError as exc:
+        raise click.ClickException(str(exc)) from exc
+    table = Table(title=f"数据源拉取: {start} ~ {end}")
+    table.add_column("数据集", style="cyan")
+    table.add_column("行数", justify="right")
+    table.add_column("写入")
+    written = {} if dry_run else persist(frames)
+    for name, frame in frames.items():
+        files = "; ".join(f"{path.name} {mode} {rows}" for path, mode, rows in written.get(name, []))
+        table.add_row(name, str(len(frame)), files or "-")
+    console.print(table)
+    console.print(f"请求 {stats['requests']} 次，新建连接 {stats['connections']} 个")
+
+
+@cli.group()
+def cache() -> None:
+    """决策磁盘缓存管理。"""
+
+
+@cache.command("stats")
+def cache_stats() -> None:
+    # 展示缓存条目数与占用空间
+    from system.pipeline.decision_store import DecisionCache
+
+    decision_cache = DecisionCache()
+    stats = decision_cache.stats()
+    table = Table(title="决策缓存")
+    table.add_column("项目", style="cyan")
+    table.add_column("数值", justify="right")
+    table.add_row("目录", str(decision_cache.root))
+    table.add_row("条目数", str(stats["entries"]))
+    table.add_row("占用(MB)", f"{stats['bytes'] / 1024 / 1024:.2f}")
+    table.add_row("上限(MB)", f"{stats['max_bytes'] / 1024 / 1024:.2f}")
+    console.print(table)
+
+
+@cache.command("clear")
+def cache_clear() -> None:
+    from system.pipeline.decision_store import DecisionCache
+
+    removed = DecisionCache().clear()
+    console.print(f"已删除 {removed} 条缓存")
+
+
+@cli.group()
+def config() -> None:
+    """配置快照维护。"""
+
+
+@config.command("compile")
+def config_compile() -> None:
+    # 重建配置快照；源文件变化时快照也会在下次读取时自动重建
+    from system.config_bundle import compile_bundle
+
+    console.print(f"已编译: {compile_bundle()}")
 
 
 @cli.command()
 def products() -> None:
-    # 列出可用产品清单
+    # 列出可用产品清单（读取配置快照）
+    from system.product.registry import list_products
+
     items = list_products()
     console.print("可用产品:")
     for item in items:
@@ -0,0 +1,103 @@
+"""配置快照：把产品/主题/约束/阈值/资产配置编译为单个二进制文件。
+
+轻量命令（products、select 等）直接读取快照，不再导入 pandas、解析 YAML；
+快照记录各源文件的 (mtime, 大小)，任一源文件变化后自动重建。
+本模块只依赖标准库，YAML 解析器仅在重建时导入。
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG_DIR = ROOT / "system" / "configs"
+# 快照格式版本，字段或结构变化时递增
+FORMAT_VERSION = 1
+# 快照名称 -> 源文件
+SOURCES = {
+    "products": "products.yaml",
+    "themes": "themes.yaml",
+    "constraints": "constraints.yaml",
+    "thresholds": "thresholds.yaml",
+    "assets": "assets.csv",
+}
+
+
+def bundle_path(config_dir: Path = CONFIG_DIR) -> Path:
+    return Path(config_dir) / ".cache" / "config.bundle"
+
+
+def _signature(config_dir: Path) -> List[Tuple[str, int, int]]:
+    signature = []
+    for filename in SOURCES.values():
+        stat = os.stat(config_dir / filename)
+        signature.append((filename, stat.st_mtime_ns, stat.st_size))
+    return signature
+
+
+def _read_sources(config_dir: Path) -> Dict[str, Any]:
+    # 与 config_loader 的读取方式一致；资产表保存为逐行字典（值为原始字符串）
+    import yaml
+
+    data: Dict[str, Any] = {}
+    for name, filename in SOURCES.items():
+        path = config_dir / filename
+        with open(path, "r", encoding="utf-8", newline="" if filename.endswith(".csv") else None) as handle:
+            if filename.endswith(".csv"):
+                data[name] = list(csv.DictReader(handle))
+            else:
+                data[name] = yaml.safe_load(handle) or {}
+    return data
+
+
+def _write(config_dir: Path, signature: List[Tuple[str, int, int]]) -> Dict[str, Any]:
+    # 读取源文件并原子写出快照，返回快照内容
+    data = _read_sources(config_dir)
+    path = bundle_path(config_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".config-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            pickle.dump(
+                {"version": FORMAT_VERSION, "signature": signature, "data": data},
+                handle,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return data
+
+
+def compile_bundle(config_dir: Path = CONFIG_DIR) -> Path:
+    # 强制重建快照
+    config_dir = Path(config_dir)
+    _write(config_dir, _signature(config_dir))
+    return bundle_path(config_dir)
+
+
+def load_bundle(config_dir: Path = CONFIG_DIR) -> Dict[str, Any]:
+    # 快照新鲜时直接反序列化；缺失、版本不符或源文件变化时重建
+    config_dir = Path(config_dir)
+    signature = _signature(config_dir)
+    try:
+        with open(bundle_path(config_dir), "rb") as handle:
+            payload = pickle.load(handle)
+        if payload.get("version") == FORMAT_VERSION and payload.get("signature") == signature:
+            return payload["data"]
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        pass
+    try:
+        return _write(config_dir, signature)
+    except OSError:
+        # 只读目录等情况下无法写快照，直接返回解析结果
+        return _read_sources(config_dir)
@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+import calendar
+import csv
+import os
 from datetime import date
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import yaml
 
+from system.data_cache import compile_frame, parse_source, read_csv_cached
+
 # 根目录与配置/数据路径统一在此定义，方便维护
 ROOT = Path(__file__).resolve().parents[1]
 CONFIG_DIR = ROOT / "system" / "configs"
@@ -21,44 +26,148 @@ def load_yaml(path: Path) -> Dict:
         return yaml.safe_load(handle) or {}
 
 
-def load_products() -> Dict:
+def load_products(config_dir: Path = CONFIG_DIR) -> Dict:
     # 产品配置：产品与主题的映射
-    return load_yaml(CONFIG_DIR / "products.yaml")
+    return load_yaml(config_dir / "products.yaml")
 
 
-def load_themes() -> Dict:
+def load_themes(config_dir: Path = CONFIG_DIR) -> Dict:
     # 主题配置：主题到约束的映射
-    return load_yaml(CONFIG_DIR / "themes.yaml")
+    return load_yaml(config_dir / "themes.yaml")
 
 
-def load_constraints() -> Dict:
+def load_constraints(config_dir: Path = CONFIG_DIR) -> Dict:
     # 约束配置：约束指标与健康度
-    return load_yaml(CONFIG_DIR / "constraints.yaml")
+    return load_yaml(config_dir / "constraints.yaml")
 
 
-def load_thresholds() -> Dict:
+def load_thresholds(config_dir: Path = CONFIG_DIR) -> Dict:
     # 阈值配置：各种策略参数
-    return load_yaml(CONFIG_DIR / "thresholds.yaml")
+    return load_yaml(config_dir / "thresholds.yaml")
 
 
-def load_assets() -> pd.DataFrame:
+def load_assets(config_dir: Path = CONFIG_DIR) -> pd.DataFrame:
     # 资产表：主题与标的的对应
-    return pd.read_csv(CONFIG_DIR / "assets.csv")
-
-
-def load_prices() -> pd.DataFrame:
-    # 历史价格数据
-    return pd.read_csv(DATA_DIR / "prices.csv", parse_dates=["date"])
-
-
-def load_macro() -> pd.DataFrame:
+    return pd.read_csv(config_dir / "assets.csv")
+
+
+# 行情类数据集的单文件名；同名目录（去掉扩展名）存在时改为按分区读取，
+# 例如 prices.csv -> prices/2025-09.csv（按月）或 prices/2025.csv（按年）
+DATASET_FILES = ("prices.csv", "macro_stub.csv", "news_stub.csv")
+
+# 分区目录列表缓存：目录 -> (目录 mtime, 分区文件列表)，文件增删会改变目录 mtime
+_PARTITION_LISTINGS: Dict[Path, Tuple[int, List[Path]]] = {}
+
+
+def partition_dir(data_dir: Path, filename: str) -> Path:
+    return data_dir / Path(filename).stem
+
+
+def partition_range(path: Path) -> Tuple[date, date]:
+    # 由分区文件名推出覆盖的日期区间：YYYY 为整年，YYYY-MM 为整月
+    parts = path.stem.split("-")
+    if len(parts) == 1 and parts[0].isdigit():
+        year = int(parts[0])
+        return date(year, 1, 1), date(year, 12, 31)
+    if len(parts) == 2 and all(part.isdigit() for part in parts):
+        year, month = int(parts[0]), int(parts[1])
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+    raise ValueError(f"无法识别的分区文件名: {path.name}")
+
+
+def _list_partitions(directory: Path) -> List[Path]:
+    mtime = os.stat(directory).st_mtime_ns
+    cached = _PARTITION_LISTINGS.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    files = sorted(directory.glob("*.csv"), key=partition_range)
+    if not files:
+        raise FileNotFoundError(f"分区目录 {directory} 中没有数据文件")
+    _PARTITION_LISTINGS[directory] = (mtime, files)
+    return files
+
+
+def dataset_files(
+    data_dir: Path, filename: str, start: Optional[date] = None, end: Optional[date] = None
+) -> List[Path]:
+    # 返回需要读取的文件：分区布局下只保留与 [start, end] 有交集的分区，否则为单个 CSV
+    directory = partition_dir(data_dir, filename)
+    if not directory.is_dir():
+        return [data_dir / filename]
+    selected = []
+    for path in _list_partitions(directory):
+        first, last = partition_range(path)
+        if (start is None or last >= start) and (end is None or first <= end):
+            selected.append(path)
+    return selected
+
+
+def _load_dataset(
+    data_dir: Path, filename: str, start: Optional[date] = None, end: Optional[date] = None
+) -> pd.DataFrame:
+    files = dataset_files(data_dir, filename, start, end)
+    if not files:
+        # 窗口与所有分区都不相交：返回列与类型正确的空表
+        first = _list_partitions(partition_dir(data_dir, filename))[0]
+        return read_csv_cached(first, parse_dates=["date"]).iloc[:0]
+    frames = [read_csv_cached(path, parse_dates=["date"]) for path in files]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_prices(data_dir: Path = DATA_DIR, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    # 历史价格数据；行情类数据经列式缓存加载，缓存过期时自动回退到解析 CSV
+    return _load_dataset(data_dir, "prices.csv", start, end)
+
+
+def load_macro(data_dir: Path = DATA_DIR, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
     # 宏观指标数据（示例）
-    return pd.read_csv(DATA_DIR / "macro_stub.csv", parse_dates=["date"])
+    return _load_dataset(data_dir, "macro_stub.csv", start, end)
 
 
-def load_news() -> pd.DataFrame:
+def load_news(data_dir: Path = DATA_DIR, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
     # 新闻计数数据（示例）
-    return pd.read_csv(DATA_DIR / "news_stub.csv", parse_dates=["date"])
+    return _load_dataset(data_dir, "news_stub.csv", start, end)
+
+
+def compile_data_cache(data_dir: Path = DATA_DIR) -> List[Path]:
+    # 预先把行情类 CSV（含全部分区文件）编译为列式缓存，返回缓存目录列表；读取期间被改写的文件跳过
+    compiled = []
+    for name in DATASET_FILES:
+        for path in dataset_files(data_dir, name):
+            frame, source = parse_source(path, parse_dates=["date"])
+            if source is not None:
+                compiled.append(compile_frame(frame, path, source))
+    return compiled
+
+
+def partition_dataset(data_dir: Path, filename: str, freq: str = "month") -> List[Path]:
+    # 把单个 CSV 按日期拆分为分区文件，原样复制各行文本，返回写出的分区路径
+    if freq not in {"month", "year"}:
+        raise ValueError(f"未知分区粒度: {freq}")
+    width = 7 if freq == "month" else 4
+    directory = partition_dir(data_dir, filename)
+    directory.mkdir(parents=True, exist_ok=True)
+    # 先清掉旧分区，避免切换粒度后新旧分区重复覆盖同一段日期
+    for stale in directory.glob("*.csv"):
+        stale.unlink()
+    groups: Dict[str, List[List[str]]] = {}
+    with open(data_dir / filename, "r", encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        date_pos = header.index("date")
+        for row in reader:
+            groups.setdefault(row[date_pos][:width], []).append(row)
+    written = []
+    for key in sorted(groups):
+        path = directory / f"{key}.csv"
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            writer.writerows(groups[key])
+        written.append(path)
+    return written
 
 
 def load_stage_overrides(path: str | None) -> Dict[str, Dict[str, str]]:
@@ -69,8 +178,29 @@ def load_stage_overrides(path: str | None) -> Dict[str, Dict[str, str]]:
     return data.get("overrides", {})
 
 
+def holiday_files(config_dir: Path = CONFIG_DIR) -> List[Path]:
+    # 交易所休市日文件：configs/holidays/*.csv，每个交易所一个文件
+    directory = config_dir / "holidays"
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob("*.csv"))
+
+
+def load_holidays(config_dir: Path = CONFIG_DIR) -> List[date]:
+    # 休市日文件至少包含 date 列（YYYY-MM-DD），其余列（如 name）仅作说明
+    holidays: List[date] = []
+    for path in holiday_files(config_dir):
+        with open(path, "r", encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                value = (row.get("date") or "").strip()
+                if value:
+                    holidays.append(date.fromisoformat(value))
+    return holidays
+
+
 def list_trading_dates(start: date, end: date) -> List[date]:
     # 使用 pandas 生成日期列表，按自然日频率
+    # 回测按数据中的真实交易日迭代，见 DataContext.calendar()
     dates = pd.date_range(start=start, end=end, freq="D")
     return [d.date() for d in dates]
 
@@ -1,14 +1,50 @@
-"""示例数据生成脚本：用于创建演示用的 CSV 数据。"""
+"""示例数据生成脚本：用于创建演示用的 CSV 数据。
+
+默认参数生成仓库自带的演示数据（GOLD 产品、3 个主题、约 140 天）；
+通过产品数、主题数、每主题标的数、年数与随机种子可生成任意规模的合成数据，
+并在输出目录下同时写出配套的配置文件，供性能基准测试使用。
+"""
 
 from __future__ import annotations
 
+import argparse
 import csv
+import random
+import shutil
+from dataclasses import dataclass
 from datetime import date, timedelta
 from pathlib import Path
+from typing import List, Optional
+
+import yaml
 
 # 定位项目根目录与数据目录
 ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT / "system" / "data"
+CONFIG_DIR = ROOT / "system" / "configs"
+
+# 演示产品沿用的名称：第一个产品的前 3 个主题与标的使用这些名称
+DEMO_PRODUCT = "GOLD"
+DEMO_THEMES = ["央行购金", "地缘冲突", "通胀对冲"]
+DEMO_ASSETS = ["GOLD_SPOT", "GOLD_MINER", "GOLD_ETF"]
+# 约束池：主题按顺序循环绑定，数值与 constraints.yaml 一致
+CONSTRAINTS = {
+    "REAL_RATE": {"name": "实际利率约束", "health_score": 0.72, "break_risk": 0.25},
+    "GEO_RISK": {"name": "地缘风险约束", "health_score": 0.68, "break_risk": 0.30},
+    "INFLATION": {"name": "通胀约束", "health_score": 0.70, "break_risk": 0.28},
+}
+DEMO_START = date(2025, 9, 1)
+DEMO_END = date(2026, 1, 19)
+
+
+@dataclass
+class ProductSpec:
+    """合成产品：主题列表与每个主题下的标的。"""
+
+    name: str
+    themes: List[str]
+    assets: List[List[str]]
+    base_price: float
 
 
 def daterange(start: date, end: date):
@@ -27,64 +63,170 @@ def write_csv(path: Path, fieldnames: list[str], rows: list[dict]) -> None:
         writer.writerows(rows)
 
 
-def main() -> None:
-    # 设置演示数据的时间区间
-    start = date(2025, 9, 1)
-    end = date(2026, 1, 19)
-
-    prices = []
-    macro = []
-    news = []
-    assets = ["GOLD_SPOT", "GOLD_MINER", "GOLD_ETF"]
-    themes = ["央行购金", "地缘冲突", "通胀对冲"]
-
-    base_price = 1900.0
-    for idx, current in enumerate(daterange(start, end)):
-        # 简单的涨跌模拟：一周内 4 天上涨、3 天回落
-        drift = 0.3 if idx % 7 < 4 else -0.1
-        base_price += drift
-        for asset in assets:
-            # 每个资产在基准价上略微偏移，模拟不同波动
-            close = base_price * (1 + 0.01 * assets.index(asset))
-            prices.append(
-                {
-                    "date": current.isoformat(),
-                    "asset_id": asset,
-                    "close": f"{close:.2f}",
-                    "volume": str(100000 + idx),
-                }
+def end_date(start: date, years: Optional[int]) -> date:
+    # 不指定年数时使用演示区间的结束日
+    if years is None:
+        return DEMO_END
+    return date(start.year + years, start.month, start.day) - timedelta(days=1)
+
+
+def build_specs(products: int, themes: int, assets_per_theme: int) -> List[ProductSpec]:
+    # 产品/主题/标的命名规则：首个产品沿用演示名称，其余按编号生成
+    specs = []
+    for p_idx in range(products):
+        name = DEMO_PRODUCT if p_idx == 0 else f"P{p_idx:03d}"
+        theme_names = []
+        asset_names = []
+        for t_idx in range(themes):
+            demo = p_idx == 0 and t_idx < len(DEMO_THEMES)
+            theme_names.append(DEMO_THEMES[t_idx] if demo else f"{name}_T{t_idx:03d}")
+            asset_names.append(
+                [
+                    DEMO_ASSETS[t_idx] if demo and a_idx == 0 else f"{theme_names[-1]}_A{a_idx}"
+                    for a_idx in range(assets_per_theme)
+                ]
             )
+        specs.append(ProductSpec(name, theme_names, asset_names, 1900.0 if p_idx == 0 else 100.0 * (p_idx + 1)))
+    return specs
 
-        macro.append(
-            {
-                "date": current.isoformat(),
-                "REAL_YIELD": f"{1.2 + 0.2 * (idx % 10) / 10:.2f}",
-                "DXY": f"{100 + 0.3 * (idx % 5):.2f}",
-                "INFLATION": f"{2.5 + 0.4 * (idx % 8) / 10:.2f}",
-                "CB_BUY_INDEX": f"{0.6 + 0.1 * (idx % 6) / 10:.2f}",
-                "GEO_RISK_INDEX": f"{0.4 + 0.2 * (idx % 9) / 10:.2f}",
-            }
-        )
-        for theme in themes:
-            # 新闻数量按主题与日期做简单循环
-            news_count = 4 + (idx + themes.index(theme)) % 4
-            news.append(
-                {
-                    "date": current.isoformat(),
-                    "product": "GOLD",
-                    "theme": theme,
-                    "news_count": str(news_count),
-                }
+
+def generate_data(
+    data_dir: Path,
+    specs: List[ProductSpec],
+    start: date,
+    end: date,
+    seed: Optional[int] = None,
+) -> None:
+    # 逐行流式写出价格/宏观/新闻三张表，内存占用与数据规模无关
+    # seed 为 None 时完全按确定性公式生成（即仓库自带的演示数据）；否则叠加可复现的随机扰动
+    rng = random.Random(seed) if seed is not None else None
+    data_dir.mkdir(parents=True, exist_ok=True)
+    with open(data_dir / "prices.csv", "w", newline="", encoding="utf-8") as prices_handle, open(
+        data_dir / "macro_stub.csv", "w", newline="", encoding="utf-8"
+    ) as macro_handle, open(data_dir / "news_stub.csv", "w", newline="", encoding="utf-8") as news_handle:
+        prices = csv.writer(prices_handle)
+        macro = csv.writer(macro_handle)
+        news = csv.writer(news_handle)
+        prices.writerow(["date", "asset_id", "close", "volume"])
+        # 宏观与新闻数据为示例 stub
+        macro.writerow(["date", "REAL_YIELD", "DXY", "INFLATION", "CB_BUY_INDEX", "GEO_RISK_INDEX"])
+        news.writerow(["date", "product", "theme", "news_count"])
+
+        base_prices = [spec.base_price for spec in specs]
+        # 每个标的一个随机游走因子，无种子时恒为 1
+        walks = [[1.0] * sum(len(group) for group in spec.assets) for spec in specs]
+        for idx, current in enumerate(daterange(start, end)):
+            day = current.isoformat()
+            # 简单的涨跌模拟：一周内 4 天上涨、3 天回落
+            drift = 0.3 if idx % 7 < 4 else -0.1
+            for p_idx, spec in enumerate(specs):
+                base_prices[p_idx] += drift
+                flat_assets = [asset for group in spec.assets for asset in group]
+                for a_idx, asset in enumerate(flat_assets):
+                    if rng is not None:
+                        walks[p_idx][a_idx] *= 1 + rng.gauss(0.0, 0.01)
+                    # 每个资产在基准价上略微偏移，模拟不同波动
+                    close = base_prices[p_idx] * (1 + 0.01 * a_idx) * walks[p_idx][a_idx]
+                    prices.writerow([day, asset, f"{close:.2f}", str(100000 + idx)])
+
+            geo_risk = 0.4 + 0.2 * (idx % 9) / 10
+            if rng is not None:
+                geo_risk += rng.uniform(-0.05, 0.05)
+            macro.writerow(
+                [
+                    day,
+                    f"{1.2 + 0.2 * (idx % 10) / 10:.2f}",
+                    f"{100 + 0.3 * (idx % 5):.2f}",
+                    f"{2.5 + 0.4 * (idx % 8) / 10:.2f}",
+                    f"{0.6 + 0.1 * (idx % 6) / 10:.2f}",
+                    f"{geo_risk:.2f}",
+                ]
             )
+            for spec in specs:
+                for t_idx, theme in enumerate(spec.themes):
+                    # 新闻数量按主题与日期做简单循环
+                    news_count = 4 + (idx + t_idx) % 4
+                    if rng is not None:
+                        news_count += rng.randint(-2, 3)
+                    news.writerow([day, spec.name, theme, str(news_count)])
+
+
+def write_configs(config_dir: Path, specs: List[ProductSpec]) -> None:
+    # 写出与合成数据配套的产品/主题/约束/资产配置，阈值沿用仓库配置
+    config_dir.mkdir(parents=True, exist_ok=True)
+    constraint_ids = list(CONSTRAINTS)
+    products = {"products": {spec.name: list(spec.themes) for spec in specs}}
+    themes = {}
+    rows = []
+    for spec in specs:
+        for t_idx, theme in enumerate(spec.themes):
+            constraint_id = constraint_ids[t_idx % len(constraint_ids)]
+            themes[theme] = {"constraint_id": constraint_id, "description": f"{spec.name} 合成主题"}
+            for asset in spec.assets[t_idx]:
+                rows.append(
+                    {
+                        "asset_id": asset,
+                        "name": asset,
+                        "type": "stock",
+                        "product": spec.name,
+                        "theme": theme,
+                        "constraint_id": constraint_id,
+                        "liquidity_score": 0.8,
+                        "pricing_power": 0.7,
+                        "policy_sensitivity": 0.6,
+                        "inventory_risk": 0.5,
+                        "beta_tag": "defensive",
+                    }
+                )
+    for name, payload in (
+        ("products.yaml", products),
+        ("themes.yaml", {"themes": themes}),
+        ("constraints.yaml", {"constraints": CONSTRAINTS}),
+    ):
+        with open(config_dir / name, "w", encoding="utf-8") as handle:
+            yaml.safe_dump(payload, handle, allow_unicode=True, sort_keys=False)
+    write_csv(config_dir / "assets.csv", list(rows[0]), rows)
+    shutil.copyfile(CONFIG_DIR / "thresholds.yaml", config_dir / "thresholds.yaml")
+
 
-    write_csv(DATA_DIR / "prices.csv", ["date", "asset_id", "close", "volume"], prices)
-    # 宏观与新闻数据为示例 stub
-    write_csv(
-        DATA_DIR / "macro_stub.csv",
-        ["date", "REAL_YIELD", "DXY", "INFLATION", "CB_BUY_INDEX", "GEO_RISK_INDEX"],
-        macro,
-    )
-    write_csv(DATA_DIR / "news_stub.csv", ["date", "product", "theme", "news_count"], news)
+def generate_dataset(
+    output_dir: Path,
+    products: int = 1,
+    themes: int = 3,
+    assets_per_theme: int = 1,
+    years: Optional[int] = None,
+    seed: Optional[int] = None,
+    start: date = DEMO_START,
+) -> Path:
+    # 生成一套独立的数据集：output_dir/configs 与 output_dir/data，返回 output_dir
+    specs = build_specs(products, themes, assets_per_theme)
+    write_configs(output_dir / "configs", specs)
+    generate_data(output_dir / "data", specs, start, end_date(start, years), seed)
+    return output_dir
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="生成演示/合成数据")
+    parser.add_argument("--products", type=int, default=1, help="产品数量")
+    parser.add_argument("--themes", type=int, default=3, help="每个产品的主题数量")
+    parser.add_argument("--assets-per-theme", type=int, default=1, help="每个主题的标的数量")
+    parser.add_argument("--years", type=int, default=None, help="年数，不填则使用演示区间")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，不填则按确定性公式生成")
+    parser.add_argument("--output", default=None, help="输出目录；不填则覆盖仓库演示数据（不写配置）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    if args.output is not None:
+        generate_dataset(
+            Path(args.output), args.products, args.themes, args.assets_per_theme, args.years, args.seed
+        )
+        return
+    # 仓库演示数据只能按现有配置生成，避免数据与 configs 不一致
+    if (args.products, args.themes, args.assets_per_theme) != (1, 3, 1):
+        raise SystemExit("扩展规模的数据需要通过 --output 写到独立目录")
+    generate_data(DATA_DIR, build_specs(1, 3, 1), DEMO_START, end_date(DEMO_START, args.years), args.seed)
 
 
 if __name__ == "__main__":
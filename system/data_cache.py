@@ -0,0 +1,155 @@
+"""列式数据缓存：把 CSV 编译为按列存放的 NumPy 文件，加载时内存映射读取。
+
+缓存目录位于源文件旁的 .cache/<文件名>/，清单记录源文件签名与内容哈希，
+源文件变化后自动重建。字符串列以整数编码 + 类别表存储。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = "manifest.json"
+# 清单格式版本，存储格式变化时递增以淘汰旧缓存
+FORMAT_VERSION = 1
+
+
+def cache_dir_for(path: Path) -> Path:
+    # 每个源文件对应一个缓存目录
+    return path.parent / ".cache" / path.name
+
+
+def _source_digest(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(cache_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_dir / MANIFEST, "r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == FORMAT_VERSION else None
+
+
+def is_fresh(path: Path, manifest: Optional[Dict[str, Any]]) -> bool:
+    # 先比较 mtime/大小；不一致时再比较内容哈希，避免 touch 导致无谓重建
+    if manifest is None:
+        return False
+    stat = os.stat(path)
+    if manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+        return True
+    return manifest["sha1"] == _source_digest(path)
+
+
+def parse_source(path: Path, parse_dates: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+    # 一次读入源文件字节，解析与内容哈希基于同一份字节；返回 (数据表, 源文件签名)
+    # 读取前后 mtime/大小不一致（读取期间有写入）时签名为 None，调用方不应据此编译缓存
+    before = os.stat(path)
+    with open(path, "rb") as handle:
+        raw = handle.read()
+    frame = pd.read_csv(io.BytesIO(raw), parse_dates=parse_dates)
+    after = os.stat(path)
+    signature = (before.st_mtime_ns, before.st_size)
+    if signature != (after.st_mtime_ns, after.st_size) or len(raw) != before.st_size:
+        return frame, None
+    source = {"mtime_ns": before.st_mtime_ns, "size": before.st_size, "sha1": hashlib.sha1(raw).hexdigest()}
+    return frame, source
+
+
+def compile_frame(frame: pd.DataFrame, path: Path, source: Dict[str, Any]) -> Path:
+    # 将已解析的 DataFrame 按列写入缓存目录，先写临时目录再原子替换
+    # source 为 parse_source 返回的签名，必须与 frame 解析自同一份内容
+    cache_dir = cache_dir_for(path)
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    columns: List[Dict[str, Any]] = []
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{path.name}-", dir=cache_dir.parent))
+    try:
+        for idx, name in enumerate(frame.columns):
+            series = frame[name]
+            entry: Dict[str, Any] = {"name": name, "file": f"c{idx}.npy", "dtype": str(series.dtype)}
+            if pd.api.types.is_datetime64_dtype(series.dtype):
+                # 日期列以整数刻度存储，加载时按原精度视图还原
+                entry["kind"] = "datetime"
+                values = series.to_numpy().view(np.int64)
+            elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+                entry["kind"] = "numeric"
+                values = series.to_numpy()
+            else:
+                # 字符串列：整数编码 + 类别表，缺失值编码为 -1
+                entry["kind"] = "category"
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+                entry["categories"] = [str(item) for item in categories]
+                values = codes.astype(np.int32)
+            np.save(tmp_dir / entry["file"], np.ascontiguousarray(values), allow_pickle=False)
+            columns.append(entry)
+        manifest = {
+            "version": FORMAT_VERSION,
+            "source": path.name,
+            "mtime_ns": source["mtime_ns"],
+            "size": source["size"],
+            "sha1": source["sha1"],
+            "rows": len(frame),
+            "columns": columns,
+        }
+        with open(tmp_dir / MANIFEST, "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, ensure_ascii=False, indent=2)
+        if cache_dir.exists():
+            shutil.rmtree(cache_dir)
+        os.replace(tmp_dir, cache_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return cache_dir
+
+
+def load_compiled(path: Path) -> Optional[pd.DataFrame]:
+    # 缓存新鲜时以内存映射方式读取各列；缺失或过期返回 None
+    # 写时复制映射（mmap_mode="c"）：只读使用不复制，调用方修改返回的数据表时只复制被写的页，不会写回缓存文件
+    cache_dir = cache_dir_for(path)
+    manifest = _read_manifest(cache_dir)
+    if not is_fresh(path, manifest):
+        return None
+    data: Dict[str, Any] = {}
+    for entry in manifest["columns"]:
+        values = np.load(cache_dir / entry["file"], mmap_mode="c", allow_pickle=False)
+        if entry["kind"] == "datetime":
+            data[entry["name"]] = values.view(np.dtype(entry["dtype"]))
+        elif entry["kind"] == "numeric":
+            data[entry["name"]] = values
+        else:
+            categorical = pd.Categorical.from_codes(values, categories=entry["categories"])
+            data[entry["name"]] = pd.Series(categorical).astype(entry["dtype"])
+    # copy=False：数值与日期列直接引用映射的数组，不复制到内存（dict 保持清单中的列顺序）
+    return pd.DataFrame(data, copy=False)
+
+
+def read_csv_cached(path: Path, parse_dates: Optional[List[str]] = None) -> pd.DataFrame:
+    # 优先读取列式缓存；缓存不可用时解析 CSV 并顺带重建缓存
+    path = Path(path)
+    frame = load_compiled(path)
+    if frame is not None:
+        return frame
+    frame, source = parse_source(path, parse_dates)
+    if source is None:
+        # 解析期间文件有变化，本次不编译，下次读取时重建
+        return frame
+    try:
+        compile_frame(frame, path, source)
+    except OSError:
+        # 只读目录等情况下缓存失败不影响正常加载
+        pass
+    return frame
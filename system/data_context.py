@@ -0,0 +1,314 @@
+"""数据上下文：进程级缓存配置与数据，文件变化后自动失效。"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from system import config_loader
+from system.config_loader import CONFIG_DIR, DATA_DIR
+from system.indexes import MacroIndex, NewsIndex, PriceIndex
+from system.trading_calendar import TradingCalendar
+
+# 文件签名：(修改时间纳秒, 文件大小)
+Signature = Tuple[int, int]
+# 回测窗口：(起始日, 结束日)，None 表示不限
+Window = Tuple[Optional[date], Optional[date]]
+
+# 行情数据集：名称 -> (单文件名, 加载函数)
+_DATASETS: Dict[str, Tuple[str, Callable[..., pd.DataFrame]]] = {
+    "prices": ("prices.csv", config_loader.load_prices),
+    "macro": ("macro_stub.csv", config_loader.load_macro),
+    "news": ("news_stub.csv", config_loader.load_news),
+}
+
+
+def file_signature(path: Path) -> Signature:
+    # 用 stat 获取签名，开销远小于重新解析文件
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_digest(path: Path) -> str:
+    # 文件内容哈希：签名变化但内容未变时（例如 touch）无需重新解析
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sources_signature(paths: Sequence[Path]) -> Tuple[Tuple[str, int, int], ...]:
+    # 多文件数据源（分区）的签名：文件名参与比较，分区增删同样视为变化
+    return tuple((path.name, *file_signature(path)) for path in paths)
+
+
+def sources_digest(paths: Sequence[Path]) -> str:
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(path.name.encode("utf-8"))
+        digest.update(file_digest(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+class _Entry:
+    """缓存条目：记录来源文件签名、内容哈希与解析结果。"""
+
+    __slots__ = ("signature", "digest", "value")
+
+    def __init__(self, signature: Any, digest: str, value: Any) -> None:
+        self.signature = signature
+        self.digest = digest
+        self.value = value
+
+
+def _same_sources(cached: Any, base: Any) -> bool:
+    if isinstance(base, tuple) and isinstance(cached, tuple):
+        return len(cached) == len(base) and all(a is b for a, b in zip(cached, base))
+    return cached is base
+
+
+class DataContext:
+    """数据上下文：每个数据源只解析一次，按 mtime/哈希 判断是否需要重新加载。
+
+    返回的字典与 DataFrame 为共享缓存对象，调用方只读使用，不要原地修改。
+    行情数据采用分区布局时，可通过 windowed() 只加载与回测窗口相交的分区。
+    """
+
+    def __init__(self, config_dir: Path = CONFIG_DIR, data_dir: Path = DATA_DIR) -> None:
+        self.config_dir = Path(config_dir)
+        self.data_dir = Path(data_dir)
+        self._entries: Dict[str, _Entry] = {}
+        # 派生缓存：key -> (来源对象, 派生结果)，来源重新加载后自动重建
+        self._derived: Dict[str, Tuple[Any, Any]] = {}
+        # 增量追加但尚未拼接进数据表的新行：key -> [DataFrame, ...]，读取数据表时才拼接
+        self._tails: Dict[str, List[pd.DataFrame]] = {}
+        # 守护进程等多线程场景下避免同一文件被并发重复解析
+        self._lock = threading.RLock()
+        self.window: Window = (None, None)
+
+    def windowed(self, start: Optional[date], end: Optional[date]) -> "DataContext":
+        # 返回限定日期窗口的视图：与原上下文共享缓存与锁，只影响行情数据的分区选择
+        view = copy.copy(self)
+        view.window = (start, end)
+        return view
+
+    def _load(self, key: str, path: Path | Sequence[Path], loader: Callable[[], Any]) -> Any:
+        paths: List[Path] = [path] if isinstance(path, Path) else list(path)
+        with self._lock:
+            signature = sources_signature(paths)
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                return entry.value
+            digest = sources_digest(paths)
+            if entry is not None and entry.digest == digest:
+                # 内容未变，仅刷新签名
+                entry.signature = signature
+                return entry.value
+            value = loader()
+            self._entries[key] = _Entry(signature, digest, value)
+            return value
+
+    def _derive(self, key: str, base: Any, builder: Callable[[Any], Any]) -> Any:
+        # base 为元组时按元素比较身份，任一来源重新加载即重建
+        with self._lock:
+            cached = self._derived.get(key)
+            if cached is not None and _same_sources(cached[0], base):
+                return cached[1]
+            value = builder(base)
+            self._derived[key] = (base, value)
+            return value
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        # 手动失效：不传 key 时清空全部缓存
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._derived.clear()
+                self._tails.clear()
+            else:
+                # 分区数据按窗口分别缓存（如 prices:2025-09..2025-12），一并失效
+                for name in [name for name in self._entries if name == key or name.startswith(f"{key}:")]:
+                    del self._entries[name]
+                    self._tails.pop(name, None)
+                    self._derived.pop(f"index:{name}", None)
+                    self._derived.pop(f"calendar:{name}", None)
+
+    def products(self) -> Dict:
+        return self._load(
+            "products",
+            self.config_dir / "products.yaml",
+            lambda: config_loader.load_products(self.config_dir),
+        )
+
+    def themes(self) -> Dict:
+        return self._load(
+            "themes",
+            self.config_dir / "themes.yaml",
+            lambda: config_loader.load_themes(self.config_dir),
+        )
+
+    def constraints(self) -> Dict:
+        return self._load(
+            "constraints",
+            self.config_dir / "constraints.yaml",
+            lambda: config_loader.load_constraints(self.config_dir),
+        )
+
+    def thresholds(self) -> Dict:
+        return self._load(
+            "thresholds",
+            self.config_dir / "thresholds.yaml",
+            lambda: config_loader.load_thresholds(self.config_dir),
+        )
+
+    def assets(self) -> pd.DataFrame:
+        return self._load(
+            "assets",
+            self.config_dir / "assets.csv",
+            lambda: config_loader.load_assets(self.config_dir),
+        )
+
+    def dataset_files(self, name: str) -> Tuple[str, List[Path]]:
+        # 行情数据集的缓存键与文件列表：单文件布局共用一个条目；分区布局按选中的分区范围分别缓存
+        filename = _DATASETS[name][0]
+        start, end = self.window
+        files = config_loader.dataset_files(self.data_dir, filename, start, end)
+        key = name
+        if config_loader.partition_dir(self.data_dir, filename).is_dir():
+            key = f"{name}:{files[0].stem}..{files[-1].stem}" if files else f"{name}:-"
+        return key, files
+
+    def _dataset(self, name: str, materialize: bool = True) -> Tuple[str, pd.DataFrame]:
+        # materialize=False 时不拼接增量新行：索引已原地追加，只需原数据表的身份用于派生缓存比较
+        loader = _DATASETS[name][1]
+        start, end = self.window
+        key, files = self.dataset_files(name)
+        with self._lock:
+            previous = self._entries.get(key)
+            frame = self._load(key, files, lambda: loader(self.data_dir, start, end))
+            if self._entries[key] is not previous:
+                # 文件被重新解析，已包含全部增量新行
+                self._tails.pop(key, None)
+            tails = self._tails.pop(key, None) if materialize else None
+            if not tails:
+                return key, frame
+            merged = pd.concat([frame, *tails], ignore_index=True)
+            self._entries[key].value = merged
+            # 派生结果已随增量更新，来源改指向拼接后的数据表，避免被当作新数据重建
+            for derived_key, (base, value) in list(self._derived.items()):
+                if base is frame:
+                    self._derived[derived_key] = (merged, value)
+            return key, merged
+
+    def ingest(self, name: str, frame: pd.DataFrame, signature: Any, digest: str, append: bool = True) -> None:
+        # 由调用方读取文件增量后写入：append=False 整体替换（首次读取或文件被改写），
+        # 否则新行追加到索引与待拼接列表，开销只与新增行数有关；签名与哈希需与 _load 的计算方式一致
+        key = self.dataset_files(name)[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if not append or entry is None:
+                self._entries[key] = _Entry(signature, digest, frame)
+                self._tails.pop(key, None)
+                self._derived.pop(f"index:{key}", None)
+                self._derived.pop(f"calendar:{key}", None)
+                return
+            entry.signature = signature
+            entry.digest = digest
+            if frame.empty:
+                return
+            self._tails.setdefault(key, []).append(frame)
+            index = self._derived.get(f"index:{key}")
+            if index is not None:
+                index[1].extend(frame)
+            # 交易日历只依赖日期集合，按更新后的价格索引重建
+            self._derived.pop(f"calendar:{key}", None)
+
+    def prices(self) -> pd.DataFrame:
+        return self._dataset("prices")[1]
+
+    def macro(self) -> pd.DataFrame:
+        return self._dataset("macro")[1]
+
+    def news(self) -> pd.DataFrame:
+        return self._dataset("news")[1]
+
+    def _index(self, name: str, builder: Callable[[pd.DataFrame], Any]) -> Any:
+        with self._lock:
+            key, frame = self._dataset(name, materialize=False)
+            if f"index:{key}" not in self._derived and self._tails.get(key):
+                # 索引尚未建立：先拼接增量新行再整体构建
+                key, frame = self._dataset(name)
+            return self._derive(f"index:{key}", frame, builder)
+
+    def price_index(self) -> PriceIndex:
+        return self._index("prices", PriceIndex.from_frame)
+
+    def macro_index(self) -> MacroIndex:
+        return self._index("macro", MacroIndex.from_frame)
+
+    def news_index(self) -> NewsIndex:
+        return self._index("news", NewsIndex.from_frame)
+
+    def holidays(self) -> List[date]:
+        # 休市日目录不存在时为空列表，增删文件同样视为变化
+        return self._load(
+            "holidays",
+            config_loader.holiday_files(self.config_dir),
+            lambda: config_loader.load_holidays(self.config_dir),
+        )
+
+    def calendar(self) -> TradingCalendar:
+        # 交易日历：价格索引中的日期扣除休市日，价格或休市日任一变化即重建
+        key = self.dataset_files("prices")[0]
+        return self._derive(
+            f"calendar:{key}",
+            (self.price_index(), self.holidays()),
+            lambda base: TradingCalendar.from_price_index(*base),
+        )
+
+    def source_digest(self, name: str) -> str:
+        # 数据源内容哈希（配置文件或行情数据集），内容不变则哈希不变，可用作缓存键
+        with self._lock:
+            if name in _DATASETS:
+                key = self._dataset(name, materialize=False)[0]
+            else:
+                getattr(self, name)()
+                key = name
+            return self._entries[key].digest
+
+    def stage_overrides(self, path: str | None) -> Dict[str, Dict[str, str]]:
+        # 阶段覆盖文件路径由调用方指定，按路径分别缓存
+        if not path:
+            return {}
+        return self._load(
+            f"stage_overrides:{Path(path).resolve()}",
+            Path(path),
+            lambda: config_loader.load_stage_overrides(path),
+        )
+
+
+_CONTEXTS: Dict[Tuple[str, str], DataContext] = {}
+_CONTEXTS_LOCK = threading.Lock()
+
+
+def context_for(config_dir: Path = CONFIG_DIR, data_dir: Path = DATA_DIR) -> DataContext:
+    # 按目录复用进程级上下文，子进程可凭目录参数取回自己的缓存
+    key = (str(Path(config_dir).resolve()), str(Path(data_dir).resolve()))
+    with _CONTEXTS_LOCK:
+        context = _CONTEXTS.get(key)
+        if context is None:
+            context = _CONTEXTS[key] = DataContext(config_dir, data_dir)
+        return context
+
+
+def get_context() -> DataContext:
+    # 进程级默认上下文：未显式传入 context 时共享同一份缓存
+    return context_for(CONFIG_DIR, DATA_DIR)
@@ -0,0 +1,209 @@
+"""数据源适配器：从 HTTP 接口并发拉取新闻、宏观与行情数据，规范化为与本地 CSV 相同的数据表。
+
+每个适配器把日期区间按 batch_days 切成批次，批次通过共享连接池并发请求，
+网络错误、超时、429 与 5xx 按指数退避重试。接口约定：
+GET <url>?start=YYYY-MM-DD&end=YYYY-MM-DD[&其他参数]，返回 JSON 记录数组
+（或 {"data": [...]}），或带表头的 CSV（Content-Type 含 csv）。
+新增数据源类型时继承 FeedAdapter 并用 register_adapter 注册。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+import pandas as pd
+
+from system.feeds.pool import ConnectionPool, Response
+
+# 可重试的状态码：限流与服务端错误
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+ADAPTERS: Dict[str, Type["FeedAdapter"]] = {}
+
+
+class FeedError(Exception):
+    """数据源请求失败（不可重试的状态码，或重试次数用尽）。"""
+
+
+def register_adapter(name: str) -> Callable[[Type["FeedAdapter"]], Type["FeedAdapter"]]:
+    # 以名称注册适配器类，feeds 配置中的 adapter 字段按此查找
+    def decorator(cls: Type["FeedAdapter"]) -> Type["FeedAdapter"]:
+        ADAPTERS[name] = cls
+        return cls
+
+    return decorator
+
+
+def date_batches(start: date, end: date, batch_days: int) -> List[Tuple[date, date]]:
+    # 把闭区间 [start, end] 切成每批不超过 batch_days 天的子区间
+    batches = []
+    cursor = start
+    while cursor <= end:
+        stop = min(end, cursor + timedelta(days=batch_days - 1))
+        batches.append((cursor, stop))
+        cursor = stop + timedelta(days=1)
+    return batches
+
+
+def _records(response: Response) -> pd.DataFrame:
+    # 响应体解析为原始数据表：CSV 按表头读取，JSON 接受记录数组或 {"data": [...]}
+    if "csv" in response.headers.get("content-type", ""):
+        return pd.read_csv(io.BytesIO(response.body))
+    payload = json.loads(response.body or b"[]")
+    if isinstance(payload, dict):
+        payload = payload.get("data", [])
+    return pd.DataFrame.from_records(payload)
+
+
+class FeedAdapter:
+    """数据源适配器基类：负责分批、重试与规范化，子类声明数据集与列。"""
+
+    # 写入的本地数据集（prices / macro / news）
+    dataset = ""
+    # 规范化后的列（不含 date），与本地 CSV 的列一致
+    columns: Sequence[str] = ()
+
+    def __init__(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_days: int = 31,
+        retries: int = 3,
+        backoff: float = 0.2,
+    ) -> None:
+        if batch_days < 1:
+            raise ValueError("batch_days 需为正整数")
+        self.url = url
+        self.params = dict(params or {})
+        self.batch_days = batch_days
+        self.retries = retries
+        self.backoff = backoff
+
+    async def _get(self, pool: ConnectionPool, start: date, end: date) -> Response:
+        params = {**self.params, "start": start.isoformat(), "end": end.isoformat()}
+        attempt = 0
+        while True:
+            try:
+                response = await pool.get(self.url, params)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+                # ValueError：状态行、响应头或分块长度格式错误，按网络错误重试
+                error = f"{type(exc).__name__}: {exc}"
+            else:
+                if response.status == 200:
+                    return response
+                if response.status not in RETRY_STATUS:
+                    raise FeedError(f"{self.url} 返回 {response.status}: {response.body[:200]!r}")
+                error = f"HTTP {response.status}"
+            if attempt >= self.retries:
+                raise FeedError(f"{self.url} {start}~{end} 重试 {self.retries} 次后仍失败: {error}")
+            await asyncio.sleep(self.backoff * 2**attempt)
+            attempt += 1
+
+    async def fetch(self, pool: ConnectionPool, start: date, end: date) -> pd.DataFrame:
+        # 全部批次并发请求（并发度由连接池限定），结果按批次顺序拼接后规范化
+        batches = date_batches(start, end, self.batch_days)
+        responses = await asyncio.gather(*(self._get(pool, lo, hi) for lo, hi in batches))
+        try:
+            frames = [frame for frame in map(_records, responses) if not frame.empty]
+            raw = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["date", *self.columns])
+            frame = self.normalize(raw)
+        except ValueError as exc:
+            # 响应体不是合法的 JSON/CSV，或字段值无法转换为日期/数值
+            raise FeedError(f"{self.url} 响应无法解析: {exc}") from exc
+        # 接口返回了区间外的行时丢弃，避免覆盖本地其他日期
+        days = frame["date"].dt.date
+        return frame[(days >= start) & (days <= end)].reset_index(drop=True)
+
+    def normalize(self, raw: pd.DataFrame) -> pd.DataFrame:
+        # 默认：检查列齐全、解析日期并按本地列顺序输出
+        missing = [column for column in ("date", *self.columns) if column not in raw.columns]
+        if missing:
+            raise FeedError(f"{self.url} 缺少字段: {', '.join(missing)}")
+        frame = raw[["date", *self.columns]].copy()
+        frame["date"] = pd.to_datetime(frame["date"])
+        return frame
+
+
+@register_adapter("news")
+class NewsFeed(FeedAdapter):
+    """新闻计数：date, product, theme, news_count。"""
+
+    dataset = "news"
+    columns = ("product", "theme", "news_count")
+
+    def normalize(self, raw: pd.DataFrame) -> pd.DataFrame:
+        frame = super().normalize(raw)
+        frame["news_count"] = pd.to_numeric(frame["news_count"]).astype("int64")
+        return frame
+
+
+@register_adapter("prices")
+class PriceFeed(FeedAdapter):
+    """行情：date, asset_id, close, volume。"""
+
+    dataset = "prices"
+    columns = ("asset_id", "close", "volume")
+
+    def normalize(self, raw: pd.DataFrame) -> pd.DataFrame:
+        frame = super().normalize(raw)
+        frame["close"] = pd.to_numeric(frame["close"]).astype("float64")
+        frame["volume"] = pd.to_numeric(frame["volume"]).astype("int64")
+        return frame
+
+
+@register_adapter("macro")
+class MacroFeed(FeedAdapter):
+    """宏观指标：宽表 date, <指标>...；接口也可返回长表 date, series, value，按日期透视为宽表。"""
+
+    dataset = "macro"
+
+    def normalize(self, raw: pd.DataFrame) -> pd.DataFrame:
+        if "date" not in raw.columns:
+            raise FeedError(f"{self.url} 缺少字段: date")
+        if {"series", "value"} <= set(raw.columns):
+            raw = raw.pivot_table(index="date", columns="series", values="value", aggfunc="last").reset_index()
+            raw.columns.name = None
+        frame = raw.copy()
+        frame["date"] = pd.to_datetime(frame["date"])
+        series = [column for column in frame.columns if column != "date"]
+        frame[series] = frame[series].apply(pd.to_numeric).astype("float64")
+        return frame.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def build_adapters(config: Dict[str, Dict[str, Any]]) -> List[FeedAdapter]:
+    # feeds 配置：名称 -> {adapter, url, params, batch_days, retries, backoff}；adapter 缺省时取名称
+    adapters = []
+    for name, spec in config.items():
+        spec = dict(spec)
+        kind = spec.pop("adapter", name)
+        if kind not in ADAPTERS:
+            raise ValueError(f"未知数据源类型: {kind}（可选 {', '.join(sorted(ADAPTERS))}）")
+        try:
+            adapters.append(ADAPTERS[kind](**spec))
+        except TypeError as exc:
+            raise ValueError(f"数据源 {name} 配置有误: {exc}") from exc
+    return adapters
+
+
+async def fetch_all(
+    adapters: Sequence[FeedAdapter],
+    start: date,
+    end: date,
+    max_per_host: int = 8,
+    timeout: float = 10.0,
+    stats: Optional[Dict[str, int]] = None,
+) -> Dict[str, pd.DataFrame]:
+    # 全部数据源共享一个连接池并发拉取；同一数据集有多个数据源时按配置顺序拼接
+    # 传入 stats 时写入请求数与新建连接数
+    stats = {} if stats is None else stats
+    async with ConnectionPool(max_per_host=max_per_host, timeout=timeout) as pool:
+        frames = await asyncio.gather(*(adapter.fetch(pool, start, end) for adapter in adapters))
+        stats.update(requests=pool.requests, connections=pool.opened)
+    merged: Dict[str, List[pd.DataFrame]] = {}
+    for adapter, frame in zip(adapters, frames):
+        merged.setdefault(adapter.dataset, []).append(frame)
+    return {name: pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0] for name, parts in merged.items()}
@@ -0,0 +1,134 @@
+"""基于 asyncio 的 HTTP/1.1 客户端：按主机复用 keep-alive 连接，限定每个主机的并发连接数。
+
+只依赖标准库，支持 Content-Length、chunked 与读到连接关闭三种响应体格式，以及 https。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ssl
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+# 连接键：(协议, 主机, 端口)
+HostKey = Tuple[str, str, int]
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+@dataclass
+class Response:
+    """HTTP 响应：状态码、小写键的响应头与完整响应体。"""
+
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class ConnectionPool:
+    """keep-alive 连接池：同一主机的请求复用空闲连接，并发连接数不超过 max_per_host。
+
+    需在同一个事件循环内使用，用完调用 close()（或作为 async with 上下文）。
+    """
+
+    def __init__(self, max_per_host: int = 8, timeout: float = 10.0) -> None:
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle: Dict[HostKey, List[Connection]] = {}
+        self._limits: Dict[HostKey, asyncio.Semaphore] = {}
+        # 统计：新建连接数与请求数，复用效果 = 1 - opened / requests
+        self.opened = 0
+        self.requests = 0
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    async def _open(self, key: HostKey) -> Connection:
+        scheme, host, port = key
+        context = ssl.create_default_context() if scheme == "https" else None
+        self.opened += 1
+        return await asyncio.open_connection(host, port, ssl=context)
+
+    async def get(self, url: str, params: Optional[Dict[str, object]] = None) -> Response:
+        # params 追加到查询串；网络错误、超时与响应格式错误原样抛出（OSError / asyncio.TimeoutError / ValueError），
+        # 由调用方决定是否重试
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname or "localhost", parts.port or (443 if scheme == "https" else 80))
+        target = parts.path or "/"
+        query = "&".join(item for item in (parts.query, urlencode(params or {})) if item)
+        if query:
+            target = f"{target}?{query}"
+        request = (
+            f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+            "Connection: keep-alive\r\nAccept-Encoding: identity\r\n\r\n"
+        ).encode("ascii")
+        limit = self._limits.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        async with limit:
+            self.requests += 1
+            idle = self._idle.setdefault(key, [])
+            while True:
+                reused = bool(idle)
+                connection = idle.pop() if reused else await asyncio.wait_for(self._open(key), self.timeout)
+                try:
+                    response, keep_alive = await asyncio.wait_for(self._exchange(connection, request), self.timeout)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    connection[1].close()
+                    if reused:
+                        # 空闲连接可能已被服务端关闭，换一个连接重发
+                        continue
+                    raise
+                except asyncio.TimeoutError:
+                    connection[1].close()
+                    raise
+                if keep_alive:
+                    idle.append(connection)
+                else:
+                    connection[1].close()
+                return response
+
+    @staticmethod
+    async def _exchange(connection: Connection, request: bytes) -> Tuple[Response, bool]:
+        reader, writer = connection
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    # 跳过可能存在的 trailer
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+        connection_header = headers.get("connection", "").lower()
+        keep_alive = connection_header != "close" and (version != "HTTP/1.0" or connection_header == "keep-alive")
+        return Response(int(status), headers, body), keep_alive
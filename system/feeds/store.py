@@ -0,0 +1,93 @@
+"""把数据源拉取的数据合并进本地行情 CSV（含分区布局），列式缓存随源文件变化自动重建。
+
+新数据全部晚于本地已有日期时只在文件末尾追加，已有行保持原样，跟随模式（watch）可增量读取；
+与已有日期重叠（数据修订）时按 (日期, 键列) 去重，以新数据为准并整体改写文件。
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+from system.config_loader import DATA_DIR, partition_dir
+
+# 数据集 -> (本地文件名, 同一日期内唯一标识一行的列)
+DATASETS: Dict[str, Tuple[str, Sequence[str]]] = {
+    "prices": ("prices.csv", ("asset_id",)),
+    "macro": ("macro_stub.csv", ()),
+    "news": ("news_stub.csv", ("product", "theme")),
+}
+
+
+def _targets(data_dir: Path, filename: str, frame: pd.DataFrame) -> List[Tuple[Path, pd.DataFrame]]:
+    # 单文件布局写回原文件；分区布局按已有分区的粒度（年/月）分组写入各分区文件
+    directory = partition_dir(data_dir, filename)
+    if not directory.is_dir():
+        return [(data_dir / filename, frame)]
+    existing = sorted(directory.glob("*.csv"))
+    width = len(existing[0].stem) if existing else 7
+    keys = frame["date"].dt.strftime("%Y-%m-%d").str[:width]
+    return [(directory / f"{key}.csv", part) for key, part in frame.groupby(keys, sort=True)]
+
+
+def _to_csv(frame: pd.DataFrame, header: bool) -> str:
+    return frame.to_csv(index=False, header=header, date_format="%Y-%m-%d", lineterminator="\n")
+
+
+def _replace(path: Path, text: str) -> None:
+    # 先写临时文件再原子替换，读取方不会看到写了一半的文件
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as handle:
+            handle.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write(path: Path, frame: pd.DataFrame, keys: Sequence[str]) -> str:
+    # 返回写入方式：created / appended / rewritten
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _replace(path, _to_csv(frame, header=True))
+        return "created"
+    existing = pd.read_csv(path, parse_dates=["date"])
+    header = list(existing.columns)
+    if set(frame.columns) <= set(header) and (existing.empty or frame["date"].min() > existing["date"].max()):
+        with open(path, "rb") as handle:
+            handle.seek(max(path.stat().st_size - 1, 0))
+            needs_newline = handle.read(1) not in (b"\n", b"")
+        with open(path, "a", encoding="utf-8", newline="") as handle:
+            if needs_newline:
+                handle.write("\n")
+            handle.write(_to_csv(frame.reindex(columns=header), header=False))
+        return "appended"
+    merged = pd.concat([existing, frame], ignore_index=True)
+    merged = merged.drop_duplicates(subset=["date", *keys], keep="last")
+    merged = merged.sort_values("date", kind="stable")
+    _replace(path, _to_csv(merged, header=True))
+    return "rewritten"
+
+
+def persist(frames: Dict[str, pd.DataFrame], data_dir: Path = DATA_DIR) -> Dict[str, List[Tuple[Path, str, int]]]:
+    # 返回每个数据集写入的文件：(路径, 写入方式, 行数)；空数据集不写文件
+    written: Dict[str, List[Tuple[Path, str, int]]] = {}
+    for name, frame in frames.items():
+        if name not in DATASETS:
+            raise ValueError(f"未知数据集: {name}")
+        if frame.empty:
+            continue
+        filename, keys = DATASETS[name]
+        frame = frame.sort_values("date", kind="stable")
+        written[name] = [
+            (path, _write(path, part, keys), len(part)) for path, part in _targets(Path(data_dir), filename, frame)
+        ]
+    return written
@@ -0,0 +1,127 @@
+"""本地桩数据源：把本地 CSV 按 HTTP 数据源接口对外提供，用于联调与验证数据源适配器。
+
+GET /news、/macro、/prices?start=YYYY-MM-DD&end=YYYY-MM-DD 返回区间内的 JSON 记录；
+format=csv 返回 CSV，/macro 的 format=long 返回 date, series, value 长表。
+--fail-every N 让每第 N 个请求返回 503，--delay 为每个请求增加延迟，用于验证重试与并发。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from system.config_loader import DATA_DIR
+from system.feeds.store import DATASETS
+
+
+class StubState:
+    """桩服务的共享状态：已加载的数据表与请求计数（用于故障注入）。"""
+
+    def __init__(self, data_dir: Path, fail_every: int = 0, delay: float = 0.0) -> None:
+        self.frames: Dict[str, pd.DataFrame] = {
+            name: pd.read_csv(Path(data_dir) / filename, dtype={"date": str}) for name, (filename, _) in DATASETS.items()
+        }
+        self.fail_every = fail_every
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 + Content-Length，客户端可复用连接
+    protocol_version = "HTTP/1.1"
+    state: StubState
+
+    def _reply(self, status: int, body: bytes, content_type: str = "application/json; charset=utf-8") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server 约定的方法名
+        count = self.state.next_request()
+        if self.state.delay:
+            time.sleep(self.state.delay)
+        if self.state.fail_every and count % self.state.fail_every == 0:
+            self._reply(503, b'{"error": "injected failure"}')
+            return
+        parts = urlsplit(self.path)
+        name = parts.path.strip("/")
+        if name not in self.state.frames:
+            self._reply(404, json.dumps({"error": f"unknown feed: {name}"}).encode("utf-8"))
+            return
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        frame = self.state.frames[name]
+        mask = pd.Series(True, index=frame.index)
+        if "start" in query:
+            mask &= frame["date"] >= query["start"]
+        if "end" in query:
+            mask &= frame["date"] <= query["end"]
+        for column in ("product", "asset_id"):
+            if column in query and column in frame.columns:
+                mask &= frame[column] == query[column]
+        frame = frame[mask]
+        if name == "macro" and query.get("format") == "long":
+            frame = frame.melt(id_vars="date", var_name="series", value_name="value")
+        if query.get("format") == "csv":
+            self._reply(200, frame.to_csv(index=False).encode("utf-8"), "text/csv; charset=utf-8")
+            return
+        self._reply(200, frame.to_json(orient="records", force_ascii=False).encode("utf-8"))
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+def make_stub_server(
+    data_dir: Path = DATA_DIR,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    fail_every: int = 0,
+    delay: float = 0.0,
+) -> ThreadingHTTPServer:
+    # port=0 时由系统分配端口，实际地址见 server.server_address
+    handler = type("StubHandler", (_Handler,), {"state": StubState(data_dir, fail_every, delay)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="启动本地桩数据源")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="提供数据的目录")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--fail-every", type=int, default=0, help="每第 N 个请求返回 503，0 表示不注入")
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的延迟（秒）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    server = make_stub_server(Path(args.data_dir), args.host, args.port, args.fail_every, args.delay)
+    host, port = server.server_address[:2]
+    print(f"桩数据源: http://{host}:{port}/news | /macro | /prices")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""日期索引：为价格、宏观与新闻数据预建按日期分组的 O(1) 查询结构。"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from bisect import bisect_right, insort
+from datetime import date
+from typing import Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T")
+
+
+class DateIndex(ABC, Generic[T]):
+    """按日期分组的索引基类：支持精确查询与 as-of（向前填充）查询，子类实现 _accumulate。"""
+
+    def __init__(self, by_date: Dict[date, T]) -> None:
+        self._by_date = by_date
+        self._dates: List[date] = sorted(by_date)
+
+    def dates(self) -> List[date]:
+        # 索引中出现过的全部日期（升序）
+        return list(self._dates)
+
+    def resolve(self, run_date: date, asof: bool = False) -> Optional[date]:
+        # 精确模式只认当天；as-of 模式取不晚于当天的最近日期
+        if run_date in self._by_date:
+            return run_date
+        if not asof:
+            return None
+        pos = bisect_right(self._dates, run_date)
+        return self._dates[pos - 1] if pos else None
+
+    def _get(self, run_date: date, asof: bool) -> Optional[T]:
+        key = self.resolve(run_date, asof)
+        return self._by_date[key] if key is not None else None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "DateIndex[T]":
+        by_date: Dict[date, T] = {}
+        cls._accumulate(by_date, frame)
+        return cls(by_date)
+
+    @staticmethod
+    @abstractmethod
+    def _accumulate(by_date: Dict[date, T], frame: pd.DataFrame) -> None:
+        # 把数据表的行并入 by_date（日期 -> 当日条目），from_frame 与 extend 共用
+        ...
+
+    def extend(self, frame: pd.DataFrame) -> None:
+        # 原地追加新行：结果与对拼接后的整表调用 from_frame 一致，开销只与新增行数有关
+        fresh = sorted({day for day in _date_keys(frame) if day not in self._by_date})
+        self._accumulate(self._by_date, frame)
+        for day in fresh:
+            if not self._dates or day > self._dates[-1]:
+                self._dates.append(day)
+            else:
+                insort(self._dates, day)
+
+
+def _date_keys(frame: pd.DataFrame) -> Iterable[date]:
+    # 日期列只转换一次，避免每次查询都做整列 .dt.date
+    return frame["date"].dt.date.tolist()
+
+
+class PriceIndex(DateIndex[Dict[str, float]]):
+    """价格索引：日期 -> 标的 -> 收盘价。"""
+
+    @staticmethod
+    def _accumulate(by_date: Dict[date, Dict[str, float]], prices: pd.DataFrame) -> None:
+        for day, asset_id, close in zip(_date_keys(prices), prices["asset_id"].tolist(), prices["close"].tolist()):
+            # 同一日期同一标的有重复行时保留第一条，与原先 iloc[0] 一致
+            by_date.setdefault(day, {}).setdefault(asset_id, float(close))
+
+    def day(self, run_date: date, asof: bool = False) -> Dict[str, float]:
+        # 返回当天全部标的价格，缺失日期返回空字典
+        return self._get(run_date, asof) or {}
+
+    def close(self, run_date: date, asset_id: str, asof: bool = False) -> Optional[float]:
+        if not asof:
+            return self.day(run_date).get(asset_id)
+        # as-of 模式按标的向前回溯，直到找到该标的的最近价格
+        pos = bisect_right(self._dates, run_date)
+        while pos:
+            pos -= 1
+            price = self._by_date[self._dates[pos]].get(asset_id)
+            if price is not None:
+                return price
+        return None
+
+
+class MacroIndex(DateIndex[Dict[str, float]]):
+    """宏观索引：日期 -> 指标名 -> 数值。"""
+
+    @staticmethod
+    def _accumulate(by_date: Dict[date, Dict[str, float]], macro: pd.DataFrame) -> None:
+        records = macro.drop(columns=["date"]).to_dict("records")
+        for day, record in zip(_date_keys(macro), records):
+            by_date.setdefault(day, record)
+
+    def row(self, run_date: date, asof: bool = False) -> Optional[Dict[str, float]]:
+        # 缺失日期返回 None，由调用方决定默认值
+        return self._get(run_date, asof)
+
+
+class NewsIndex(DateIndex[Dict[Tuple[str, str], float]]):
+    """新闻索引：日期 -> (产品, 主题) -> 新闻数量。"""
+
+    @staticmethod
+    def _accumulate(by_date: Dict[date, Dict[Tuple[str, str], float]], news: pd.DataFrame) -> None:
+        columns = zip(
+            _date_keys(news),
+            news["product"].tolist(),
+            news["theme"].tolist(),
+            news["news_count"].tolist(),
+        )
+        for day, product, theme, count in columns:
+            by_date.setdefault(day, {}).setdefault((product, theme), float(count))
+
+    def count(self, run_date: date, product: str, theme: str, asof: bool = False) -> Optional[float]:
+        # 无记录返回 None，区分“没有新闻”与“新闻数为 0”
+        day = self._get(run_date, asof)
+        if day is None:
+            return None
+        return day.get((product, theme))
+
+    def items(self, run_date: date, product: str) -> List[Tuple[str, float]]:
+        # 当天某产品的全部 (主题, 新闻数量)，按主题排序，用作内容哈希
+        day = self._get(run_date, False) or {}
+        return sorted((theme, count) for (name, theme), count in day.items() if name == product)
@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Dict, List, Optional
+from typing import List, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
 
 class DemandEvent(BaseModel):
@@ -127,6 +127,28 @@ class EquityPoint(BaseModel):
     positions_value: float
 
 
+class CostScenario(BaseModel):
+    """成本情景：仅影响成交与资金分配的参数组合。"""
+
+    name: str
+    fee: float
+    slippage: float
+    initial_cash: float
+    max_positions: int
+
+
+class RebalanceSchedule(BaseModel):
+    """调仓计划：决定哪些交易日运行流程并交易，其余交易日只盯市。"""
+
+    # daily 每个交易日；weekly 每周 weekday（0=周一）起的首个交易日；monthly 每月 day 日起的首个交易日；
+    # every 每 every 个交易日；event 宏观或新闻数据相对上一交易日变化时
+    kind: Literal["daily", "weekly", "monthly", "every", "event"] = "daily"
+    weekday: int = 0
+    day: int = 1
+    every: int = 1
+    sources: List[str] = ["macro", "news"]
+
+
 class BacktestSummary(BaseModel):
     """回测汇总指标。"""
 
@@ -153,37 +175,10 @@ class BacktestSummary(BaseModel):
     avg_daily_return: float = 0.0
 
 
-class PipelineState(BaseModel):
-    """流程状态：贯穿整条策略流水线的共享上下文。"""
+def __getattr__(name: str) -> object:
+    # PipelineState 已移至 system.pipeline.state（该模块依赖本模块，故按需导入），此处保留原导入路径
+    if name == "PipelineState":
+        from system.pipeline.state import PipelineState
 
-    product: str
-    date: date
-    thresholds: Dict[str, float]
-    events: List[DemandEvent] = Field(default_factory=list)
-    quality: List[DemandQuality] = Field(default_factory=list)
-    constraints: List[ConstraintSnapshot] = Field(default_factory=list)
-    scores: List[OpportunityScore] = Field(default_factory=list)
-    ranks: List[ThemeRank] = Field(default_factory=list)
-    stages: List[StageResult] = Field(default_factory=list)
-    intents: List[DecisionIntent] = Field(default_factory=list)
-    decisions: List[DecisionResult] = Field(default_factory=list)
-    overrides: Dict[str, Dict[str, str]] = Field(default_factory=dict)
-
-    def theme_map(self) -> Dict[str, Dict[str, Optional[BaseModel]]]:
-        # 将流程中分散的结果按主题聚合，便于调试或报表展示
-        mapping: Dict[str, Dict[str, Optional[BaseModel]]] = {}
-        for item in self.events:
-            mapping.setdefault(item.theme, {})["event"] = item
-        for item in self.quality:
-            mapping.setdefault(item.theme, {})["quality"] = item
-        for item in self.constraints:
-            mapping.setdefault(item.theme, {})["constraint"] = item
-        for item in self.scores:
-            mapping.setdefault(item.theme, {})["score"] = item
-        for item in self.ranks:
-            mapping.setdefault(item.theme, {})["rank"] = item
-        for item in self.stages:
-            mapping.setdefault(item.theme, {})["stage"] = item
-        for item in self.intents:
-            mapping.setdefault(item.theme, {})["intent"] = item
-        return mapping
+        return PipelineState
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,201 @@
+"""批量流程：在 (日期 × 主题) 面板上一次性计算 13 个步骤的决策。
+
+逐日 run_pipeline 与本模块的列式实现逻辑一一对应，结果完全一致；
+回测等需要覆盖整段日期的场景优先使用本模块。
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from system.data_context import DataContext, get_context
+from system.models import DecisionResult
+
+# 决策表字段顺序与 DecisionResult 保持一致
+DECISION_COLUMNS = [
+    "date",
+    "product",
+    "theme",
+    "intent",
+    "reason",
+    "stage",
+    "score",
+    "constraint_id",
+    "break_risk",
+]
+
+# 意图编码：面板内用整数表示，输出时再映射回字符串
+HOLD, ENTER, REDUCE, EXIT = 0, 1, 2, 3
+INTENT_NAMES = np.array(["HOLD", "ENTER", "REDUCE", "EXIT"], dtype=object)
+
+
+def _day_index(dates: Sequence[date]) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.to_datetime(list(dates)))
+
+
+def _news_panel(news: pd.DataFrame, product: str, themes: List[str], days: pd.DatetimeIndex) -> np.ndarray:
+    # s01：按 (日期, 主题) 取第一条新闻记录，缺失记为 0
+    subset = news[(news["product"] == product) & news["theme"].isin(themes)]
+    subset = subset.assign(day=subset["date"].dt.normalize())
+    subset = subset.drop_duplicates(subset=["day", "theme"], keep="first")
+    panel = subset.pivot(index="day", columns="theme", values="news_count").reindex(index=days, columns=themes)
+    return panel.to_numpy(dtype=float, na_value=0.0)
+
+
+def _macro_columns(macro: pd.DataFrame, days: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+    # s08/s13：当天无宏观记录时使用与逐日步骤相同的默认值
+    daily = macro.assign(day=macro["date"].dt.normalize()).drop_duplicates(subset=["day"], keep="first")
+    daily = daily.set_index("day")
+    present = days.isin(daily.index)
+    aligned = daily.reindex(days)
+    defaults = {"REAL_YIELD": 1.0, "INFLATION": 2.0, "GEO_RISK_INDEX": 0.0}
+    return {
+        column: np.where(present, aligned[column].to_numpy(dtype=float), default)
+        for column, default in defaults.items()
+    }
+
+
+def run_pipeline_batch(
+    product: str,
+    start: date | None = None,
+    end: date | None = None,
+    overrides: Dict[str, Dict[str, str]] | None = None,
+    context: DataContext | None = None,
+    dates: Sequence[date] | None = None,
+    thresholds: Dict[str, float] | None = None,
+) -> pd.DataFrame:
+    # 日期可由 start/end 按交易日历生成，也可直接传入任意日期列表
+    context = context or get_context()
+    overrides = overrides or {}
+    if dates is None:
+        dates = context.calendar().sessions(start, end)
+    dates = list(dates)
+    if thresholds is None:
+        thresholds = context.thresholds().get("thresholds", {})
+
+    # s01/s03：主题列表与约束映射与日期无关，只计算一次
+    themes = context.products().get("products", {}).get(product, [])
+    theme_cfg = context.themes().get("themes", {})
+    constraint_cfg = context.constraints().get("constraints", {})
+    constraint_ids = [theme_cfg.get(theme, {}).get("constraint_id", "") for theme in themes]
+    health = np.array(
+        [float(constraint_cfg.get(cid, {}).get("health_score", 0.5)) for cid in constraint_ids], dtype=float
+    )
+    break_risk = np.array(
+        [float(constraint_cfg.get(cid, {}).get("break_risk", 0.5)) for cid in constraint_ids], dtype=float
+    )
+
+    # s04：风险门控只依赖静态配置，直接裁剪主题列
+    min_health = float(thresholds.get("constraint_min_health", 0.4))
+    keep = health >= min_health
+    kept_themes = [theme for theme, flag in zip(themes, keep) if flag]
+    kept_cids = [cid for cid, flag in zip(constraint_ids, keep) if flag]
+    health = health[keep]
+    break_risk = break_risk[keep]
+    n_days, n_themes = len(dates), len(kept_themes)
+    if n_days == 0 or n_themes == 0:
+        return pd.DataFrame(columns=DECISION_COLUMNS)
+
+    days = _day_index(dates)
+    # s01/s02：新闻数量缩放为信号强度，质量分即信号强度
+    counts = _news_panel(context.news(), product, kept_themes, days)
+    scaled = counts / 10.0
+    quality = np.where(scaled < 1.0, scaled, 1.0)
+
+    # s05/s06：加权评分后扣减破坏风险惩罚，下限为 0
+    demand_weight = float(thresholds.get("demand_weight", 0.6))
+    constraint_weight = float(thresholds.get("constraint_weight", 0.4))
+    penalty = float(thresholds.get("break_risk_penalty", 0.3))
+    raw = quality * demand_weight + health * constraint_weight
+    raw = raw - break_risk * penalty
+    score = np.where(raw > 0.0, raw, 0.0)
+
+    # s07：每行按分数降序稳定排序，排名从 1 开始
+    order = np.argsort(-score, axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(1, n_themes + 1)[None, :], axis=1)
+
+    # s08：宏观条件决定当日基础阶段，再叠加人工覆盖
+    macro = _macro_columns(context.macro(), days)
+    base_stage = np.select(
+        [macro["REAL_YIELD"] > 1.5, macro["INFLATION"] > 3.0],
+        ["late", "mid"],
+        default="early",
+    ).astype(object)
+    stage = np.repeat(base_stage[:, None], n_themes, axis=1)
+    overridden = np.zeros((n_days, n_themes), dtype=bool)
+    theme_pos = {theme: idx for idx, theme in enumerate(kept_themes)}
+    for row, run_date in enumerate(dates):
+        for theme, value in overrides.get(run_date.isoformat(), {}).items():
+            col = theme_pos.get(theme)
+            if col is not None:
+                stage[row, col] = value
+                overridden[row, col] = True
+    late = stage == "late"
+
+    # s09：排名、分数与阶段同时满足才入场
+    top_n = int(thresholds.get("top_theme_n", 3))
+    min_score = float(thresholds.get("min_score", 0.4))
+    entered = (rank <= top_n) & (score >= min_score) & ~late
+    intent = np.where(entered, ENTER, HOLD)
+    reason = np.where(entered, "主题排名靠前", "排名或阶段不满足").astype(object)
+
+    # s10：入场但破坏风险超限时改为减仓
+    stop = entered & (break_risk >= float(thresholds.get("break_risk_stop", 0.7)))[None, :]
+    intent[stop] = REDUCE
+    reason[stop] = "破坏风险过高"
+
+    # s11：晚期阶段的入场/观望意图改为退出
+    take = late & np.isin(intent, (ENTER, HOLD))
+    intent[take] = EXIT
+    reason[take] = "阶段偏晚止盈"
+
+    # s12：同一约束下入场数量超限时，相关入场改为减仓
+    max_exposure = int(thresholds.get("max_constraint_exposure", 2))
+    cid_codes, cid_index = np.unique(np.array(kept_cids, dtype=object), return_inverse=True)
+    active = intent == ENTER
+    exposure = np.zeros((n_days, len(cid_codes)), dtype=int)
+    for code in range(len(cid_codes)):
+        exposure[:, code] = active[:, cid_index == code].sum(axis=1)
+    crowded = active & (exposure[:, cid_index] > max_exposure)
+    intent[crowded] = REDUCE
+    reason[crowded] = "组合约束暴露超限"
+
+    # s13：覆盖提示与 Kill Switch
+    reason[overridden] = reason[overridden] + "; stage_override"
+    killed = macro["GEO_RISK_INDEX"] >= float(thresholds.get("killswitch_level", 0.85))
+    intent[killed, :] = EXIT
+    reason[killed, :] = "地缘风险触发Kill Switch"
+
+    # 按每日排名顺序展开为长表，行顺序与逐日输出一致
+    def ranked(panel: np.ndarray) -> np.ndarray:
+        return np.take_along_axis(panel, order, axis=1).ravel()
+
+    theme_panel = np.broadcast_to(np.array(kept_themes, dtype=object), (n_days, n_themes))
+    cid_panel = np.broadcast_to(np.array(kept_cids, dtype=object), (n_days, n_themes))
+    risk_panel = np.broadcast_to(break_risk, (n_days, n_themes))
+    date_values = np.empty(n_days, dtype=object)
+    date_values[:] = dates
+    return pd.DataFrame(
+        {
+            "date": np.repeat(date_values, n_themes),
+            "product": product,
+            "theme": ranked(theme_panel),
+            "intent": INTENT_NAMES[ranked(intent)],
+            "reason": ranked(reason),
+            "stage": ranked(stage),
+            "score": ranked(score),
+            "constraint_id": ranked(cid_panel),
+            "break_risk": ranked(risk_panel),
+        },
+        columns=DECISION_COLUMNS,
+    )
+
+
+def decisions_from_frame(frame: pd.DataFrame) -> List[DecisionResult]:
+    # 将批量决策表转换为 API 层使用的 Pydantic 模型
+    return [DecisionResult(**record) for record in frame.to_dict("records")]
@@ -0,0 +1,130 @@
+"""决策磁盘缓存：按内容寻址保存每日流程决策，跨进程、跨运行复用。
+
+缓存键为 (产品, 日期, 配置哈希, 当日新闻/宏观内容, 当日阶段覆盖) 的 SHA1；
+配置哈希覆盖 products/themes/constraints 配置文件与流程实际使用的阈值。
+任一输入变化都会得到新键，旧条目不再命中，最终按总大小做 LRU 淘汰。
+修改步骤逻辑导致同样输入产出不同决策时，需要递增 FORMAT_VERSION。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import date
+from typing import Any, Callable, Dict, List, Sequence
+
+import pandas as pd
+
+from system.data_context import DataContext, get_context
+from system.models import DecisionResult
+from system.pipeline.batch import DECISION_COLUMNS
+# 存储层单独成模块以便轻量命令直接使用，这里一并导出
+from system.pipeline.decision_store import DECISION_CACHE_DIR, DEFAULT_MAX_BYTES, DecisionCache  # noqa: F401
+from system.pipeline.runner import STEPS, run_pipeline
+
+# 决策逻辑或存储格式变化时递增，使旧条目全部失效
+FORMAT_VERSION = 1
+# 流程实际读取的阈值：回测资金、滑点等参数变化不影响决策，不参与缓存键
+PIPELINE_PARAMS = sorted({param for spec in STEPS for param in spec.params})
+
+
+def config_digest(context: DataContext, thresholds: Dict[str, Any]) -> str:
+    # 配置文件内容哈希 + 流程实际使用的阈值
+    payload = [
+        FORMAT_VERSION,
+        context.source_digest("products"),
+        context.source_digest("themes"),
+        context.source_digest("constraints"),
+        [[param, thresholds.get(param)] for param in PIPELINE_PARAMS],
+    ]
+    return hashlib.sha1(json.dumps(payload, default=str).encode("utf-8")).hexdigest()
+
+
+def decision_keys(
+    product: str,
+    dates: Sequence[date],
+    overrides: Dict[str, Dict[str, str]],
+    context: DataContext,
+    thresholds: Dict[str, Any],
+) -> List[str]:
+    # 每个日期一个键：配置哈希只算一次，当日数据取自日期索引
+    base = config_digest(context, thresholds)
+    news_index = context.news_index()
+    macro_index = context.macro_index()
+    keys = []
+    for run_date in dates:
+        day_iso = run_date.isoformat()
+        macro = macro_index.row(run_date)
+        payload = [
+            base,
+            product,
+            day_iso,
+            news_index.items(run_date, product),
+            sorted(macro.items()) if macro is not None else None,
+            sorted(overrides.get(day_iso, {}).items()),
+        ]
+        keys.append(hashlib.sha1(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest())
+    return keys
+
+
+def _records(items: List[DecisionResult]) -> List[Dict[str, Any]]:
+    return [item.dict() for item in items]
+
+
+def run_pipeline_cached(
+    product: str,
+    run_date: date,
+    overrides: Dict[str, Dict[str, str]] | None = None,
+    context: DataContext | None = None,
+    thresholds: Dict[str, float] | None = None,
+    cache: DecisionCache | None = None,
+) -> List[DecisionResult]:
+    # 单日流程：命中磁盘缓存直接反序列化，否则运行流程并写入缓存
+    context = context or get_context()
+    overrides = overrides or {}
+    cache = cache or DecisionCache()
+    if thresholds is None:
+        thresholds = context.thresholds().get("thresholds", {})
+    key = decision_keys(product, [run_date], overrides, context, thresholds)[0]
+    records = cache.get(key)
+    if records is not None:
+        return [DecisionResult(**item) for item in records]
+    results = run_pipeline(product, run_date, overrides=overrides, context=context, thresholds=thresholds)
+    cache.put(key, _records(results))
+    return results
+
+
+def cached_decision_frame(
+    product: str,
+    dates: Sequence[date],
+    overrides: Dict[str, Dict[str, str]],
+    context: DataContext,
+    thresholds: Dict[str, Any] | None,
+    cache: DecisionCache,
+    compute: Callable[[List[date]], pd.DataFrame],
+) -> pd.DataFrame:
+    # 多日决策表：命中的日期读缓存，未命中的日期交给 compute 一次算完后逐日写回
+    if thresholds is None:
+        thresholds = context.thresholds().get("thresholds", {})
+    keys = decision_keys(product, dates, overrides, context, thresholds)
+    by_date: Dict[date, List[Dict[str, Any]]] = {}
+    missing: List[date] = []
+    for run_date, key in zip(dates, keys):
+        records = cache.get(key)
+        if records is None:
+            missing.append(run_date)
+            continue
+        for item in records:
+            item["date"] = run_date
+        by_date[run_date] = records
+    if missing:
+        computed = compute(missing)
+        fresh: Dict[date, List[Dict[str, Any]]] = {run_date: [] for run_date in missing}
+        for item in computed.to_dict("records"):
+            fresh[item["date"]].append(item)
+        for run_date, key in zip(dates, keys):
+            if run_date in fresh:
+                cache.put(key, fresh[run_date])
+        by_date.update(fresh)
+    rows = [item for run_date in dates for item in by_date.get(run_date, [])]
+    return pd.DataFrame(rows, columns=DECISION_COLUMNS)
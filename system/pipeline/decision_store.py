@@ -0,0 +1,122 @@
+"""决策缓存存储层：按键读写 JSON 文件，文件修改时间即最近使用时间，按总大小做 LRU 淘汰。
+
+只依赖标准库，`cache stats/clear` 等命令无需加载数据与流程模块；
+缓存键的计算与流程对接见 system.pipeline.decision_cache。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+DECISION_CACHE_DIR = ROOT / "decision_cache"
+# 默认容量上限 256MB，超出后按最近使用时间淘汰到上限的 90%
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class DecisionCache:
+    """磁盘决策缓存：每个键一个 JSON 文件，文件修改时间即最近使用时间。
+
+    写入先落临时文件再原子替换，多进程并发读写同一目录是安全的；
+    容量统计按进程各自维护，只是近似值，淘汰时以磁盘扫描结果为准。
+    """
+
+    def __init__(self, root: Path = DECISION_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _files(self) -> List[Path]:
+        if not self.root.is_dir():
+            return []
+        return list(self.root.glob("*/*.json"))
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                records = json.load(handle)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            # 刷新修改时间，标记为最近使用
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return records
+
+    def put(self, key: str, records: List[Dict[str, Any]]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(records, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        if self._size is None:
+            self._size = sum(item.stat().st_size for item in self._files())
+        else:
+            self._size += len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        # 按修改时间从旧到新删除，直到总大小降到上限的 90%，返回删除条目数
+        entries = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort(key=lambda item: item[0])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        files = self._files()
+        return {
+            "entries": len(files),
+            "bytes": sum(path.stat().st_size for path in files),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> int:
+        # 删除全部条目，返回删除数量
+        files = self._files()
+        for path in files:
+            path.unlink(missing_ok=True)
+        self._size = 0
+        return len(files)
@@ -1,12 +1,27 @@
-"""流程运行器：按顺序执行策略步骤并返回决策。"""
+"""流程运行器：按声明的步骤依赖图执行策略步骤，并按输入缓存步骤输出。
+
+每个步骤在 STEPS 中声明读取的状态字段/外部输入、使用的阈值参数与写出的字段。
+调度器用 (步骤名, 各输入的令牌, 参数值) 作为缓存键：只依赖静态配置的步骤
+（主题列表、约束匹配、风险门控）每个进程只计算一次，依赖当日数据的步骤
+按日期与数据内容缓存，参数扫描与重复运行可直接复用。
+
+步骤约定为纯函数：只读取声明的输入、只写声明的输出，且不原地修改输入列表，
+因此缓存中的结果可以在多次运行间安全共享。
+"""
 
 from __future__ import annotations
 
+import itertools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import date
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from system.config_loader import load_thresholds
-from system.models import DecisionResult, PipelineState
+from system.data_context import DataContext, get_context
+from system.models import DecisionResult
+from system.pipeline.state import PipelineState
+from system.profiling import active_profiler
 from system.steps import (
     s01_demand_scan,
     s02_demand_quality,
@@ -23,24 +38,295 @@ from system.steps import (
     s13_killswitch,
 )
 
+# 外部输入：product/date 取自状态；config:X 为配置文件内容哈希；
+# X@date 为数据集内容哈希加日期；overrides@date 为当天的阶段覆盖
+EXTERNAL_INPUTS = {
+    "product",
+    "date",
+    "config:products",
+    "config:themes",
+    "config:constraints",
+    "news@date",
+    "macro@date",
+    "overrides@date",
+}
+
+
+@dataclass(frozen=True)
+class StepSpec:
+    """步骤声明：输入（状态字段或外部输入）、阈值参数与输出字段。"""
+
+    name: str
+    apply: Callable[..., None]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    params: Tuple[str, ...] = ()
+    uses_context: bool = False
+    # 输出按内容登记令牌：内容相同则下游键相同，例如新闻相同的两天共享下游结果
+    content_key: bool = False
+
+
+# 步骤注册表：声明顺序即执行顺序，同名字段以最近一次写出为准
+STEPS: List[StepSpec] = [
+    StepSpec(
+        "s01_themes",
+        s01_demand_scan.resolve_themes,
+        inputs=("product", "config:products"),
+        outputs=("themes",),
+        uses_context=True,
+    ),
+    StepSpec(
+        "s01_demand_scan",
+        s01_demand_scan.apply,
+        inputs=("themes", "product", "news@date"),
+        outputs=("signal", "event_reason"),
+        uses_context=True,
+        content_key=True,
+    ),
+    StepSpec(
+        "s02_demand_quality",
+        s02_demand_quality.apply,
+        inputs=("signal",),
+        outputs=("quality", "passed", "quality_reason"),
+        params=("demand_signal_min",),
+    ),
+    StepSpec(
+        "s03_match_constraints",
+        s03_match_constraints.apply,
+        inputs=("themes", "config:themes", "config:constraints"),
+        outputs=("constraint_id", "health", "break_risk", "constraint_reason", "active"),
+        uses_context=True,
+    ),
+    StepSpec(
+        "s04_risk_gate",
+        s04_risk_gate.apply,
+        inputs=("active", "health"),
+        outputs=("active",),
+        params=("constraint_min_health",),
+    ),
+    StepSpec(
+        "s05_scoring",
+        s05_scoring.apply,
+        inputs=("themes", "active", "quality", "health"),
+        outputs=("score", "score_reason"),
+        params=("demand_weight", "constraint_weight"),
+    ),
+    StepSpec(
+        "s06_break_risk",
+        s06_break_risk.apply,
+        inputs=("active", "score", "break_risk"),
+        outputs=("score", "score_reason"),
+        params=("break_risk_penalty",),
+    ),
+    StepSpec("s07_theme_rank", s07_theme_rank.apply, inputs=("active", "score"), outputs=("ranked",)),
+    StepSpec(
+        "s08_stage_detect",
+        s08_stage_detect.apply,
+        inputs=("themes", "ranked", "date", "macro@date", "overrides@date"),
+        outputs=("stage", "stage_reason"),
+        uses_context=True,
+        content_key=True,
+    ),
+    StepSpec(
+        "s09_entry",
+        s09_entry.apply,
+        inputs=("themes", "ranked", "score", "stage"),
+        outputs=("intent", "intent_reason"),
+        params=("top_theme_n", "min_score"),
+    ),
+    StepSpec(
+        "s10_stoploss",
+        s10_stoploss.apply,
+        inputs=("ranked", "intent", "intent_reason", "break_risk"),
+        outputs=("intent", "intent_reason"),
+        params=("break_risk_stop",),
+    ),
+    StepSpec(
+        "s11_takeprofit",
+        s11_takeprofit.apply,
+        inputs=("ranked", "stage", "intent", "intent_reason"),
+        outputs=("intent", "intent_reason"),
+    ),
+    StepSpec(
+        "s12_portfolio",
+        s12_portfolio.apply,
+        inputs=("ranked", "intent", "intent_reason", "constraint_id"),
+        outputs=("intent", "intent_reason"),
+        params=("max_constraint_exposure",),
+    ),
+    StepSpec(
+        "s13_killswitch",
+        s13_killswitch.apply,
+        inputs=(
+            "product",
+            "date",
+            "macro@date",
+            "themes",
+            "ranked",
+            "intent",
+            "intent_reason",
+            "stage",
+            "stage_reason",
+            "score",
+            "constraint_id",
+            "break_risk",
+        ),
+        outputs=("decisions",),
+        params=("killswitch_level",),
+        uses_context=True,
+    ),
+]
+
+
+def step_graph(steps: List[StepSpec] = STEPS) -> Dict[str, List[str]]:
+    # 由声明推出依赖图：步骤 -> 上游步骤列表；输入字段没有上游写出者时报错
+    producers: Dict[str, str] = {}
+    graph: Dict[str, List[str]] = {}
+    for spec in steps:
+        upstream: List[str] = []
+        for name in spec.inputs:
+            if name in EXTERNAL_INPUTS:
+                continue
+            if name not in producers:
+                raise ValueError(f"步骤 {spec.name} 的输入 {name} 没有上游步骤写出")
+            if producers[name] not in upstream:
+                upstream.append(producers[name])
+        graph[spec.name] = upstream
+        for name in spec.outputs:
+            producers[name] = spec.name
+    return graph
+
+
+# 导入时校验注册表，声明错误尽早暴露
+step_graph()
+
+
+class StepCache:
+    """步骤输出缓存：键为 (步骤名, 输入令牌..., 参数值...)，按条目数做 LRU 淘汰。
+
+    每条结果分配一个整数令牌作为下游步骤的输入令牌，键始终是扁平元组，哈希开销与主题数无关。
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[int, Tuple[Any, ...]]]" = OrderedDict()
+        # 内容令牌：输出内容 -> 令牌，相同内容复用同一令牌
+        self._content: "OrderedDict[Tuple[Any, ...], int]" = OrderedDict()
+        # 令牌单调递增、从不复用，淘汰后的旧令牌不会与新结果混淆
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Tuple[Any, ...]) -> Optional[Tuple[int, Tuple[Any, ...]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, key: Tuple[Any, ...], outputs: Tuple[Any, ...], content: bool = False) -> int:
+        frozen = tuple(tuple(value) if isinstance(value, list) else value for value in outputs) if content else None
+        with self._lock:
+            if frozen is None:
+                token = next(self._ids)
+            else:
+                token = self._content.get(frozen)
+                if token is None:
+                    token = self._content[frozen] = next(self._ids)
+                    if len(self._content) > self.max_entries:
+                        self._content.popitem(last=False)
+                else:
+                    self._content.move_to_end(frozen)
+            self._entries[key] = (token, outputs)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return token
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._content.clear()
+            self.hits = self.misses = 0
+
+
+# 进程级默认缓存：参数扫描的工作进程、守护进程内的多次运行共享
+STEP_CACHE = StepCache()
+
+
+def _external_token(name: str, state: PipelineState, context: DataContext) -> Any:
+    if name == "product":
+        return state.product
+    if name == "date":
+        return state.date
+    if name == "overrides@date":
+        return tuple(sorted(state.overrides.get(state.date.isoformat(), {}).items()))
+    if name.startswith("config:"):
+        return context.source_digest(name.split(":", 1)[1])
+    # 当日数据：数据集内容哈希 + 日期
+    return context.source_digest(name.split("@", 1)[0]), state.date
+
+
+def _run_steps(state: PipelineState, context: DataContext, cache: Optional[StepCache]) -> None:
+    profiler = active_profiler()
+    # 字段/外部输入 -> 令牌
+    tokens: Dict[str, Any] = {}
+    for spec in STEPS:
+        started = profiler.start() if profiler is not None else None
+        entry = None
+        key: Tuple[Any, ...] = ()
+        if cache is not None:
+            for name in spec.inputs:
+                if name not in tokens:
+                    tokens[name] = _external_token(name, state, context)
+            key = (
+                spec.name,
+                *(tokens[name] for name in spec.inputs),
+                *(state.thresholds.get(param) for param in spec.params),
+            )
+            entry = cache.lookup(key)
+        if entry is None:
+            if spec.uses_context:
+                spec.apply(state, context)
+            else:
+                spec.apply(state)
+            if cache is not None:
+                token = cache.store(key, tuple(getattr(state, name) for name in spec.outputs), spec.content_key)
+        else:
+            token, values = entry
+            for name, value in zip(spec.outputs, values):
+                setattr(state, name, value)
+        if cache is not None:
+            for name in spec.outputs:
+                tokens[name] = token
+        if profiler is not None:
+            profiler.record(spec.name, "step", started, cached=entry is not None)
+
 
-def run_pipeline(product: str, run_date: date, overrides: Dict[str, Dict[str, str]] | None = None) -> List[DecisionResult]:
-    # 加载全局阈值配置并初始化流程状态
-    thresholds = load_thresholds().get("thresholds", {})
+def run_pipeline(
+    product: str,
+    run_date: date,
+    overrides: Dict[str, Dict[str, str]] | None = None,
+    context: DataContext | None = None,
+    thresholds: Dict[str, float] | None = None,
+    memoize: bool = True,
+) -> List[DecisionResult]:
+    # 配置与数据统一从上下文读取，多次调用共享同一份缓存
+    context = context or get_context()
+    # 加载全局阈值配置并初始化流程状态（调用方可传入调参后的阈值）
+    if thresholds is None:
+        thresholds = context.thresholds().get("thresholds", {})
     state = PipelineState(product=product, date=run_date, thresholds=thresholds, overrides=overrides or {})
-    # 依次执行每个步骤，构成完整决策流水线
-    s01_demand_scan.apply(state)
-    s02_demand_quality.apply(state)
-    s03_match_constraints.apply(state)
-    s04_risk_gate.apply(state)
-    s05_scoring.apply(state)
-    s06_break_risk.apply(state)
-    s07_theme_rank.apply(state)
-    s08_stage_detect.apply(state)
-    s09_entry.apply(state)
-    s10_stoploss.apply(state)
-    s11_takeprofit.apply(state)
-    s12_portfolio.apply(state)
-    s13_killswitch.apply(state)
-    # 返回最终决策列表
-    return state.decisions
+    # 依次执行每个步骤，构成完整决策流水线；memoize=False 时不读写步骤缓存
+    _run_steps(state, context, STEP_CACHE if memoize else None)
+    # 返回最终决策列表；启用步骤缓存时决策对象与缓存共享，返回副本，调用方修改不影响后续调用
+    if memoize:
+        return [decision.model_copy() for decision in state.decisions]
+    return list(state.decisions)
@@ -0,0 +1,130 @@
+"""流程状态：按主题下标存放各步骤结果的结构数组（struct-of-arrays）。
+
+主题在 s01 中编号为 0..n-1，之后各步骤只传递整数下标并读写对应的列表，
+不再为每个主题构造 Pydantic 对象、也不再反复建立 {主题: 对象} 映射。
+Pydantic 模型只在输出边界（DecisionResult）与调试视图 theme_map() 中构造。
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from system.models import (
+    ConstraintSnapshot,
+    DecisionIntent,
+    DecisionResult,
+    DemandEvent,
+    DemandQuality,
+    OpportunityScore,
+    StageResult,
+    ThemeRank,
+)
+
+
+class PipelineState:
+    """流程状态：贯穿整条策略流水线的共享上下文。"""
+
+    __slots__ = (
+        "product",
+        "date",
+        "thresholds",
+        "overrides",
+        "themes",
+        "signal",
+        "event_reason",
+        "quality",
+        "passed",
+        "quality_reason",
+        "constraint_id",
+        "health",
+        "break_risk",
+        "constraint_reason",
+        "active",
+        "score",
+        "score_reason",
+        "ranked",
+        "stage",
+        "stage_reason",
+        "intent",
+        "intent_reason",
+        "decisions",
+    )
+
+    def __init__(
+        self,
+        product: str,
+        date: date,
+        thresholds: Dict[str, float],
+        overrides: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> None:
+        self.product = product
+        self.date = date
+        self.thresholds = thresholds
+        self.overrides = overrides or {}
+        # s01：主题名称，列表下标即主题编号
+        self.themes: List[str] = []
+        # s01/s02：需求信号与质量
+        self.signal: List[float] = []
+        self.event_reason: List[str] = []
+        self.quality: List[float] = []
+        self.passed: List[bool] = []
+        self.quality_reason: List[str] = []
+        # s03/s04：约束快照；active 为通过风险门控的主题下标（保持原顺序）
+        self.constraint_id: List[str] = []
+        self.health: List[float] = []
+        self.break_risk: List[float] = []
+        self.constraint_reason: List[str] = []
+        self.active: List[int] = []
+        # s05/s06：机会分（仅 active 中的下标有效）
+        self.score: List[float] = []
+        self.score_reason: List[str] = []
+        # s07：按机会分降序排列的主题下标，位置 + 1 即排名
+        self.ranked: List[int] = []
+        # s08~s12：阶段与交易意图（仅 ranked 中的下标有效）
+        self.stage: List[str] = []
+        self.stage_reason: List[str] = []
+        self.intent: List[str] = []
+        self.intent_reason: List[str] = []
+        # s13：最终决策，按 ranked 顺序输出
+        self.decisions: List[DecisionResult] = []
+
+    def theme_map(self) -> Dict[str, Dict[str, Optional[BaseModel]]]:
+        # 将流程中分散的结果按主题聚合为 Pydantic 对象，便于调试或报表展示
+        mapping: Dict[str, Dict[str, Optional[BaseModel]]] = {}
+        for idx, theme in enumerate(self.themes):
+            entry = mapping.setdefault(theme, {})
+            entry["event"] = DemandEvent(theme=theme, signal_strength=self.signal[idx], reason=self.event_reason[idx])
+            if idx < len(self.quality):
+                entry["quality"] = DemandQuality(
+                    theme=theme,
+                    quality_score=self.quality[idx],
+                    passed=self.passed[idx],
+                    reason=self.quality_reason[idx],
+                )
+        for idx in self.active:
+            entry = mapping[self.themes[idx]]
+            entry["constraint"] = ConstraintSnapshot(
+                theme=self.themes[idx],
+                constraint_id=self.constraint_id[idx],
+                health_score=self.health[idx],
+                break_risk=self.break_risk[idx],
+                reason=self.constraint_reason[idx],
+            )
+            if self.score:
+                entry["score"] = OpportunityScore(
+                    theme=self.themes[idx], score=self.score[idx], reason=self.score_reason[idx]
+                )
+        for position, idx in enumerate(self.ranked, start=1):
+            theme = self.themes[idx]
+            entry = mapping[theme]
+            entry["rank"] = ThemeRank(theme=theme, rank=position, score=self.score[idx])
+            if self.stage:
+                entry["stage"] = StageResult(theme=theme, stage=self.stage[idx], reason=self.stage_reason[idx])
+            if self.intent:
+                entry["intent"] = DecisionIntent(
+                    theme=theme, intent=self.intent[idx], reason=self.intent_reason[idx], score=self.score[idx]
+                )
+        return mapping
@@ -0,0 +1,58 @@
+"""跟随模式：轮询行情文件的追加行，只为受影响的日期运行决策流程。
+
+每轮只解析新增的行并原地更新日期索引，从数据到达到产出决策的耗时与增量大小相关，
+与历史数据量无关。数据文件被整体改写（或首次读取）时，只为其中最新的日期运行。
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from system.data_context import DataContext, get_context
+from system.models import DecisionResult
+from system.pipeline.decision_cache import DecisionCache, run_pipeline_cached
+from system.pipeline.runner import run_pipeline
+from system.tail import TailFollower
+
+
+def affected_dates(changes: Dict[str, Tuple[pd.DataFrame, bool]]) -> List[date]:
+    # 追加的行影响其中出现的每个日期；整体重新读取时只取最新日期
+    dates = set()
+    for frame, reloaded in changes.values():
+        if frame.empty:
+            continue
+        days = frame["date"].dt.date
+        if reloaded:
+            dates.add(days.max())
+        else:
+            dates.update(days.unique().tolist())
+    return sorted(dates)
+
+
+def watch(
+    products: Sequence[str],
+    context: Optional[DataContext] = None,
+    interval: float = 1.0,
+    cache: Optional[DecisionCache] = None,
+    max_polls: Optional[int] = None,
+) -> Iterator[Tuple[date, str, List[DecisionResult]]]:
+    # 逐轮产出 (日期, 产品, 决策)；max_polls 为 None 时持续运行，直到调用方停止迭代
+    context = context or get_context()
+    follower = TailFollower(context)
+    polls = 0
+    while True:
+        for run_date in affected_dates(follower.poll()):
+            for product in products:
+                if cache is None:
+                    results = run_pipeline(product, run_date, context=context)
+                else:
+                    results = run_pipeline_cached(product, run_date, context=context, cache=cache)
+                yield run_date, product, results
+        polls += 1
+        if max_polls is not None and polls >= max_polls:
+            return
+        time.sleep(interval)
@@ -2,22 +2,25 @@
 
 from __future__ import annotations
 
-from typing import List
+from pathlib import Path
+from typing import Dict, List
 
+from system.config_bundle import CONFIG_DIR, load_bundle
 from system.models import MonitorItem, MonitorPlan
-from system.product.resolver import resolve_assets, resolve_theme_constraint, resolve_themes
 
 
-def build_monitor_plan(product: str) -> MonitorPlan:
-    # 读取产品资产与主题列表
-    assets = resolve_assets(product)
-    themes = resolve_themes(product)
+def build_monitor_plan(product: str, config_dir: Path = CONFIG_DIR) -> MonitorPlan:
+    # 从配置快照读取产品资产与主题列表，与 resolver 的结果一致但无需加载 pandas
+    bundle = load_bundle(config_dir)
+    theme_config = bundle["themes"].get("themes", {})
+    assets_by_theme: Dict[str, List[str]] = {}
+    for row in bundle["assets"]:
+        if row["product"] == product:
+            assets_by_theme.setdefault(row["theme"], []).append(row["asset_id"])
     items: List[MonitorItem] = []
-    for theme in themes:
+    for theme in sorted(assets_by_theme):
         # 每个主题关联一个约束，并绑定对应资产
-        constraint = resolve_theme_constraint(theme)
-        theme_assets = assets[assets["theme"] == theme]
-        asset_names = theme_assets["asset_id"].tolist()
-        items.append(MonitorItem(theme=theme, constraint_id=constraint["constraint_id"], assets=asset_names))
+        constraint_id = theme_config.get(theme, {}).get("constraint_id", "")
+        items.append(MonitorItem(theme=theme, constraint_id=constraint_id, assets=assets_by_theme[theme]))
     # 返回可用于监控的计划结构
     return MonitorPlan(product=product, items=items)
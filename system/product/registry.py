@@ -4,18 +4,18 @@ from __future__ import annotations
 
 from typing import Dict, List
 
-from system.config_loader import load_products
+from system.config_bundle import load_bundle
 
 
 def list_products() -> List[str]:
-    # 返回所有已配置产品名称
-    products = load_products()
+    # 返回所有已配置产品名称（读取配置快照，无需解析 YAML）
+    products = load_bundle()["products"]
     return sorted(products.get("products", {}).keys())
 
 
 def get_product_themes(product: str) -> List[str]:
     # 获取单个产品的主题列表，若不存在则抛错提示
-    products = load_products()
+    products = load_bundle()["products"]
     themes = products.get("products", {}).get(product)
     if themes is None:
         raise ValueError(f"未找到产品: {product}")
@@ -24,6 +24,6 @@ def get_product_themes(product: str) -> List[str]:
 
 def get_product_meta(product: str) -> Dict:
     # 读取产品元数据（例如显示名称、描述等）
-    products = load_products()
+    products = load_bundle()["products"]
     meta = products.get("meta", {}).get(product, {})
     return meta
@@ -0,0 +1,144 @@
+"""性能剖析：为流程步骤与回测阶段记录耗时/内存分配，输出汇总表与 Chrome Trace。
+
+剖析器通过 profiling() 激活，未激活时各埋点只做一次空判断，不影响正常运行。
+Trace 文件可在 chrome://tracing 或 Perfetto 中打开。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# 埋点起点：(perf_counter 纳秒, 当前已分配字节数)
+Token = Tuple[int, int]
+
+_ACTIVE: ContextVar[Optional["Profiler"]] = ContextVar("active_profiler", default=None)
+# 未激活时复用同一个空上下文，避免每次埋点都创建对象
+_NULL = nullcontext()
+
+
+class Profiler:
+    """剖析器：收集 (名称, 类别, 起点, 时长, 分配字节) 事件。"""
+
+    def __init__(self, memory: bool = False) -> None:
+        # memory=True 时借助 tracemalloc 统计每段的净分配字节数，开销较大
+        self.memory = memory
+        self.events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def start(self) -> Token:
+        allocated = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        return time.perf_counter_ns(), allocated
+
+    def record(self, name: str, category: str, token: Token, **args: Any) -> None:
+        # 以 start() 返回的起点结束一段计时
+        end = time.perf_counter_ns()
+        start, allocated = token
+        event = {
+            "name": name,
+            "cat": category,
+            "ts": start - self._origin,
+            "dur": end - start,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        if self.memory:
+            event["alloc"] = tracemalloc.get_traced_memory()[0] - allocated
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = "step", **args: Any) -> Iterator[None]:
+        token = self.start()
+        try:
+            yield
+        finally:
+            self.record(name, category, token, **args)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        # 按 (类别, 名称) 聚合：次数、总耗时与 p50/p99（毫秒），按首次出现顺序排列
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for event in self.events:
+            groups.setdefault((event["cat"], event["name"]), []).append(event)
+        rows = []
+        for (category, name), events in groups.items():
+            durations = np.array([event["dur"] for event in events], dtype=float) / 1e6
+            row = {
+                "category": category,
+                "name": name,
+                "count": len(events),
+                "total_ms": float(durations.sum()),
+                "mean_ms": float(durations.mean()),
+                "p50_ms": float(np.percentile(durations, 50)),
+                "p99_ms": float(np.percentile(durations, 99)),
+            }
+            if self.memory:
+                row["alloc_kb"] = sum(event["alloc"] for event in events) / 1024
+            rows.append(row)
+        return rows
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        # Chrome Trace Event 格式：完整事件 ph="X"，时间单位为微秒
+        pid = os.getpid()
+        trace_events = []
+        for event in self.events:
+            args = dict(event["args"])
+            if "alloc" in event:
+                args["alloc_bytes"] = event["alloc"]
+            trace_events.append(
+                {
+                    "name": event["name"],
+                    "cat": event["cat"],
+                    "ph": "X",
+                    "ts": event["ts"] / 1000,
+                    "dur": event["dur"] / 1000,
+                    "pid": pid,
+                    "tid": event["tid"],
+                    "args": args,
+                }
+            )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.chrome_trace(), handle, ensure_ascii=False, default=str)
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _ACTIVE.get()
+
+
+def span(name: str, category: str = "step", **args: Any) -> ContextManager[None]:
+    # 便捷埋点：有激活的剖析器时计时，否则返回空上下文
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        return _NULL
+    return profiler.span(name, category, **args)
+
+
+@contextmanager
+def profiling(profiler: Optional[Profiler]) -> Iterator[Optional[Profiler]]:
+    # 在当前上下文激活剖析器；传入 None 时不做任何事，便于调用方按开关统一书写
+    if profiler is None:
+        yield None
+        return
+    # 需要统计内存时临时开启 tracemalloc
+    started = profiler.memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    reset = _ACTIVE.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _ACTIVE.reset(reset)
+        if started:
+            tracemalloc.stop()
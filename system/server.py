@@ -0,0 +1,414 @@
+"""决策守护进程：常驻保持数据上下文，通过本地 HTTP 或 Unix 套接字以 JSON 应答请求。
+
+支持的命令：run（单日决策）、select（监控清单）、backtest（回测）、status（运行状态）。
+单日决策与监控清单在线程池中执行，共享进程内已加载的数据；回测在独立的进程池中执行，
+两类请求各自限定并发与排队数量，慢回测不会占满日常决策的工作线程。
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import json
+import math
+import multiprocessing
+import os
+import socketserver
+import stat
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from system import config_loader
+from system.config_bundle import load_bundle
+from system.data_context import DataContext, file_signature, get_context
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+COMMANDS = ("run", "select", "backtest", "status")
+
+Log = Callable[[str], None]
+
+
+class ServiceBusy(Exception):
+    """排队请求已达上限，调用方稍后重试。"""
+
+
+def _parse_date(value: Any, field: str) -> date:
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError as exc:
+        raise ValueError(f"{field} 需要 YYYY-MM-DD 格式: {value!r}") from exc
+
+
+def _require(request: Dict[str, Any], field: str) -> Any:
+    value = request.get(field)
+    if value in (None, ""):
+        raise ValueError(f"缺少参数: {field}")
+    return value
+
+
+def _jsonable(value: Any) -> Any:
+    # 标准 JSON 不支持 inf/nan（如收益因子），统一输出为 null；日期输出为 ISO 字符串
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def warm(context: DataContext) -> None:
+    # 预先加载全部配置、数据与索引，请求到来时无需再解析文件
+    load_bundle(context.config_dir)
+    for name in ("products", "themes", "constraints", "thresholds", "assets", "holidays"):
+        getattr(context, name)()
+    context.news_index()
+    context.macro_index()
+    context.calendar()
+
+
+def watched_files(context: DataContext) -> List[Path]:
+    # 配置目录下的 YAML/CSV、休市日文件以及全部行情数据文件（含分区）
+    paths = sorted(context.config_dir.glob("*.yaml")) + sorted(context.config_dir.glob("*.csv"))
+    paths += config_loader.holiday_files(context.config_dir)
+    for filename in config_loader.DATASET_FILES:
+        paths += config_loader.dataset_files(context.data_dir, filename)
+    return paths
+
+
+class FileWatcher(threading.Thread):
+    """轮询文件签名（mtime, 大小），发现变化时回调；文件增删同样视为变化。"""
+
+    def __init__(self, paths: Callable[[], List[Path]], on_change: Callable[[List[Path]], None], interval: float) -> None:
+        super().__init__(name="file-watcher", daemon=True)
+        self._paths = paths
+        self._on_change = on_change
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Any]:
+        snapshot: Dict[Path, Any] = {}
+        for path in self._paths():
+            try:
+                snapshot[path] = file_signature(path)
+            except FileNotFoundError:
+                continue
+        return snapshot
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            snapshot = self._scan()
+            changed = sorted(
+                path for path in set(snapshot) | set(self._snapshot) if snapshot.get(path) != self._snapshot.get(path)
+            )
+            self._snapshot = snapshot
+            if changed:
+                self._on_change(changed)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class _Lane:
+    """一类请求的执行通道：执行器限定并发，信号量限定排队与执行中的请求总数。"""
+
+    def __init__(self, name: str, executor: Executor, max_pending: int) -> None:
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # 名额已满时立即拒绝而不是无限排队，调用方收到 503 后自行重试
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy(f"{self.name} 请求排队已满（{self.max_pending}），请稍后重试")
+        with self._lock:
+            self._pending += 1
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+
+def _init_backtest_worker() -> None:
+    # 回测进程启动时预热自己的数据上下文，之后的回测请求复用
+    warm(get_context())
+
+
+def _backtest_job(product: str, start: str, end: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    # 在回测进程中执行；输出目录与命令行 backtest 一致，返回可序列化的结果
+    from system.backtest.engine import run_backtest
+    from system.backtest.schedule import parse_schedule
+    from system.pipeline.decision_cache import DecisionCache
+
+    output_dir = Path("backtest_output") / f"{product}_{start}_{end}"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _, _, summary = run_backtest(
+        product,
+        _parse_date(start, "start"),
+        _parse_date(end, "end"),
+        options.get("stage_overrides"),
+        str(output_dir),
+        stream=bool(options.get("stream", False)),
+        decision_cache=DecisionCache() if options.get("cache", True) else None,
+        resume=bool(options.get("resume", False)),
+        schedule=parse_schedule(options.get("rebalance") or "daily"),
+    )
+    return {"output_dir": str(output_dir), "summary": summary.dict()}
+
+
+class DecisionService:
+    """守护进程的请求处理核心，与传输方式（HTTP/Unix 套接字）无关。"""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        backtest_workers: int = 1,
+        max_pending: int = 16,
+        max_pending_backtests: int = 4,
+        use_cache: bool = True,
+        watch_interval: float = 2.0,
+        log: Optional[Log] = None,
+    ) -> None:
+        from system.pipeline.decision_store import DecisionCache
+
+        self.context = get_context()
+        self.cache = DecisionCache() if use_cache else None
+        self.watch_interval = watch_interval
+        self._log = log or (lambda message: None)
+        self._decisions = _Lane("决策", ThreadPoolExecutor(workers, thread_name_prefix="decision"), max_pending)
+        # 回测使用 spawn 子进程：守护进程已有多个线程，fork 可能复制到被其他线程持有的锁
+        self._backtests = _Lane(
+            "回测",
+            ProcessPoolExecutor(
+                backtest_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_backtest_worker,
+            ),
+            max_pending_backtests,
+        )
+        self._watcher: Optional[FileWatcher] = None
+        self.started_at = time.time()
+        self.reloads = 0
+
+    def start(self) -> None:
+        warm(self.context)
+        if self.watch_interval > 0:
+            self._watcher = FileWatcher(lambda: watched_files(self.context), self._reload, self.watch_interval)
+            self._watcher.start()
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+        self._decisions.executor.shutdown(wait=False, cancel_futures=True)
+        self._backtests.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reload(self, changed: List[Path]) -> None:
+        # 数据上下文按签名自动失效；此处提前重新加载，变化后的第一个请求无需等待解析
+        names = ", ".join(path.name for path in changed)
+        try:
+            warm(self.context)
+        except Exception as exc:  # noqa: BLE001 - 文件可能正在写入，下一轮轮询再试
+            self._log(f"重新加载失败（{names}）: {exc}")
+            return
+        self.reloads += 1
+        self._log(f"已重新加载: {names}")
+
+    def handle(self, command: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        # 参数错误抛出 ValueError/KeyError，排队已满抛出 ServiceBusy，由传输层转换为状态码
+        if command == "run":
+            return self._decisions.call(self._run, request)
+        if command == "select":
+            return self._decisions.call(self._select, request)
+        if command == "backtest":
+            return self._backtest(request)
+        if command == "status":
+            return self.status()
+        raise KeyError(command)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "uptime": round(time.time() - self.started_at, 3),
+            "reloads": self.reloads,
+            "pending": {"decision": self._decisions.pending, "backtest": self._backtests.pending},
+        }
+
+    def _product(self, request: Dict[str, Any]) -> str:
+        # 产品名称会拼入输出路径并写入审计库，只接受配置中已有的产品
+        product = str(_require(request, "product"))
+        if product not in self.context.products().get("products", {}):
+            raise ValueError(f"未配置的产品: {product!r}")
+        return product
+
+    def _run(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from system.audit import save_runs
+        from system.pipeline.decision_cache import run_pipeline_cached
+        from system.pipeline.runner import run_pipeline
+
+        date_str = str(_require(request, "date"))
+        run_date = _parse_date(date_str, "date")
+        if request.get("all_products"):
+            products = sorted(self.context.products().get("products", {}))
+        else:
+            products = [self._product(request)]
+        pending = []
+        for product in products:
+            if self.cache is None or request.get("cache") is False:
+                results = run_pipeline(product, run_date, context=self.context)
+            else:
+                results = run_pipeline_cached(product, run_date, context=self.context, cache=self.cache)
+            pending.append((date_str, product, results))
+        if request.get("save", True):
+            records = [
+                {"run_id": record.run_id, "product": record.product, "date": record.date, "results": record.results}
+                for record in save_runs(pending)
+            ]
+        else:
+            records = [{"run_id": None, "product": p, "date": d, "results": r} for d, p, r in pending]
+        for record in records:
+            record["results"] = [result.dict() for result in record["results"]]
+        return {"runs": records}
+
+    def _select(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from system.product.monitor_plan import build_monitor_plan
+
+        return build_monitor_plan(self._product(request), self.context.config_dir).dict()
+
+    def _backtest(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from system.backtest.schedule import parse_schedule
+
+        product = self._product(request)
+        start = str(_require(request, "start"))
+        end = str(_require(request, "end"))
+        # 参数在守护进程内先校验，错误请求不占用回测进程
+        _parse_date(start, "start")
+        _parse_date(end, "end")
+        parse_schedule(request.get("rebalance") or "daily")
+        options = {key: request[key] for key in ("stage_overrides", "stream", "cache", "resume", "rebalance") if key in request}
+        if self.cache is None:
+            options["cache"] = False
+        return self._backtests.call(_backtest_job, product, start, end, options)
+
+
+def _dispatch(service: DecisionService, command: str, request: Dict[str, Any]) -> tuple[int, Dict[str, Any]]:
+    # 统一的错误映射：两种传输方式返回相同的状态码与 JSON 结构
+    if command not in COMMANDS:
+        return 404, {"error": f"未知命令: {command}"}
+    try:
+        return 200, _jsonable(service.handle(command, request))
+    except ServiceBusy as exc:
+        return 503, {"error": str(exc)}
+    except (ValueError, KeyError, FileNotFoundError) as exc:
+        return 400, {"error": str(exc)}
+    except Exception as exc:  # noqa: BLE001 - 单个请求失败不影响守护进程
+        return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    # POST /<命令> 携带 JSON 请求体；GET /status 查看运行状态
+    service: DecisionService
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server 约定的方法名
+        if self.path.rstrip("/") == "/status":
+            self._reply(*_dispatch(self.service, "status", {}))
+        else:
+            self._reply(404, {"error": "使用 POST /run、/select、/backtest 或 GET /status"})
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as exc:
+            self._reply(400, {"error": f"请求体不是合法 JSON: {exc}"})
+            return
+        if not isinstance(request, dict):
+            self._reply(400, {"error": "请求体需要是 JSON 对象"})
+            return
+        self._reply(*_dispatch(self.service, self.path.strip("/"), request))
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        # 默认会逐条写标准错误，守护进程只记录重新加载等事件
+        pass
+
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    # 每行一个 JSON 请求（含 command 字段），每行一个 JSON 应答：{"status": 状态码, "body": ...}
+    service: DecisionService
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("请求需要是 JSON 对象")
+            except ValueError as exc:
+                status, body = 400, {"error": f"请求不是合法 JSON 对象: {exc}"}
+            else:
+                status, body = _dispatch(self.service, str(request.pop("command", "")), request)
+            self.wfile.write(json.dumps({"status": status, "body": body}, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def make_server(
+    service: DecisionService,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+) -> socketserver.BaseServer:
+    # 指定 socket_path 时监听 Unix 套接字，否则监听本机 HTTP 端口
+    if socket_path:
+        path = Path(socket_path)
+        if path.is_symlink() or path.exists():
+            if not stat.S_ISSOCK(path.lstat().st_mode):
+                raise FileExistsError(f"{path} 已存在且不是套接字文件，拒绝覆盖")
+            # 上次异常退出遗留的套接字文件
+            path.unlink()
+        handler = type("SocketHandler", (_SocketHandler,), {"service": service})
+        server: socketserver.BaseServer = _UnixServer(str(path), handler)
+        os.chmod(path, 0o600)
+        return server
+    if not _is_loopback(host):
+        raise ValueError(f"HTTP 只允许监听本机回环地址: {host}")
+    handler = type("HTTPHandler", (_HTTPHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -2,33 +2,34 @@
 
 from __future__ import annotations
 
-from typing import List
+from system.data_context import DataContext, get_context
+from system.pipeline.state import PipelineState
 
-import pandas as pd
 
-from system.config_loader import load_news, load_products
-from system.models import DemandEvent, PipelineState
+def resolve_themes(state: PipelineState, context: DataContext | None = None) -> None:
+    context = context or get_context()
+    # 读取产品与主题配置，教学上强调：配置是策略逻辑的“地基”
+    products = context.products()
+    # 主题按配置顺序编号，后续步骤只使用下标；主题列表与日期无关
+    state.themes = list(products.get("products", {}).get(state.product, []))
 
 
-def apply(state: PipelineState) -> None:
-    # 读取产品与主题配置，教学上强调：配置是策略逻辑的“地基”
-    products = load_products()
-    themes = products.get("products", {}).get(state.product, [])
-    # 读取新闻数据并按日期、产品过滤到当天的样本
-    news = load_news()
-    day_news = news[(news["date"].dt.date == state.date) & (news["product"] == state.product)]
-    events: List[DemandEvent] = []
-    for theme in themes:
+def apply(state: PipelineState, context: DataContext | None = None) -> None:
+    context = context or get_context()
+    # 新闻索引按 (日期, 产品, 主题) 直接取当天样本
+    news_index = context.news_index()
+    signal = []
+    event_reason = []
+    for theme in state.themes:
         # 每个主题单独统计新闻数量，构建需求事件
-        theme_news = day_news[day_news["theme"] == theme]
-        if not theme_news.empty:
-            count = float(theme_news["news_count"].iloc[0])
-            reason = f"需求事件数量={int(count)}"
+        count = news_index.count(state.date, state.product, theme)
+        if count is not None:
+            event_reason.append(f"需求事件数量={int(count)}")
         else:
             count = 0.0
-            reason = "当日无新闻事件"
+            event_reason.append("当日无新闻事件")
         # 将新闻数量缩放为 0~1 的信号强度，便于后续步骤使用
-        signal_strength = min(1.0, count / 10.0)
-        events.append(DemandEvent(theme=theme, signal_strength=signal_strength, reason=reason))
+        signal.append(min(1.0, count / 10.0))
     # 把生成的事件写回到流程状态，供下一步读取
-    state.events = events
+    state.signal = signal
+    state.event_reason = event_reason
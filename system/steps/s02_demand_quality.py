@@ -2,20 +2,16 @@
 
 from __future__ import annotations
 
-from typing import List
-
-from system.models import DemandQuality, PipelineState
+from system.pipeline.state import PipelineState
 
 
 def apply(state: PipelineState) -> None:
     # 从阈值配置中取最小需求信号，默认值用于教学示例
     min_signal = float(state.thresholds.get("demand_signal_min", 0.3))
-    quality: List[DemandQuality] = []
-    for event in state.events:
-        # 这里用信号强度本身作为质量分数，便于理解
-        score = event.signal_strength
-        passed = score >= min_signal
-        reason = "需求信号达标" if passed else "需求信号不足"
-        quality.append(DemandQuality(theme=event.theme, quality_score=score, passed=passed, reason=reason))
+    # 这里用信号强度本身作为质量分数，便于理解
+    quality = list(state.signal)
+    passed = [score >= min_signal for score in quality]
     # 保存需求质量结果，供后续约束匹配使用
     state.quality = quality
+    state.passed = passed
+    state.quality_reason = ["需求信号达标" if flag else "需求信号不足" for flag in passed]
@@ -2,33 +2,32 @@
 
 from __future__ import annotations
 
-from typing import List
+from system.data_context import DataContext, get_context
+from system.pipeline.state import PipelineState
 
-from system.config_loader import load_constraints, load_themes
-from system.models import ConstraintSnapshot, PipelineState
 
-
-def apply(state: PipelineState) -> None:
+def apply(state: PipelineState, context: DataContext | None = None) -> None:
+    context = context or get_context()
     # 加载主题与约束配置，说明“业务映射”通常在配置中维护
-    themes = load_themes().get("themes", {})
-    constraints = load_constraints().get("constraints", {})
-    snapshots: List[ConstraintSnapshot] = []
-    for item in state.quality:
+    themes = context.themes().get("themes", {})
+    constraints = context.constraints().get("constraints", {})
+    constraint_ids = []
+    health_scores = []
+    break_risks = []
+    reasons = []
+    for theme in state.themes:
         # 每个主题对应一个约束 ID，再取约束指标
-        theme_info = themes.get(item.theme, {})
+        theme_info = themes.get(theme, {})
         constraint_id = theme_info.get("constraint_id", "")
         constraint_info = constraints.get(constraint_id, {})
         health = float(constraint_info.get("health_score", 0.5))
-        break_risk = float(constraint_info.get("break_risk", 0.5))
-        reason = f"约束={constraint_id} 健康度={health:.2f}"
-        snapshots.append(
-            ConstraintSnapshot(
-                theme=item.theme,
-                constraint_id=constraint_id,
-                health_score=health,
-                break_risk=break_risk,
-                reason=reason,
-            )
-        )
+        constraint_ids.append(constraint_id)
+        health_scores.append(health)
+        break_risks.append(float(constraint_info.get("break_risk", 0.5)))
+        reasons.append(f"约束={constraint_id} 健康度={health:.2f}")
     # 将约束快照写入流程状态，便于风险门控使用
-    state.constraints = snapshots
+    state.constraint_id = constraint_ids
+    state.health = health_scores
+    state.break_risk = break_risks
+    state.constraint_reason = reasons
+    state.active = list(range(len(state.themes)))
@@ -2,23 +2,18 @@
 
 from __future__ import annotations
 
-from typing import List
-
-from system.models import OpportunityScore, PipelineState
+from system.pipeline.state import PipelineState
 
 
 def apply(state: PipelineState) -> None:
     # 惩罚系数来自阈值配置，系数越大惩罚越重
     penalty = float(state.thresholds.get("break_risk_penalty", 0.3))
-    # 构造主题到约束的映射，便于查询破坏风险
-    constraint_map = {item.theme: item for item in state.constraints}
-    adjusted: List[OpportunityScore] = []
-    for score_item in state.scores:
-        constraint = constraint_map.get(score_item.theme)
-        break_risk = constraint.break_risk if constraint else 0.0
+    # 复制后再修改：步骤不原地改写输入，缓存中的上游结果保持不变
+    score = list(state.score)
+    break_risk = state.break_risk
+    for idx in state.active:
         # 机会分扣减破坏风险惩罚，并且不允许小于 0
-        score = max(0.0, score_item.score - break_risk * penalty)
-        reason = f"破坏风险惩罚={penalty:.2f}"
-        adjusted.append(OpportunityScore(theme=score_item.theme, score=score, reason=reason))
+        score[idx] = max(0.0, score[idx] - break_risk[idx] * penalty)
     # 更新为调整后的评分
-    state.scores = adjusted
+    state.score = score
+    state.score_reason = [f"破坏风险惩罚={penalty:.2f}"] * len(score)
@@ -2,17 +2,10 @@
 
 from __future__ import annotations
 
-from typing import List
-
-from system.models import PipelineState, ThemeRank
+from system.pipeline.state import PipelineState
 
 
 def apply(state: PipelineState) -> None:
-    # 对评分结果降序排序，分数高的排在前面
-    ranked = sorted(state.scores, key=lambda item: item.score, reverse=True)
-    ranks: List[ThemeRank] = []
-    for idx, item in enumerate(ranked, start=1):
-        # 排名从 1 开始，符合常见业务报表习惯
-        ranks.append(ThemeRank(theme=item.theme, rank=idx, score=item.score))
-    # 保存排名结果
-    state.ranks = ranks
+    # 对评分结果降序排序，分数高的排在前面；排序稳定，同分保持原顺序
+    # 排名从 1 开始，即 ranked 中的位置 + 1，符合常见业务报表习惯
+    state.ranked = sorted(state.active, key=state.score.__getitem__, reverse=True)
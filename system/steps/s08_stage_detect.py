@@ -2,40 +2,41 @@
 
 from __future__ import annotations
 
-from typing import List
+from system.data_context import DataContext, get_context
+from system.pipeline.state import PipelineState
 
-from system.config_loader import load_macro
-from system.models import PipelineState, StageResult
 
-
-def apply(state: PipelineState) -> None:
-    # 加载宏观数据并筛选当日记录
-    macro = load_macro()
-    day_macro = macro[macro["date"].dt.date == state.date]
-    if day_macro.empty:
+def apply(state: PipelineState, context: DataContext | None = None) -> None:
+    context = context or get_context()
+    # 从宏观索引读取当日记录
+    day_macro = context.macro_index().row(state.date)
+    if day_macro is None:
         # 若当日没有宏观数据，用默认值保证流程可运行
         real_yield = 1.0
         inflation = 2.0
     else:
-        real_yield = float(day_macro["REAL_YIELD"].iloc[0])
-        inflation = float(day_macro["INFLATION"].iloc[0])
-    stages: List[StageResult] = []
+        real_yield = float(day_macro["REAL_YIELD"])
+        inflation = float(day_macro["INFLATION"])
+    # 宏观条件对所有主题相同，只判定一次
+    if real_yield > 1.5:
+        base_stage, base_reason = "late", "实际利率偏高"
+    elif inflation > 3.0:
+        base_stage, base_reason = "mid", "通胀抬升"
+    else:
+        base_stage, base_reason = "early", "阶段偏早"
+    stage = ["early"] * len(state.themes)
+    stage_reason = [""] * len(state.themes)
     # 先读取当天的人工覆盖配置，优先级最高
     override_for_day = state.overrides.get(state.date.isoformat(), {})
-    for item in state.ranks:
+    for idx in state.ranked:
+        theme = state.themes[idx]
         # 覆盖配置可强制指定阶段，用于教学与回测修正
-        if item.theme in override_for_day:
-            stage = override_for_day[item.theme]
-            reason = "stage_override"
-        elif real_yield > 1.5:
-            stage = "late"
-            reason = "实际利率偏高"
-        elif inflation > 3.0:
-            stage = "mid"
-            reason = "通胀抬升"
+        if theme in override_for_day:
+            stage[idx] = override_for_day[theme]
+            stage_reason[idx] = "stage_override"
         else:
-            stage = "early"
-            reason = "阶段偏早"
-        stages.append(StageResult(theme=item.theme, stage=stage, reason=reason))
+            stage[idx] = base_stage
+            stage_reason[idx] = base_reason
     # 保存阶段判定结果
-    state.stages = stages
+    state.stage = stage
+    state.stage_reason = stage_reason
@@ -2,28 +2,17 @@
 
 from __future__ import annotations
 
-from typing import List
-
-from system.models import DecisionIntent, PipelineState
+from system.pipeline.state import PipelineState
 
 
 def apply(state: PipelineState) -> None:
-    # 先建立主题到阶段的映射，避免重复遍历
-    stage_map = {item.theme: item for item in state.stages}
-    adjusted: List[DecisionIntent] = []
-    for intent in state.intents:
-        stage = stage_map.get(intent.theme).stage if intent.theme in stage_map else "early"
+    intent = list(state.intent)
+    intent_reason = list(state.intent_reason)
+    for idx in state.ranked:
         # 晚期阶段倾向获利了结
-        if stage == "late" and intent.intent in {"ENTER", "ADD", "HOLD"}:
-            adjusted.append(
-                DecisionIntent(
-                    theme=intent.theme,
-                    intent="EXIT",
-                    reason="阶段偏晚止盈",
-                    score=intent.score,
-                )
-            )
-        else:
-            adjusted.append(intent)
+        if state.stage[idx] == "late" and intent[idx] in {"ENTER", "ADD", "HOLD"}:
+            intent[idx] = "EXIT"
+            intent_reason[idx] = "阶段偏晚止盈"
     # 保存调整后的意图
-    state.intents = adjusted
+    state.intent = intent
+    state.intent_reason = intent_reason
@@ -3,36 +3,26 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import List
 
-from system.models import DecisionIntent, PipelineState
+from system.pipeline.state import PipelineState
 
 
 def apply(state: PipelineState) -> None:
     # 每个约束允许的最大持仓数量
     max_exposure = int(state.thresholds.get("max_constraint_exposure", 2))
-    # 建立主题到约束 ID 的映射
-    constraint_map = {item.theme: item.constraint_id for item in state.constraints}
+    intent = list(state.intent)
+    intent_reason = list(state.intent_reason)
+    constraint_id = state.constraint_id
     exposure_counter = Counter()
-    for intent in state.intents:
+    for idx in state.ranked:
         # 统计每个约束下的入场/加仓数量
-        if intent.intent in {"ENTER", "ADD"}:
-            constraint_id = constraint_map.get(intent.theme, "")
-            exposure_counter[constraint_id] += 1
-    adjusted: List[DecisionIntent] = []
-    for intent in state.intents:
-        constraint_id = constraint_map.get(intent.theme, "")
+        if intent[idx] in {"ENTER", "ADD"}:
+            exposure_counter[constraint_id[idx]] += 1
+    for idx in state.ranked:
         # 超过暴露上限时，将入场意图改为减仓
-        if exposure_counter.get(constraint_id, 0) > max_exposure and intent.intent in {"ENTER", "ADD"}:
-            adjusted.append(
-                DecisionIntent(
-                    theme=intent.theme,
-                    intent="REDUCE",
-                    reason="组合约束暴露超限",
-                    score=intent.score,
-                )
-            )
-        else:
-            adjusted.append(intent)
+        if exposure_counter.get(constraint_id[idx], 0) > max_exposure and intent[idx] in {"ENTER", "ADD"}:
+            intent[idx] = "REDUCE"
+            intent_reason[idx] = "组合约束暴露超限"
     # 保存组合调整后的意图
-    state.intents = adjusted
+    state.intent = intent
+    state.intent_reason = intent_reason
@@ -0,0 +1,132 @@
+"""增量读取：记录行情 CSV 的已读位置，只解析新追加的行，并增量写入数据上下文。
+
+约定数据文件只在末尾追加；文件变短或表头变化视为被改写，改为整体重新读取。
+末尾不完整的一行（写入方尚未写完换行符）留到下一轮再读。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from system.data_context import DataContext
+
+DATASETS = ("prices", "macro", "news")
+
+
+class TailReader:
+    """单个 CSV 文件的追加读取器：已读字节位置 + 已读内容的滚动哈希。
+
+    文件以换行结尾时，滚动哈希与 file_digest 对整个文件的结果相同，
+    增量写入后的数据上下文与重新加载文件得到的缓存键一致。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.offset = 0
+        self.header = b""
+        self.signature: Tuple[int, int] = (0, 0)
+        self._digest = hashlib.sha1()
+
+    @property
+    def digest(self) -> str:
+        return self._digest.hexdigest()
+
+    def read(self) -> Optional[bytes]:
+        # 返回新增的完整行（不含表头），没有新行时为 b""；文件被改写时返回 None
+        stat = os.stat(self.path)
+        size = stat.st_size
+        if size < self.offset:
+            return None
+        self.signature = (stat.st_mtime_ns, size)
+        if size == self.offset:
+            return b""
+        with open(self.path, "rb") as handle:
+            if self.header and handle.read(len(self.header)) != self.header:
+                return None
+            handle.seek(self.offset)
+            data = handle.read(size - self.offset)
+        data = data[: data.rfind(b"\n") + 1]
+        if not data:
+            return b""
+        self.offset += len(data)
+        self._digest.update(data)
+        if self.header:
+            return data
+        split = data.find(b"\n") + 1
+        self.header = data[:split]
+        return data[split:]
+
+    def parse(self, body: bytes) -> pd.DataFrame:
+        # 补上表头后按与全量加载相同的方式解析
+        return pd.read_csv(io.BytesIO(self.header + body), parse_dates=["date"])
+
+
+class TailFollower:
+    """跟踪各行情数据集（含分区文件）的追加行，把增量写入数据上下文。
+
+    首次 poll 读取全量数据并替换上下文中的对应条目；之后每次只读取新增的行，
+    索引原地追加，耗时只与新增行数有关。上下文需为不限窗口的默认视图。
+    """
+
+    def __init__(self, context: DataContext, names: Tuple[str, ...] = DATASETS) -> None:
+        self.context = context
+        self._readers: Dict[str, Dict[Path, TailReader]] = {name: {} for name in names}
+
+    def _ingest(self, name: str, readers: List[TailReader], frame: pd.DataFrame, append: bool) -> None:
+        # 签名与哈希按 sources_signature / sources_digest 的方式组合，与 DataContext._load 一致
+        signature = tuple((reader.path.name, *reader.signature) for reader in readers)
+        digest = hashlib.sha1()
+        for reader in readers:
+            digest.update(reader.path.name.encode("utf-8"))
+            digest.update(reader.digest.encode("ascii"))
+        self.context.ingest(name, frame, signature, digest.hexdigest(), append=append)
+
+    def _reload(self, name: str, files: List[Path]) -> pd.DataFrame:
+        readers = self._readers[name]
+        readers.clear()
+        frames = []
+        for path in files:
+            reader = readers[path] = TailReader(path)
+            body = reader.read() or b""
+            if reader.header:
+                frames.append(reader.parse(body))
+        if not frames:
+            # 文件还没有写完表头，下一轮再读
+            readers.clear()
+            return pd.DataFrame()
+        frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        self._ingest(name, list(readers.values()), frame, append=False)
+        return frame
+
+    def poll(self) -> Dict[str, Tuple[pd.DataFrame, bool]]:
+        # 返回本轮有变化的数据集：名称 -> (新增行, 是否整体重新读取)；整体重新读取时为全部数据
+        changes: Dict[str, Tuple[pd.DataFrame, bool]] = {}
+        for name, readers in self._readers.items():
+            files = self.context.dataset_files(name)[1]
+            if not files:
+                continue
+            if not readers or any(path not in files for path in readers):
+                changes[name] = (self._reload(name, files), True)
+                continue
+            parts = []
+            for path in files:
+                reader = readers.setdefault(path, TailReader(path))
+                body = reader.read()
+                if body is None:
+                    break
+                if body:
+                    parts.append(reader.parse(body))
+            else:
+                if parts:
+                    delta = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+                    self._ingest(name, [readers[path] for path in files], delta, append=True)
+                    changes[name] = (delta, False)
+                continue
+            changes[name] = (self._reload(name, files), True)
+        return changes
@@ -0,0 +1,50 @@
+"""交易日历：由行情数据中实际出现的日期构成，可叠加交易所休市日。
+
+回测与指标只在真实交易日上迭代：周末、节假日等没有行情的自然日不再运行流程，
+也不再计入权益曲线与 trading_days。
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Iterable, List, Optional
+
+from system.indexes import PriceIndex
+
+
+class TradingCalendar:
+    """交易日历：升序的交易日列表，支持区间查询与前后交易日定位。"""
+
+    def __init__(self, sessions: Iterable[date], holidays: Iterable[date] = ()) -> None:
+        # 休市日即使有行情（例如沿用前一日价格的数据源）也不视为交易日
+        closed = set(holidays)
+        self._sessions: List[date] = sorted(set(sessions) - closed)
+        self._lookup = set(self._sessions)
+
+    @classmethod
+    def from_price_index(cls, index: PriceIndex, holidays: Iterable[date] = ()) -> "TradingCalendar":
+        # 有任一标的收盘价的日期即为交易日
+        return cls(index.dates(), holidays)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, run_date: date) -> bool:
+        return run_date in self._lookup
+
+    def sessions(self, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        # [start, end] 内的交易日，None 表示不限
+        lo = bisect_left(self._sessions, start) if start is not None else 0
+        hi = bisect_right(self._sessions, end) if end is not None else len(self._sessions)
+        return self._sessions[lo:hi]
+
+    def next_session(self, run_date: date) -> Optional[date]:
+        # 严格晚于 run_date 的第一个交易日
+        pos = bisect_right(self._sessions, run_date)
+        return self._sessions[pos] if pos < len(self._sessions) else None
+
+    def previous_session(self, run_date: date) -> Optional[date]:
+        # 严格早于 run_date 的最后一个交易日
+        pos = bisect_left(self._sessions, run_date)
+        return self._sessions[pos - 1] if pos else None
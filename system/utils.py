@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import os
+import uuid
 from datetime import datetime
 from typing import Any, Dict
 
@@ -15,8 +16,9 @@ def ensure_dir(path: str) -> None:
 
 def generate_run_id(prefix: str) -> str:
     # 生成 UTC 时间戳，避免本地时区差异带来的排序问题
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    return f"{prefix}-{timestamp}"
+    # 微秒时间戳 + 随机后缀：并行运行（多进程、同一微秒）也不会撞号，且仍按时间排序
+    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    return f"{prefix}-{timestamp}-{uuid.uuid4().hex[:8]}"
 
 
 def save_json(path: str, payload: Dict[str, Any]) -> None:
@@ -0,0 +1,144 @@
+"""数据源适配器与本地合并：对本地桩数据源拉取，验证重试、连接复用、长表规范化与追加/改写。"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from system.config_loader import DATA_DIR, load_macro, load_news, load_prices
+from system.feeds.adapters import FeedError, MacroFeed, NewsFeed, build_adapters, fetch_all
+from system.feeds.store import DATASETS, persist
+from system.feeds.stub_server import make_stub_server
+
+# 本地数据截止日；拉取区间从次日开始，全部晚于本地数据
+CUTOFF = "2025-10-15"
+START, END = date(2025, 10, 16), date(2026, 1, 19)
+LOADERS = {"prices": load_prices, "macro": load_macro, "news": load_news}
+
+
+@pytest.fixture
+def local_dir(tmp_path: Path) -> Path:
+    # 示例数据截断到 CUTOFF，模拟尚未拉取新数据的本地目录
+    for filename, _ in DATASETS.values():
+        lines = (DATA_DIR / filename).read_bytes().splitlines(keepends=True)
+        kept = [line for line in lines[1:] if line[:10].decode() <= CUTOFF]
+        (tmp_path / filename).write_bytes(lines[0] + b"".join(kept))
+    return tmp_path
+
+
+@pytest.fixture
+def stub():
+    # 返回启动桩服务的函数：(fail_every) -> (服务, 基础地址)，测试结束后统一关闭
+    servers = []
+
+    def start(fail_every: int = 0):
+        server = make_stub_server(DATA_DIR, port=0, fail_every=fail_every)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address[:2]
+        return server, f"http://{host}:{port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _config(base: str) -> dict:
+    return {
+        "news": {"url": f"{base}/news", "batch_days": 7, "backoff": 0.01},
+        "macro": {"url": f"{base}/macro", "params": {"format": "long"}, "batch_days": 10, "backoff": 0.01},
+        "prices": {"url": f"{base}/prices", "params": {"format": "csv"}, "batch_days": 7, "backoff": 0.01},
+    }
+
+
+def _fetch(config: dict, start: date, end: date, stats: dict | None = None, max_per_host: int = 4) -> dict:
+    return asyncio.run(fetch_all(build_adapters(config), start, end, max_per_host, 5.0, stats))
+
+
+def _local(name: str, start: date, end: date) -> pd.DataFrame:
+    # 加载器的 start/end 只用于挑选分区，这里再按日期截取
+    frame = LOADERS[name](DATA_DIR, start, end)
+    days = frame["date"].dt.date
+    return frame[(days >= start) & (days <= end)]
+
+
+def _assert_same(left: pd.DataFrame, right: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(left.reset_index(drop=True), right.reset_index(drop=True), check_exact=False)
+
+
+def test_fetch_retries_injected_failures_and_reuses_connections(stub) -> None:
+    server, base = stub(fail_every=3)
+    stats: dict = {}
+    frames = _fetch(_config(base), START, END, stats, max_per_host=2)
+    for name in LOADERS:
+        local = _local(name, START, END)
+        # 长表透视后的宏观列按名称排序，按本地列顺序比较
+        _assert_same(frames[name][list(local.columns)], local)
+    # 每第 3 个请求返回 503，重试后全部批次成功；请求数含重试
+    assert server.RequestHandlerClass.state.requests == stats["requests"]
+    assert stats["requests"] >= 3
+    assert stats["connections"] < stats["requests"]
+
+
+def test_retries_exhausted_raise_feed_error(stub) -> None:
+    _, base = stub(fail_every=1)
+    adapter = NewsFeed(f"{base}/news", retries=2, backoff=0.01)
+    with pytest.raises(FeedError, match="重试 2 次"):
+        asyncio.run(fetch_all([adapter], START, START))
+
+
+def test_malformed_response_raises_feed_error() -> None:
+    async def run() -> None:
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            await fetch_all([NewsFeed(f"http://127.0.0.1:{port}/news", retries=1, backoff=0.01)], START, START)
+        finally:
+            server.close()
+
+    with pytest.raises(FeedError, match="ValueError"):
+        asyncio.run(run())
+
+
+def test_macro_long_format_normalizes_to_local_columns(stub) -> None:
+    _, base = stub()
+    adapter = MacroFeed(f"{base}/macro", params={"format": "long"}, batch_days=10)
+    frame = asyncio.run(fetch_all([adapter], START, END))["macro"]
+    local = _local("macro", START, END)
+    assert sorted(frame.columns) == sorted(local.columns)
+    _assert_same(frame[list(local.columns)], local)
+
+
+def test_persist_appends_newer_data_and_rewrites_on_overlap(stub, local_dir: Path) -> None:
+    _, base = stub()
+    config = _config(base)
+    before = {filename: (local_dir / filename).read_bytes() for filename, _ in DATASETS.values()}
+    written = persist(_fetch(config, START, END), local_dir)
+    assert {name: [mode for _, mode, _ in files] for name, files in written.items()} == {
+        "prices": ["appended"],
+        "macro": ["appended"],
+        "news": ["appended"],
+    }
+    # 追加只写在文件末尾，已有行逐字节保持原样；内容与完整示例数据一致
+    for filename, content in before.items():
+        assert (local_dir / filename).read_bytes().startswith(content)
+    for name, loader in LOADERS.items():
+        _assert_same(loader(local_dir), loader(DATA_DIR))
+
+    # 与已有日期重叠（数据修订）时整体改写，按 (日期, 键列) 去重后内容不变
+    written = persist(_fetch(config, date(2025, 12, 1), date(2025, 12, 31)), local_dir)
+    assert {mode for files in written.values() for _, mode, _ in files} == {"rewritten"}
+    for name, loader in LOADERS.items():
+        _assert_same(loader(local_dir), loader(DATA_DIR))